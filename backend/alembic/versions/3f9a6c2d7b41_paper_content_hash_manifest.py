@@ -0,0 +1,30 @@
+"""Paper content hash + pipeline version for incremental indexing
+
+Revision ID: 3f9a6c2d7b41
+Revises: c5338c1a4d18
+Create Date: 2026-10-16 09:12:40.118305
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3f9a6c2d7b41'
+down_revision: Union[str, None] = 'c5338c1a4d18'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('papers', sa.Column('content_hash', sa.String(length=64), nullable=True))
+    op.add_column('papers', sa.Column('pipeline_version', sa.String(length=64), nullable=True))
+    op.create_index(op.f('ix_papers_content_hash'), 'papers', ['content_hash'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_papers_content_hash'), table_name='papers')
+    op.drop_column('papers', 'pipeline_version')
+    op.drop_column('papers', 'content_hash')
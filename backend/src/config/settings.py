@@ -26,10 +26,17 @@ class Settings(BaseSettings):
     CHROMA_HOST: str = Field(default="localhost")
     CHROMA_PORT: int = Field(default=8000)
     CHROMA_COLLECTION: str = Field(default="researchforge_docs")
+    VECTOR_BACKEND: str = Field(default="chroma")  # or "embedded": in-process, no server
+    VECTOR_STORE_DIR: str = Field(default="data/vectors")
+    VECTOR_INDEX: str = Field(default="exact")  # embedded: "exact" (NumPy) or "hnsw"
+    VECTOR_QUANTIZATION: str = Field(default="none")  # embedded: "sq8" = int8 scan + float32 rescoring
     
     # Local Models
     EMBEDDING_MODEL: str = Field(default="sentence-transformers/all-MiniLM-L6-v2")
     RERANKER_MODEL: str = Field(default="cross-encoder/ms-marco-MiniLM-L-6-v2")
+    EMBEDDING_BACKEND: str = Field(default="torch")  # "torch" or "onnx" (int8, CPU)
+    ONNX_MODEL_DIR: str = Field(default="data/onnx")
+    EMBEDDING_WORKERS: int = Field(default=0)  # Bulk-indexing encoder processes, 0 = none
     
     # Application Settings
     ENVIRONMENT: str = Field(default="development")
@@ -37,6 +44,18 @@ class Settings(BaseSettings):
     CHUNK_SIZE: int = Field(default=512)
     CHUNK_OVERLAP: int = Field(default=50)
     TOP_K_RETRIEVAL: int = Field(default=5)
+    FIGURE_STORE_DIR: str = Field(default="data/figures")
+    PAPER_TEXT_DIR: str = Field(default="data/paper_text")
+    PARENT_INDEX_PATH: str = Field(default="data/parents.sqlite3")
+    BM25_INDEX_DIR: str = Field(default="data/bm25")
+    RAPTOR_INDEX_PATH: str = Field(default="data/raptor.sqlite3")  # raptor_scope="corpus"
+    SUMMARY_CACHE_PATH: str = Field(default="data/summaries.sqlite3")  # raptor_summaries="llm"
+    SUMMARY_CONCURRENCY: int = Field(default=8)
+    SUMMARY_DEADLINE_S: float = Field(default=120.0)  # Per RAPTOR level, then truncation
+    SUMMARY_MAX_CALLS: int = Field(default=0)  # LLM calls per RAPTOR level, 0 = unlimited
+    EMBEDDING_CACHE_DIR: str = Field(default="data/embedding_cache")  # "" disables
+    EMBEDDING_CACHE_SIZE: int = Field(default=200000)
+    QUERY_CACHE_SIZE: int = Field(default=10000)  # In-memory query embedding LRU
     
     # LangSmith Tracing
     LANGSMITH_TRACING: bool = Field(default=True)
@@ -0,0 +1,717 @@
+"""
+Embedded Vector Store: In-process stand-in for the Chroma HTTP client
+Vectors live in a memory-mapped float32 matrix, metadata in columnar
+arrays (JSON snapshot + append-only log). Search is exact NumPy, or an
+HNSW graph (chroma-hnswlib) with index="hnsw". With quantization="sq8"
+the exact scan runs on 8-bit codes and only a shortlist is rescored from
+the float32 file. No server, no JSON on the query path. Single writer
+per directory.
+"""
+import json
+import mmap
+import os
+import shutil
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .quantization import BLOCK_ROWS, TRAIN_SAMPLE, ScalarQuantizer
+
+try:
+    import hnswlib  # Shipped as chroma-hnswlib
+except ImportError:
+    hnswlib = None
+
+
+QUERY_INCLUDE = ("metadatas", "documents", "distances")
+GET_INCLUDE = ("metadatas", "documents")
+EXACT_MAX_ROWS = 20_000  # Filtered HNSW queries matching fewer rows scan them exactly
+HNSW_OVERFETCH = 4
+COMPACT_LOG_LINES = 10_000  # Fold the log into the snapshot on open past this
+COMPACT_DEAD_FRACTION = 0.2  # Compact on delete once this share of slots is dead
+COMPACT_DEAD_MIN = 1_000
+GATHER_FRACTION = 0.25  # Filters keeping fewer rows copy them out; others scan the prefix
+RESCORE_FACTOR = 8  # sq8: candidates per result rescored with float32
+RESCORE_MIN = 64
+
+
+class EmbeddedCollection:
+    """
+    Layout of <root>/<name>/:
+        collection.json   {"name", "metadata", "dim", "quantization"}
+        vectors.f32       row-major float32 matrix, one row per slot
+        norms.f32         L2 norm of each row (opening never reads the vectors)
+        codes.u8          sq8 codes of the same rows (quantization="sq8")
+        sq8.json          quantizer ranges
+        columns.json      {"ids", "documents", "columns": {key: [value per slot]}}
+        log.jsonl         upserts/deletes since the snapshot
+        hnsw.bin          HNSW graph (index="hnsw"), rebuilt if stale
+
+    Rows are addressed by slot; deleted slots stay dead until compact().
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        name: str,
+        metadata: Optional[Dict] = None,
+        index: str = "exact",
+        quantization: str = "none"
+    ):
+        self.path = path
+        self.name = name
+        self._lock = threading.RLock()
+
+        config_path = path / "collection.json"
+        if config_path.exists():
+            config = json.loads(config_path.read_text())
+        else:
+            path.mkdir(parents=True, exist_ok=True)
+            config = {"name": name, "metadata": metadata or {}, "dim": None, "quantization": quantization}
+            config_path.write_text(json.dumps(config))
+        self.metadata = config["metadata"]
+        self.quantization = config.get("quantization", quantization)  # Fixed at creation
+        if self.quantization not in ("none", "sq8"):
+            raise ValueError(f"Unknown quantization: {self.quantization}")
+        self.space = self.metadata.get("hnsw:space", "l2")  # Chroma's default
+        self._dim = config["dim"]
+
+        if index == "hnsw" and hnswlib is None:
+            print("⚠️ hnswlib not installed, using exact search")
+            index = "exact"
+        self.index = index
+        self._hnsw = None
+
+        self._ids: List[Optional[str]] = []
+        self._slot: Dict[str, int] = {}
+        self._documents: List[Optional[str]] = []
+        self._columns: Dict[str, List] = {}
+        self._column_cache: Dict[Tuple[str, str], np.ndarray] = {}
+        self._capacity = 0
+        self._vectors: Optional[np.ndarray] = None
+        self._codes: Optional[np.ndarray] = None
+        self._quantizer: Optional[ScalarQuantizer] = None
+        self._norms: Optional[np.ndarray] = None
+        self._live = np.zeros(0, dtype=bool)
+
+        self._load()
+
+    # ----- persistence -----
+
+    def _load(self):
+        snapshot = self.path / "columns.json"
+        if snapshot.exists():
+            data = json.loads(snapshot.read_text())
+            self._ids = data["ids"]
+            self._documents = data["documents"]
+            self._columns = data["columns"]
+
+        log_lines = 0
+        log_path = self.path / "log.jsonl"
+        if log_path.exists():
+            with open(log_path) as f:
+                for line in f:
+                    if not line.endswith("\n"):
+                        break  # Torn last write
+                    self._apply(json.loads(line))
+                    log_lines += 1
+
+        self._slot = {record_id: slot for slot, record_id in enumerate(self._ids) if record_id is not None}
+        if self._dim:
+            stale_norms = not (self.path / "norms.f32").exists()  # Written before norms were kept
+            self._map_vectors(max(len(self._ids), 1))
+            n = len(self._ids)
+            self._live[:n] = [record_id is not None for record_id in self._ids]
+            if stale_norms and n:
+                self._norms[:n] = np.linalg.norm(self._vectors[:n], axis=1)
+                self._norms.flush()
+            if self.index == "hnsw":
+                self._load_hnsw()
+            if self.quantization == "sq8":
+                self._load_codes()
+
+        if log_lines > COMPACT_LOG_LINES:
+            self.compact()
+
+    def _apply(self, entry: Dict):
+        """Replay one log entry onto the in-memory columns"""
+        if entry["op"] == "put":
+            for slot, record_id, document, metadata in entry["rows"]:
+                self._set_row(slot, record_id, document, metadata)
+        elif entry["op"] == "del":
+            for slot in entry["slots"]:
+                self._ids[slot] = None
+                self._documents[slot] = None
+                for column in self._columns.values():
+                    column[slot] = None
+
+    def _set_row(self, slot: int, record_id: str, document: Optional[str], metadata: Optional[Dict]):
+        while len(self._ids) <= slot:
+            self._ids.append(None)
+            self._documents.append(None)
+            for column in self._columns.values():
+                column.append(None)
+        self._ids[slot] = record_id
+        self._documents[slot] = document
+        metadata = metadata or {}
+        for key in metadata:
+            if key not in self._columns:
+                self._columns[key] = [None] * len(self._ids)
+        for key, column in self._columns.items():
+            column[slot] = metadata.get(key)
+
+    def _log(self, entry: Dict):
+        with open(self.path / "log.jsonl", "a") as f:
+            f.write(json.dumps(entry) + "\n")
+
+    def _map_vectors(self, rows: int):
+        """(Re)map vectors.f32 (and norms, codes) with room for at least ``rows`` rows"""
+        if rows <= self._capacity:
+            return
+        capacity = max(1024, 2 * self._capacity, rows)
+        for mapped in (self._vectors, self._norms, self._codes):
+            if mapped is not None:
+                mapped.flush()
+        self._vectors = self._map_file("vectors.f32", np.float32, (capacity, self._dim))
+        self._norms = self._map_file("norms.f32", np.float32, (capacity,))
+        if self.quantization == "sq8":
+            self._codes = self._map_file("codes.u8", np.uint8, (capacity, self._dim))
+            # Only shortlisted rows are read back: no readahead or fault-around,
+            # so the float32 file stays out of memory
+            if hasattr(mmap, "MADV_RANDOM") and self._vectors._mmap is not None:
+                self._vectors._mmap.madvise(mmap.MADV_RANDOM)
+        self._live = np.concatenate([self._live, np.zeros(capacity - len(self._live), dtype=bool)])
+        self._capacity = capacity
+        if self._hnsw is not None and self._hnsw.get_max_elements() < capacity:
+            self._hnsw.resize_index(capacity)
+
+    def _map_file(self, name: str, dtype, shape: Tuple[int, ...]) -> np.ndarray:
+        """Memory-map a file in the collection directory, grown to ``shape`` if shorter"""
+        path = self.path / name
+        with open(path, "ab") as f:
+            f.truncate(max(os.path.getsize(path), int(np.prod(shape)) * np.dtype(dtype).itemsize))
+        return np.memmap(path, dtype=dtype, mode="r+", shape=shape)
+
+    def _load_codes(self):
+        """Quantizer + codes; (re)trained from the float32 rows if missing"""
+        self._quantizer = ScalarQuantizer.load(self.path / "sq8.json")
+        if self._quantizer is None and self._ids:
+            self._train_quantizer(len(self._ids))
+
+    def _train_quantizer(self, n: int, include: Optional[np.ndarray] = None):
+        """Fit sq8 ranges on a sample of the first ``n`` slots' live rows (plus ``include``), re-encode them"""
+        live = np.flatnonzero(self._live[:n])
+        rows = len(live)
+        if rows > TRAIN_SAMPLE:
+            live = np.random.default_rng(0).choice(live, TRAIN_SAMPLE, replace=False)
+            if include is not None:
+                live = np.union1d(live, include)
+        self._quantizer = ScalarQuantizer.train(np.asarray(self._vectors[np.sort(live)]))
+        self._quantizer.trained_on = rows
+        self._quantizer.save(self.path / "sq8.json")
+        for start in range(0, n, BLOCK_ROWS):
+            self._codes[start:start + BLOCK_ROWS] = self._quantizer.encode(self._vectors[start:start + BLOCK_ROWS])
+        self._codes.flush()
+
+    def _load_hnsw(self):
+        """Saved graph if it covers every slot, otherwise rebuild from the vectors"""
+        n = len(self._ids)
+        self._hnsw = hnswlib.Index(space={"l2": "l2", "cosine": "cosine", "ip": "ip"}[self.space], dim=self._dim)
+        graph_path = self.path / "hnsw.bin"
+        if graph_path.exists():
+            self._hnsw.load_index(str(graph_path), max_elements=self._capacity)
+            if self._hnsw.get_current_count() == n:
+                self._hnsw.set_ef(64)
+                return
+            self._hnsw = hnswlib.Index(space=self._hnsw.space, dim=self._dim)
+
+        self._hnsw.init_index(max_elements=self._capacity, ef_construction=200, M=16)
+        self._hnsw.set_ef(64)
+        if n:
+            self._hnsw.add_items(self._vectors[:n], np.arange(n))
+            for slot in np.flatnonzero(~self._live[:n]):
+                self._hnsw.mark_deleted(int(slot))
+
+    def persist(self):
+        """Flush vectors and save the HNSW graph"""
+        with self._lock:
+            if self._vectors is not None:
+                self._vectors.flush()
+            if self._norms is not None:
+                self._norms.flush()
+            if self._codes is not None:
+                self._codes.flush()
+            if self._hnsw is not None:
+                self._hnsw.save_index(str(self.path / "hnsw.bin"))
+
+    def compact(self):
+        """Drop deleted rows: rewrite vectors + snapshot, empty the log"""
+        with self._lock:
+            keep = [slot for slot, record_id in enumerate(self._ids) if record_id is not None]
+            if self._dim:
+                tmp = self.path / "vectors.f32.tmp"
+                np.asarray(self._vectors[keep], dtype=np.float32).tofile(tmp)
+                self._vectors = None
+                os.replace(tmp, self.path / "vectors.f32")
+                tmp = self.path / "norms.f32.tmp"
+                np.asarray(self._norms[keep], dtype=np.float32).tofile(tmp)
+                self._norms = None
+                os.replace(tmp, self.path / "norms.f32")
+                # Codes are re-encoded with ranges fitted to the surviving rows
+                self._codes = None
+                (self.path / "codes.u8").unlink(missing_ok=True)
+                (self.path / "sq8.json").unlink(missing_ok=True)
+
+            snapshot = {
+                "ids": [self._ids[s] for s in keep],
+                "documents": [self._documents[s] for s in keep],
+                "columns": {key: [column[s] for s in keep] for key, column in self._columns.items()}
+            }
+            tmp = self.path / "columns.json.tmp"
+            tmp.write_text(json.dumps(snapshot))
+            os.replace(tmp, self.path / "columns.json")
+            (self.path / "log.jsonl").unlink(missing_ok=True)
+            (self.path / "hnsw.bin").unlink(missing_ok=True)
+
+            self._capacity = 0
+            self._live = np.zeros(0, dtype=bool)
+            self._hnsw = None
+            self._column_cache = {}
+            self._load()
+
+    # ----- writes -----
+
+    def upsert(
+        self,
+        ids: List[str],
+        embeddings=None,
+        metadatas: Optional[List[Dict]] = None,
+        documents: Optional[List[str]] = None
+    ):
+        """Insert or overwrite records (embeddings required: no embedding function)"""
+        if embeddings is None:
+            raise ValueError("EmbeddedCollection needs embeddings (no embedding function)")
+        vectors = np.asarray(embeddings, dtype=np.float32)
+        if vectors.ndim != 2 or len(vectors) != len(ids):
+            raise ValueError(f"Expected {len(ids)} embeddings, got shape {vectors.shape}")
+
+        with self._lock:
+            if self._dim is None:
+                self._dim = vectors.shape[1]
+                config = {"name": self.name, "metadata": self.metadata, "dim": self._dim,
+                          "quantization": self.quantization}
+                (self.path / "collection.json").write_text(json.dumps(config))
+                if self.index == "hnsw":
+                    self._map_vectors(max(len(ids), 1))
+                    self._load_hnsw()
+            if vectors.shape[1] != self._dim:
+                raise ValueError(f"Embedding dimension {vectors.shape[1]} != collection dimension {self._dim}")
+
+            slots = []
+            next_slot = len(self._ids)
+            for record_id in ids:
+                slot = self._slot.get(record_id)
+                if slot is None:
+                    slot = next_slot
+                    next_slot += 1
+                    self._slot[record_id] = slot
+                slots.append(slot)
+
+            self._map_vectors(next_slot)
+            slots_array = np.array(slots)
+            self._vectors[slots_array] = vectors
+            self._norms[slots_array] = np.linalg.norm(vectors, axis=1)
+            self._live[slots_array] = True
+            if self.quantization == "sq8":
+                if self._quantizer is None or self._quantizer.stale(vectors, int(self._live.sum())):
+                    self._train_quantizer(next_slot, include=slots_array)
+                else:
+                    self._codes[slots_array] = self._quantizer.encode(vectors)
+                    self._codes.flush()
+            if self._hnsw is not None:
+                self._hnsw.add_items(vectors, slots_array)
+
+            rows = [
+                [slot, record_id, documents[i] if documents else None, metadatas[i] if metadatas else None]
+                for i, (slot, record_id) in enumerate(zip(slots, ids))
+            ]
+            self._vectors.flush()  # Vectors before the log entry that points at them
+            self._norms.flush()
+            self._log({"op": "put", "rows": rows})
+            self._apply({"op": "put", "rows": rows})
+            self._column_cache = {}
+
+    add = upsert
+
+    def delete(self, ids: Optional[List[str]] = None, where: Optional[Dict] = None):
+        with self._lock:
+            if ids is not None:
+                slots = [self._slot[i] for i in ids if i in self._slot]
+                if where:
+                    mask = self._mask(where)
+                    slots = [s for s in slots if mask[s]]
+            elif where:
+                slots = np.flatnonzero(self._mask(where)).tolist()
+            else:
+                return
+            if not slots:
+                return
+
+            self._log({"op": "del", "slots": slots})
+            for slot in slots:
+                self._slot.pop(self._ids[slot], None)
+                if self._hnsw is not None:
+                    self._hnsw.mark_deleted(slot)
+            self._live[slots] = False
+            self._apply({"op": "del", "slots": slots})
+            self._column_cache = {}
+
+            dead = len(self._ids) - len(self._slot)
+            if dead > COMPACT_DEAD_MIN and dead > COMPACT_DEAD_FRACTION * len(self._ids):
+                self.compact()
+
+    # ----- reads -----
+
+    def count(self) -> int:
+        return len(self._slot)
+
+    def scan_bytes(self) -> int:
+        """Bytes an unfiltered exact query reads per row set: the memory that must stay hot"""
+        n = len(self._ids)
+        per_row = (self._dim or 0) * (1 if self._quantizer is not None else 4) + 4  # + norms
+        return n * per_row
+
+    def get(
+        self,
+        ids: Optional[List[str]] = None,
+        where: Optional[Dict] = None,
+        limit: Optional[int] = None,
+        offset: Optional[int] = None,
+        include: Sequence[str] = GET_INCLUDE
+    ) -> Dict:
+        with self._lock:
+            if ids is not None:
+                slots = [self._slot[i] for i in ids if i in self._slot]
+                if where:
+                    mask = self._mask(where)
+                    slots = [s for s in slots if mask[s]]
+            else:
+                slots = np.flatnonzero(self._mask(where)).tolist()
+            slots = slots[offset or 0:]
+            if limit is not None:
+                slots = slots[:limit]
+            return {
+                "ids": [self._ids[s] for s in slots],
+                "embeddings": self._vectors[slots].tolist() if "embeddings" in include and slots else None,
+                "documents": [self._documents[s] for s in slots] if "documents" in include else None,
+                "metadatas": [self._metadata(s) for s in slots] if "metadatas" in include else None
+            }
+
+    def query(
+        self,
+        query_embeddings=None,
+        n_results: int = 10,
+        where: Optional[Dict] = None,
+        include: Sequence[str] = QUERY_INCLUDE,
+        query_texts: Optional[List[str]] = None,
+        **kwargs
+    ) -> Dict:
+        """Nearest neighbours per query vector, Chroma result layout (lists per query)"""
+        if query_embeddings is None:
+            raise ValueError("EmbeddedCollection needs query_embeddings (embed with Embedder.embed_queries)")
+        queries = np.asarray(query_embeddings, dtype=np.float32).reshape(-1, self._dim or 1)
+
+        with self._lock:
+            if not self._slot:
+                slot_lists = [[] for _ in queries]
+                distance_lists = [[] for _ in queries]
+            else:
+                mask = self._mask(where) if where else None
+                slot_lists, distance_lists = self._search(queries, n_results, mask)
+
+            return {
+                "ids": [[self._ids[s] for s in slots] for slots in slot_lists],
+                "distances": distance_lists if "distances" in include else None,
+                "documents": [[self._documents[s] for s in slots] for slots in slot_lists]
+                if "documents" in include else None,
+                "metadatas": [[self._metadata(s) for s in slots] for slots in slot_lists]
+                if "metadatas" in include else None,
+                "embeddings": [self._vectors[slots].tolist() for slots in slot_lists]
+                if "embeddings" in include else None
+            }
+
+    def _search(self, queries: np.ndarray, k: int, mask: Optional[np.ndarray]):
+        if self._hnsw is not None and (mask is None or mask.sum() > EXACT_MAX_ROWS):
+            results = self._search_hnsw(queries, k, mask)
+            if results is not None:
+                return results
+
+        n = len(self._ids)
+        return self._search_exact(queries, k, self._live[:n] if mask is None else mask)
+
+    def _scan_rows(self, valid: np.ndarray) -> Tuple[np.ndarray, bool]:
+        """
+        Rows to scan for the slots where ``valid`` is set
+
+        Returns:
+            (rows, gathered): the valid slots themselves when the filter is
+            selective (copied out of the memmap), otherwise the whole
+            [:n] prefix, read in place; dead/filtered rows are then masked
+        """
+        n_valid = int(valid.sum())
+        if n_valid < len(valid) * GATHER_FRACTION:
+            return np.flatnonzero(valid), True
+        return np.arange(len(valid)), False
+
+    def _search_exact(self, queries: np.ndarray, k: int, valid: np.ndarray):
+        """Brute force over the slots where ``valid`` is set"""
+        n_valid = int(valid.sum())
+        if n_valid == 0:
+            return [[] for _ in queries], [[] for _ in queries]
+        if self._quantizer is not None and n_valid > max(k * RESCORE_FACTOR, RESCORE_MIN):
+            return self._search_quantized(queries, k, valid)
+
+        rows, gathered = self._scan_rows(valid)
+        if gathered:
+            vectors, norms = self._vectors[rows], self._norms[rows]
+        else:
+            vectors, norms = self._vectors[:len(rows)], self._norms[:len(rows)]
+
+        distances = self._distances(vectors @ queries.T, norms, queries)  # (rows, queries)
+        if not gathered:
+            distances[~valid] = np.inf
+        k = min(k, n_valid)
+        top = np.argpartition(distances, k - 1, axis=0)[:k] if k < len(rows) else \
+            np.broadcast_to(np.arange(len(rows))[:, None], distances.shape)
+
+        slot_lists, distance_lists = [], []
+        for q in range(len(queries)):
+            candidates = top[:, q]
+            order = candidates[np.argsort(distances[candidates, q], kind="stable")]
+            slot_lists.append(rows[order].tolist())
+            distance_lists.append(distances[order, q].tolist())
+        return slot_lists, distance_lists
+
+    def _search_quantized(self, queries: np.ndarray, k: int, valid: np.ndarray):
+        """sq8 scan over the codes, then exact float32 rescoring of a shortlist"""
+        rows, gathered = self._scan_rows(valid)
+        if gathered:
+            codes, norms = self._codes[rows], self._norms[rows]
+        else:
+            codes, norms = self._codes[:len(rows)], self._norms[:len(rows)]
+
+        approximate = self._distances(self._quantizer.dot(codes, queries), norms, queries)
+        if not gathered:
+            approximate[~valid] = np.inf
+        shortlist = max(k * RESCORE_FACTOR, RESCORE_MIN)
+        candidates = np.argpartition(approximate, shortlist - 1, axis=0)[:shortlist]
+
+        slot_lists, distance_lists = [], []
+        for q in range(len(queries)):
+            slots = np.sort(rows[candidates[:, q]])  # Ascending: sequential reads from the memmap
+            query = queries[q:q + 1]
+            exact = self._distances(self._vectors[slots] @ query.T, self._norms[slots], query)[:, 0]
+            order = np.argsort(exact, kind="stable")[:k]
+            slot_lists.append(slots[order].tolist())
+            distance_lists.append(exact[order].tolist())
+        return slot_lists, distance_lists
+
+    def _distances(self, dots: np.ndarray, norms: np.ndarray, queries: np.ndarray) -> np.ndarray:
+        """Chroma's distance conventions: squared L2, 1 - cosine, 1 - inner product"""
+        if self.space == "cosine":
+            query_norms = np.linalg.norm(queries, axis=1)
+            return 1 - dots / np.maximum(norms[:, None] * query_norms[None, :], 1e-12)
+        if self.space == "ip":
+            return 1 - dots
+        query_norms = np.einsum("ij,ij->i", queries, queries)
+        return np.maximum(norms[:, None] ** 2 + query_norms[None, :] - 2 * dots, 0)
+
+    def _search_hnsw(self, queries: np.ndarray, k: int, mask: Optional[np.ndarray]):
+        """Graph search; filtered queries over-fetch and post-filter (None = fall back)"""
+        fetch = min(k if mask is None else k * HNSW_OVERFETCH, self.count())
+        labels, distances = self._hnsw.knn_query(queries, k=fetch)
+        slot_lists, distance_lists = [], []
+        for row_labels, row_distances in zip(labels, distances):
+            keep = [(int(s), float(d)) for s, d in zip(row_labels, row_distances) if mask is None or mask[s]]
+            if mask is not None and len(keep) < min(k, int(mask.sum())):
+                return None  # Filter too selective for the over-fetch
+            slot_lists.append([s for s, _ in keep[:k]])
+            distance_lists.append([d for _, d in keep[:k]])
+        return slot_lists, distance_lists
+
+    # ----- metadata -----
+
+    def _metadata(self, slot: int) -> Dict:
+        return {key: column[slot] for key, column in self._columns.items() if column[slot] is not None}
+
+    def _column(self, key: str, kind: str) -> np.ndarray:
+        """Column as an object array ("obj") or float array with NaN gaps ("num")"""
+        cached = self._column_cache.get((key, kind))
+        if cached is not None:
+            return cached
+        values = self._columns.get(key, [None] * len(self._ids))
+        if kind == "obj":
+            column = np.empty(len(values), dtype=object)
+            column[:] = values
+        else:
+            column = np.array([
+                float(v) if isinstance(v, (int, float)) and not isinstance(v, bool) else np.nan
+                for v in values
+            ], dtype=np.float64)
+        self._column_cache[(key, kind)] = column
+        return column
+
+    def _mask(self, where: Optional[Dict]) -> np.ndarray:
+        n = len(self._ids)
+        mask = self._live[:n].copy()
+        if where:
+            mask &= self._eval(where, n)
+        return mask
+
+    def _eval(self, where: Dict, n: int) -> np.ndarray:
+        """Chroma where-filter: equality, $eq/$ne/$in/$nin/$gt/$gte/$lt/$lte, $and/$or"""
+        result = np.ones(n, dtype=bool)
+        for key, condition in where.items():
+            if key == "$and":
+                for clause in condition:
+                    result &= self._eval(clause, n)
+            elif key == "$or":
+                either = np.zeros(n, dtype=bool)
+                for clause in condition:
+                    either |= self._eval(clause, n)
+                result &= either
+            else:
+                if not isinstance(condition, dict):
+                    condition = {"$eq": condition}
+                for op, value in condition.items():
+                    result &= self._compare(key, op, value)
+        return result
+
+    def _compare(self, key: str, op: str, value) -> np.ndarray:
+        if op in ("$eq", "$ne", "$in", "$nin"):
+            column = self._column(key, "obj")
+            values = value if op in ("$in", "$nin") else [value]
+            hit = np.zeros(len(column), dtype=bool)
+            for v in values:
+                hit |= column == v
+            return ~hit if op in ("$ne", "$nin") else hit
+
+        column = self._column(key, "num")
+        with np.errstate(invalid="ignore"):
+            if op == "$gt":
+                return column > value
+            if op == "$gte":
+                return column >= value
+            if op == "$lt":
+                return column < value
+            if op == "$lte":
+                return column <= value
+        raise ValueError(f"Unsupported where operator: {op}")
+
+
+class EmbeddedVectorStore:
+    """
+    In-process vector store with the Chroma client API used by this project
+
+    Usage:
+        store = EmbeddedVectorStore("data/vectors")
+        chunks = store.get_or_create_collection("chunks")
+        chunks.upsert(ids=[...], embeddings=vectors, documents=[...], metadatas=[...])
+        chunks.query(query_embeddings=embedder.embed_queries([q]), n_results=5)
+    """
+
+    def __init__(self, root: str = "data/vectors", index: str = "exact", quantization: str = "none"):
+        """
+        Args:
+            root: Store directory (one subdirectory per collection)
+            index: "exact" (NumPy scan) or "hnsw" (chroma-hnswlib graph)
+            quantization: "none" or "sq8" (int8 codes scanned, float32
+                rescoring) for new collections
+        """
+        self.root = Path(root)
+        self.index = index
+        self.quantization = quantization
+        self._collections: Dict[str, EmbeddedCollection] = {}
+        self._lock = threading.Lock()
+
+    def get_collection(self, name: str) -> EmbeddedCollection:
+        with self._lock:
+            if name not in self._collections:
+                if not (self.root / name / "collection.json").exists():
+                    raise ValueError(f"Collection {name} does not exist.")
+                self._collections[name] = EmbeddedCollection(
+                    self.root / name, name, index=self.index, quantization=self.quantization
+                )
+            return self._collections[name]
+
+    def get_or_create_collection(self, name: str, metadata: Optional[Dict] = None) -> EmbeddedCollection:
+        with self._lock:
+            if name not in self._collections:
+                self._collections[name] = EmbeddedCollection(
+                    self.root / name, name, metadata, index=self.index, quantization=self.quantization
+                )
+            return self._collections[name]
+
+    def create_collection(self, name: str, metadata: Optional[Dict] = None) -> EmbeddedCollection:
+        if (self.root / name / "collection.json").exists():
+            raise ValueError(f"Collection {name} already exists.")
+        return self.get_or_create_collection(name, metadata)
+
+    def delete_collection(self, name: str):
+        with self._lock:
+            self._collections.pop(name, None)
+            shutil.rmtree(self.root / name, ignore_errors=True)
+
+    def list_collections(self) -> List[EmbeddedCollection]:
+        if not self.root.exists():
+            return []
+        return [self.get_collection(p.name) for p in sorted(self.root.iterdir())
+                if (p / "collection.json").exists()]
+
+    def heartbeat(self) -> int:
+        return 0
+
+    def persist(self):
+        """Flush every open collection (HNSW graphs are otherwise rebuilt on open)"""
+        for collection in list(self._collections.values()):
+            collection.persist()
+
+
+# Test
+if __name__ == "__main__":
+    import tempfile
+    import time
+
+    rng = np.random.default_rng(0)
+    corpus = rng.normal(size=(100_000, 384)).astype(np.float32)
+    corpus /= np.linalg.norm(corpus, axis=1, keepdims=True)
+
+    with tempfile.TemporaryDirectory() as root:
+        store = EmbeddedVectorStore(root)
+        chunks = store.get_or_create_collection("chunks")
+        for start in range(0, len(corpus), 10_000):
+            end = start + 10_000
+            chunks.upsert(
+                ids=[f"c{i}" for i in range(start, end)],
+                embeddings=corpus[start:end],
+                documents=[f"chunk {i}" for i in range(start, end)],
+                metadatas=[{"paper_id": f"p{i // 100}", "section_type": ["methods", "results"][i % 2]}
+                           for i in range(start, end)]
+            )
+
+        queries = corpus[:100] + 0.05 * rng.normal(size=(100, 384)).astype(np.float32)
+        start = time.perf_counter()
+        results = chunks.query(query_embeddings=queries, n_results=10)
+        elapsed = time.perf_counter() - start
+        hits = sum(r[0] == f"c{i}" for i, r in enumerate(results["ids"]))
+        print(f"✅ 100 queries over 100k vectors: {1000 * elapsed / 100:.2f} ms/query, top-1 {hits}/100")
+
+        start = time.perf_counter()
+        results = chunks.query(query_embeddings=queries[:1], n_results=5, where={"paper_id": "p0"})
+        print(f"✅ Filtered query: {1000 * (time.perf_counter() - start):.2f} ms → {results['ids'][0]}")
+
+        chunks.delete(where={"paper_id": "p0"})
+        reopened = EmbeddedVectorStore(root).get_collection("chunks")
+        print(f"✅ Reopened: {reopened.count()} records, c0 present: {bool(reopened.get(ids=['c0'])['ids'])}")
@@ -0,0 +1,32 @@
+"""
+PostgreSQL connection: engine + session factory
+"""
+from contextlib import contextmanager
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from ..config.settings import settings
+
+
+engine = create_engine(settings.DATABASE_URL, pool_pre_ping=True)
+SessionLocal = sessionmaker(bind=engine, expire_on_commit=False)
+
+
+@contextmanager
+def get_session():
+    """
+    Transactional session scope
+
+    Usage:
+        with get_session() as session:
+            session.add(paper)
+    """
+    session = SessionLocal()
+    try:
+        yield session
+        session.commit()
+    except Exception:
+        session.rollback()
+        raise
+    finally:
+        session.close()
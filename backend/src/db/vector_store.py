@@ -0,0 +1,71 @@
+"""
+Vector Store: Interface shared by the Chroma HTTP client and the embedded store
+Retrieval and indexing code only uses this subset of the Chroma API, so a
+``chromadb.HttpClient`` and an ``EmbeddedVectorStore`` are interchangeable.
+"""
+from typing import Dict, List, Optional, Protocol, Sequence
+
+from ..config.settings import settings
+
+
+class VectorCollection(Protocol):
+    """Subset of chromadb.Collection used by this project"""
+
+    def upsert(self, ids: List[str], embeddings=None, metadatas: Optional[List[Dict]] = None,
+               documents: Optional[List[str]] = None) -> None: ...
+
+    def query(self, query_embeddings=None, n_results: int = 10, where: Optional[Dict] = None,
+              include: Sequence[str] = ("metadatas", "documents", "distances"), **kwargs) -> Dict: ...
+
+    def get(self, ids: Optional[List[str]] = None, where: Optional[Dict] = None,
+            limit: Optional[int] = None, include: Sequence[str] = ("metadatas", "documents"),
+            **kwargs) -> Dict: ...
+
+    def delete(self, ids: Optional[List[str]] = None, where: Optional[Dict] = None) -> None: ...
+
+    def count(self) -> int: ...
+
+
+class VectorStore(Protocol):
+    """Subset of chromadb.HttpClient used by this project"""
+
+    def get_collection(self, name: str) -> VectorCollection: ...
+
+    def get_or_create_collection(self, name: str, metadata: Optional[Dict] = None) -> VectorCollection: ...
+
+
+_embedded: Dict[str, "VectorStore"] = {}
+
+
+def get_vector_store(
+    backend: Optional[str] = None,
+    host: Optional[str] = None,
+    port: Optional[int] = None
+) -> VectorStore:
+    """
+    Vector store for the configured backend
+
+    Args:
+        backend: "chroma" (HTTP server) or "embedded" (in-process, no server);
+            default: settings.VECTOR_BACKEND
+        host, port: Chroma server (default: settings.CHROMA_HOST / CHROMA_PORT)
+
+    Returns:
+        chromadb.HttpClient or EmbeddedVectorStore (one per process and directory)
+    """
+    backend = backend or settings.VECTOR_BACKEND
+
+    if backend == "chroma":
+        import chromadb
+        return chromadb.HttpClient(host=host or settings.CHROMA_HOST, port=port or settings.CHROMA_PORT)
+
+    if backend == "embedded":
+        from .embedded_store import EmbeddedVectorStore
+        root = settings.VECTOR_STORE_DIR
+        if root not in _embedded:
+            _embedded[root] = EmbeddedVectorStore(
+                root, index=settings.VECTOR_INDEX, quantization=settings.VECTOR_QUANTIZATION
+            )
+        return _embedded[root]
+
+    raise ValueError(f"Unknown vector backend: {backend}")
@@ -15,4 +15,6 @@ class Paper(Base):
     file_path = Column(String(500), nullable=False)
     uploaded_at = Column(DateTime, default=func.now())
     indexed = Column(Boolean, default=False)
-    indexed_at = Column(DateTime)
\ No newline at end of file
+    indexed_at = Column(DateTime)
+    content_hash = Column(String(64), index=True)  # SHA-256 of the PDF bytes
+    pipeline_version = Column(String(64))  # Index config the paper was built with
\ No newline at end of file
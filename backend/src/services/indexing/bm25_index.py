@@ -0,0 +1,455 @@
+"""
+BM25 Index: Persistent corpus-wide keyword index over every chunk
+Immutable segments (one per indexed paper; add_paper merges the smallest
+ones synchronously once there are more than max_segments) with
+memory-mapped postings, tombstones for deleted papers, and MaxScore top-k
+evaluation so common terms only touch candidate documents.
+"""
+import json
+import math
+import os
+import re
+import shutil
+import time
+from collections import Counter
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+
+TOKEN = re.compile(r"[a-z0-9]+")
+STOPWORDS = frozenset(
+    "a an and are as at be by for from has in is it its of on or that the this to was were which with".split()
+)
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase alphanumeric terms, minus a few stopwords"""
+    return [t for t in TOKEN.findall(text.lower()) if t not in STOPWORDS]
+
+
+class _Segment:
+    """
+    One immutable segment on disk:
+        vocab.json     sorted terms (term id = position)
+        offsets.npy    postings range of each term, int64 [n_terms + 1]
+        docs.npy       postings doc numbers (ascending per term), int32
+        tfs.npy        term frequencies, uint16
+        max_tf.npy     per-term max tf      } MaxScore upper bounds
+        min_len.npy    per-term min doc len }
+        doc_len.npy    tokens per doc, int32
+        meta.json      {"ids": [...], "sections": [...], "papers": {paper_id: [start, end]}}
+    """
+
+    def __init__(self, path: Path):
+        self.name = path.name
+        self.path = path
+        vocab = json.loads((path / "vocab.json").read_text())
+        self.terms = {term: i for i, term in enumerate(vocab)}
+        self.vocab = vocab
+        self.offsets = np.load(path / "offsets.npy", mmap_mode="r")
+        self.docs = np.load(path / "docs.npy", mmap_mode="r")
+        self.tfs = np.load(path / "tfs.npy", mmap_mode="r")
+        self.max_tf = np.load(path / "max_tf.npy", mmap_mode="r")
+        self.min_len = np.load(path / "min_len.npy", mmap_mode="r")
+        self.doc_len = np.load(path / "doc_len.npy")
+
+        meta = json.loads((path / "meta.json").read_text())
+        self.ids: List[str] = meta["ids"]
+        self.sections: List[str] = meta["sections"]
+        self.papers: Dict[str, List[int]] = meta["papers"]
+        self.live = np.ones(len(self.ids), dtype=bool)
+
+    def postings(self, term: str) -> Optional[Tuple[int, np.ndarray, np.ndarray]]:
+        term_id = self.terms.get(term)
+        if term_id is None:
+            return None
+        start, end = int(self.offsets[term_id]), int(self.offsets[term_id + 1])
+        return term_id, self.docs[start:end], self.tfs[start:end]
+
+    def df(self, term: str) -> int:
+        term_id = self.terms.get(term)
+        if term_id is None:
+            return 0
+        return int(self.offsets[term_id + 1] - self.offsets[term_id])
+
+    @property
+    def live_count(self) -> int:
+        return int(self.live.sum())
+
+    @property
+    def live_length(self) -> int:
+        return int(self.doc_len[self.live].sum())
+
+
+class BM25Index:
+    """
+    Layout:
+        <root>/manifest.json   {"segments": [...], "deleted": {segment: [doc, ...]}, "next": n}
+        <root>/seg_000001/     see _Segment
+
+    Writers (the indexing pipeline) replace manifest.json atomically;
+    readers pick up new segments and tombstones via refresh().
+    """
+
+    def __init__(
+        self,
+        root: str = "data/bm25",
+        k1: float = 1.2,
+        b: float = 0.75,
+        max_segments: int = 12,
+        merge_factor: int = 8
+    ):
+        """
+        Args:
+            root: Index directory (created on first write)
+            k1, b: BM25 parameters
+            max_segments: Merge once there are more segments than this
+            merge_factor: Smallest segments merged together per merge
+        """
+        self.root = Path(root)
+        self.k1 = k1
+        self.b = b
+        self.max_segments = max_segments
+        self.merge_factor = merge_factor
+
+        self.segments: List[_Segment] = []
+        self._next = 1
+        self._manifest_mtime = None
+        self.refresh()
+
+    # ----- reading -----
+
+    def refresh(self):
+        """Reload segments/tombstones if another process changed the manifest"""
+        manifest_path = self.root / "manifest.json"
+        if not manifest_path.exists():
+            return
+        mtime = manifest_path.stat().st_mtime_ns
+        if mtime == self._manifest_mtime:
+            return
+
+        manifest = json.loads(manifest_path.read_text())
+        loaded = {s.name: s for s in self.segments}
+        segments = []
+        for name in manifest["segments"]:
+            segment = loaded.get(name) or _Segment(self.root / name)
+            segment.live[:] = True
+            segment.live[manifest["deleted"].get(name, [])] = False
+            segments.append(segment)
+
+        self.segments = segments
+        self._next = manifest["next"]
+        self._manifest_mtime = mtime
+
+    def __len__(self) -> int:
+        return sum(s.live_count for s in self.segments)
+
+    def search(
+        self,
+        query: str,
+        k: int = 10,
+        section_types: Optional[Sequence[str]] = None
+    ) -> List[Tuple[str, float]]:
+        """
+        Top-k (chunk_id, score) by BM25 over the whole corpus
+
+        Args:
+            query: Free-text query
+            k: Number of results
+            section_types: Only match chunks from these sections
+        """
+        self.refresh()
+        terms = list(dict.fromkeys(tokenize(query)))
+        n_docs = len(self)
+        if not terms or n_docs == 0 or k <= 0:
+            return []
+
+        avgdl = sum(s.live_length for s in self.segments) / n_docs
+        # df includes tombstoned docs, so N must too (as Lucene): with live
+        # docs only, a re-indexed paper pushes df past N and idf below 0
+        n_total = sum(len(s.ids) for s in self.segments)
+        idf = {}
+        for term in terms:
+            df = sum(s.df(term) for s in self.segments)
+            if df:
+                idf[term] = max(0.0, math.log(1 + (n_total - df + 0.5) / (df + 0.5)))
+
+        # Running top-k across segments; its k-th score prunes later segments
+        best: List[Tuple[float, str]] = []
+        theta = 0.0
+        for segment in self.segments:
+            valid = segment.live
+            if section_types:
+                allowed = set(section_types)
+                valid = valid & np.fromiter((s in allowed for s in segment.sections), dtype=bool,
+                                            count=len(segment.sections))
+            for doc, score in self._search_segment(segment, idf, avgdl, valid, k, theta):
+                best.append((score, segment.ids[doc]))
+            best.sort(key=lambda x: -x[0])
+            best = best[:k]
+            if len(best) == k:
+                theta = best[-1][0]
+
+        return [(chunk_id, score) for score, chunk_id in best]
+
+    def _search_segment(
+        self,
+        segment: _Segment,
+        idf: Dict[str, float],
+        avgdl: float,
+        valid: np.ndarray,
+        k: int,
+        theta: float
+    ) -> List[Tuple[int, float]]:
+        """
+        MaxScore (term-at-a-time): terms in decreasing upper-bound order;
+        once the remaining terms' bounds can't lift an unseen doc above the
+        current k-th score, later terms only score existing candidates.
+        """
+        k1, b = self.k1, self.b
+        entries = []
+        for term, term_idf in idf.items():
+            postings = segment.postings(term)
+            if postings is None:
+                continue
+            term_id, docs, tfs = postings
+            max_tf = float(segment.max_tf[term_id])
+            norm = k1 * (1 - b + b * float(segment.min_len[term_id]) / avgdl)
+            entries.append((term_idf * max_tf * (k1 + 1) / (max_tf + norm), term_idf, docs, tfs))
+        if not entries:
+            return []
+
+        entries.sort(key=lambda e: -e[0])
+        remaining = np.cumsum([e[0] for e in entries][::-1])[::-1].tolist() + [0.0]
+        doc_norm = k1 * (1 - b + b * segment.doc_len / avgdl)
+
+        acc = np.zeros(len(segment.ids), dtype=np.float32)
+        candidates = None
+        for j, (_, term_idf, docs, tfs) in enumerate(entries):
+            if candidates is None and remaining[j] > theta:
+                # Essential term: every posting may start a new candidate
+                tfs = tfs.astype(np.float32)
+                acc[docs] += term_idf * tfs * (k1 + 1) / (tfs + doc_norm[docs])
+                touched = np.flatnonzero(acc)
+                touched = touched[valid[touched]]
+                if len(touched) >= k:
+                    theta = max(theta, float(np.partition(acc[touched], -k)[-k]))
+                continue
+
+            if candidates is None:
+                candidates = np.flatnonzero(acc)
+                candidates = candidates[valid[candidates]]
+            candidates = candidates[acc[candidates] + remaining[j] > theta]
+            if len(candidates) == 0:
+                break
+
+            # Non-essential term: probe its postings for the candidates only
+            pos = np.searchsorted(docs, candidates)
+            inside = pos < len(docs)
+            hit = np.zeros(len(candidates), dtype=bool)
+            hit[inside] = docs[pos[inside]] == candidates[inside]
+            hit_docs = candidates[hit]
+            hit_tfs = np.asarray(tfs[pos[hit]], dtype=np.float32)
+            acc[hit_docs] += term_idf * hit_tfs * (k1 + 1) / (hit_tfs + doc_norm[hit_docs])
+
+        if candidates is None:
+            candidates = np.flatnonzero(acc)
+            candidates = candidates[valid[candidates]]
+        scores = acc[candidates]
+        if len(candidates) > k:
+            top = np.argpartition(-scores, k - 1)[:k]
+            candidates, scores = candidates[top], scores[top]
+        return [(int(d), float(s)) for d, s in zip(candidates, scores)]
+
+    # ----- writing -----
+
+    def add_paper(self, paper_id: str, ids: List[str], texts: List[str], sections: Optional[List[str]] = None):
+        """
+        Index (or re-index) one paper's chunks as a new segment
+
+        Args:
+            paper_id: Paper the chunks belong to (previous version is tombstoned)
+            ids: Chunk IDs (as stored in the chunks collection)
+            texts: Chunk texts
+            sections: section_type of each chunk
+        """
+        self.refresh()
+        deleted = self._tombstones(paper_id)
+
+        # Identical text -> same content ID; keep one
+        seen = set()
+        keep = [i for i, chunk_id in enumerate(ids) if not (chunk_id in seen or seen.add(chunk_id))]
+        ids = [ids[i] for i in keep]
+        texts = [texts[i] for i in keep]
+        sections = [sections[i] for i in keep] if sections else ["other"] * len(ids)
+
+        name = None
+        if ids:
+            postings: Dict[str, List[Tuple[int, int]]] = {}
+            doc_len = []
+            for doc, text in enumerate(texts):
+                counts = Counter(tokenize(text))
+                doc_len.append(sum(counts.values()))
+                for term, tf in counts.items():
+                    postings.setdefault(term, []).append((doc, tf))
+
+            vocab = sorted(postings)
+            term_of = np.repeat(np.arange(len(vocab)), [len(postings[t]) for t in vocab])
+            pairs = np.array([p for t in vocab for p in postings[t]], dtype=np.int64).reshape(-1, 2)
+            name = self._write_segment(
+                vocab, term_of, pairs[:, 0], pairs[:, 1], np.array(doc_len, dtype=np.int32),
+                {"ids": ids, "sections": sections, "papers": {paper_id: [0, len(ids)]}}
+            )
+
+        self._commit(add=[name] if name else [], deleted=deleted)
+        if len(self.segments) > self.max_segments:
+            self.merge()
+
+    def delete_paper(self, paper_id: str):
+        """Tombstone every chunk of a paper"""
+        self.refresh()
+        deleted = self._tombstones(paper_id)
+        if deleted:
+            self._commit(add=[], deleted=deleted)
+
+    def _tombstones(self, paper_id: str) -> Dict[str, List[int]]:
+        """Docs of paper_id per segment (live ones only)"""
+        deleted = {}
+        for segment in self.segments:
+            span = segment.papers.get(paper_id)
+            if span and segment.live[span[0]:span[1]].any():
+                deleted[segment.name] = list(range(span[0], span[1]))
+        return deleted
+
+    def merge(self):
+        """Merge the smallest segments into one, dropping tombstoned docs"""
+        self.refresh()
+        if len(self.segments) < 2:
+            return
+        victims = sorted(self.segments, key=lambda s: s.live_count)[:self.merge_factor]
+
+        vocab = sorted(set().union(*(s.vocab for s in victims)))
+        term_index = {term: i for i, term in enumerate(vocab)}
+        all_terms, all_docs, all_tfs, doc_len = [], [], [], []
+        meta = {"ids": [], "sections": [], "papers": {}}
+        base = 0
+        for segment in victims:
+            # Old doc number -> new doc number (-1 = tombstoned)
+            new_doc = np.full(len(segment.ids), -1, dtype=np.int64)
+            new_doc[segment.live] = base + np.arange(segment.live_count)
+            for paper_id, (start, end) in segment.papers.items():
+                live = new_doc[start:end][new_doc[start:end] >= 0]
+                if len(live):
+                    meta["papers"][paper_id] = [int(live[0]), int(live[-1]) + 1]
+            meta["ids"].extend(i for i, alive in zip(segment.ids, segment.live) if alive)
+            meta["sections"].extend(s for s, alive in zip(segment.sections, segment.live) if alive)
+            doc_len.append(segment.doc_len[segment.live])
+
+            term_map = np.array([term_index[t] for t in segment.vocab], dtype=np.int64)
+            counts = np.diff(np.asarray(segment.offsets))
+            terms = np.repeat(term_map, counts)
+            docs = new_doc[np.asarray(segment.docs)]
+            alive = docs >= 0
+            all_terms.append(terms[alive])
+            all_docs.append(docs[alive])
+            all_tfs.append(np.asarray(segment.tfs)[alive])
+            base += segment.live_count
+
+        terms = np.concatenate(all_terms)
+        docs = np.concatenate(all_docs)
+        tfs = np.concatenate(all_tfs)
+        order = np.lexsort((docs, terms))
+        terms, docs, tfs = terms[order], docs[order], tfs[order]
+
+        # Terms only found in tombstoned docs disappear
+        used = np.unique(terms)
+        remap = np.full(len(vocab), -1, dtype=np.int64)
+        remap[used] = np.arange(len(used))
+        vocab = [vocab[i] for i in used]
+
+        name = None
+        if base:
+            name = self._write_segment(vocab, remap[terms], docs, tfs, np.concatenate(doc_len), meta)
+        self._commit(add=[name] if name else [], deleted={}, remove=[s.name for s in victims])
+        print(f"🔧 BM25: merged {len(victims)} segments ({base} docs)")
+
+    def _write_segment(self, vocab, term_of, docs, tfs, doc_len, meta) -> str:
+        """Write arrays of (term id, doc, tf) postings sorted by term, doc"""
+        name = f"seg_{self._next:06d}"
+        self._next += 1
+        tmp = self.root / f"{name}.tmp"
+        shutil.rmtree(tmp, ignore_errors=True)
+        tmp.mkdir(parents=True)
+
+        tfs = np.minimum(tfs, np.iinfo(np.uint16).max).astype(np.uint16)
+        offsets = np.zeros(len(vocab) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(term_of, minlength=len(vocab)), out=offsets[1:])
+        max_tf = np.zeros(len(vocab), dtype=np.uint16)
+        np.maximum.at(max_tf, term_of, tfs)
+        min_len = np.full(len(vocab), np.iinfo(np.int32).max, dtype=np.int32)
+        np.minimum.at(min_len, term_of, doc_len[docs])
+
+        (tmp / "vocab.json").write_text(json.dumps(vocab))
+        np.save(tmp / "offsets.npy", offsets)
+        np.save(tmp / "docs.npy", docs.astype(np.int32))
+        np.save(tmp / "tfs.npy", tfs)
+        np.save(tmp / "max_tf.npy", max_tf)
+        np.save(tmp / "min_len.npy", min_len)
+        np.save(tmp / "doc_len.npy", doc_len.astype(np.int32))
+        (tmp / "meta.json").write_text(json.dumps(meta))
+        os.replace(tmp, self.root / name)
+        return name
+
+    def _commit(self, add: List[str], deleted: Dict[str, List[int]], remove: Sequence[str] = ()):
+        """Publish a new manifest (atomic rename), then drop removed segments"""
+        manifest_path = self.root / "manifest.json"
+        manifest = {"segments": [], "deleted": {}, "next": self._next}
+        if manifest_path.exists():
+            manifest = json.loads(manifest_path.read_text())
+
+        for name, docs in deleted.items():
+            manifest["deleted"][name] = sorted(set(manifest["deleted"].get(name, [])) | set(docs))
+        manifest["segments"] = [s for s in manifest["segments"] if s not in remove] + add
+        manifest["deleted"] = {k: v for k, v in manifest["deleted"].items() if k not in remove}
+        manifest["next"] = self._next
+
+        self.root.mkdir(parents=True, exist_ok=True)
+        tmp = manifest_path.with_suffix(f".{os.getpid()}.tmp")
+        tmp.write_text(json.dumps(manifest))
+        os.replace(tmp, manifest_path)
+        self.refresh()
+
+        for name in remove:
+            shutil.rmtree(self.root / name, ignore_errors=True)
+
+
+# Test
+if __name__ == "__main__":
+    import tempfile
+
+    rng = np.random.default_rng(0)
+    words = [f"w{i}" for i in range(20000)]
+    zipf = 1 / np.arange(1, len(words) + 1)
+    zipf /= zipf.sum()
+
+    with tempfile.TemporaryDirectory() as root:
+        index = BM25Index(root)
+        sample = rng.choice(len(words), (100, 1000, 80), p=zipf)
+        start = time.perf_counter()
+        for p in range(100):
+            texts = [" ".join(words[w] for w in doc) for doc in sample[p]]
+            index.add_paper(f"paper{p}", [f"paper{p}_{i}" for i in range(1000)], texts)
+        print(f"✅ Indexed 100k chunks in {time.perf_counter() - start:.1f}s "
+              f"({len(index.segments)} segments)")
+
+        queries = [" ".join(rng.choice(words[:2000], 4)) for _ in range(200)]
+        start = time.perf_counter()
+        for q in queries:
+            index.search(q, k=10)
+        print(f"✅ {1000 * (time.perf_counter() - start) / len(queries):.2f} ms/query")
+
+        index.delete_paper("paper0")
+        assert not any(i.startswith("paper0_") for i, _ in index.search(queries[0], k=50))
+        print(f"✅ Tombstones respected ({len(index)} live chunks)")
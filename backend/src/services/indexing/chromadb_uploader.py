@@ -1,57 +1,262 @@
 """
 ChromaDB Uploader: Batch upload documents to ChromaDB
+Idempotent (content-derived IDs + upsert) and pipelined: batches upload on
+a background thread while the caller embeds the next one.
 """
-from typing import List, Dict
-import chromadb
+from typing import Callable, List, Dict, Sequence, Union
+from concurrent.futures import ThreadPoolExecutor
+from collections import deque
+import hashlib
+import random
+import time
+from chromadb.errors import ChromaError
 from langchain.schema import Document
-import uuid
+import numpy as np
+
+from ...db.vector_store import VectorStore
+
+
+Embeddings = Union[np.ndarray, Sequence[Sequence[float]]]
+
+MIN_BATCH = 16
+MAX_BATCH = 2048
+
+
+def content_id(paper_id: str, kind: str, *parts: str) -> str:
+    """
+    Deterministic record ID, e.g. "attention_chunk_3f9a6c2d7b41e0aa"
+
+    Same paper + kind + content -> same ID, so re-runs overwrite
+    instead of duplicating.
+    """
+    digest = hashlib.sha256("\0".join(parts).encode()).hexdigest()[:16]
+    return f"{paper_id}_{kind}_{digest}"
 
 
 class ChromaUploader:
     """Batch upload documents to ChromaDB collections"""
-    
-    def __init__(self, client: chromadb.HttpClient):
+
+    def __init__(
+        self,
+        client: VectorStore,
+        batch_size: int = 256,
+        target_seconds: float = 1.0,
+        max_pending: int = 4,
+        retries: int = 4
+    ):
+        """
+        Args:
+            client: Vector store (Chroma client or embedded)
+            batch_size: Initial records per request (adapted to target_seconds)
+            target_seconds: Desired duration of one upsert request
+            max_pending: Batches queued for upload before the caller waits
+            retries: Attempts per batch on transient errors (exponential backoff)
+        """
         self.client = client
-    
+        self.batch_size = batch_size
+        self.target_seconds = target_seconds
+        self.max_pending = max_pending
+        self.retries = retries
+
+        # One thread keeps request order and bounds load on the server
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="chroma-upload")
+        self._pending: deque = deque()
+
     def upload_chunks(
         self,
         collection_name: str,
         documents: List[Document],
-        embeddings: List[List[float]],
+        embeddings: Embeddings,
         batch_size: int = 100
     ) -> int:
         """
         Batch upload documents to ChromaDB
-        
+
         Args:
             collection_name: Target collection
             documents: List of Document objects
             embeddings: Corresponding embeddings
-            batch_size: Upload batch size
-            
+            batch_size: Initial upload batch size
+
         Returns:
             Number of documents uploaded
         """
         if not documents:
             return 0
-        
+
         # Get or create collection
         collection = self.client.get_or_create_collection(collection_name)
-        
-        # Batch upload
-        for i in range(0, len(documents), batch_size):
-            batch_docs = documents[i:i+batch_size]
-            batch_embs = embeddings[i:i+batch_size]
-            
-            collection.add(
-                documents=[d.page_content for d in batch_docs],
-                embeddings=batch_embs,
-                metadatas=[d.metadata for d in batch_docs],
-                ids=[str(uuid.uuid4()) for _ in batch_docs]
-            )
-        
+
+        self.batch_size = batch_size
+        self.upsert(
+            collection,
+            ids=[
+                content_id(str(d.metadata.get("paper_id", collection_name)), "doc", d.page_content)
+                for d in documents
+            ],
+            documents=[d.page_content for d in documents],
+            embeddings=embeddings,
+            metadatas=[d.metadata for d in documents]
+        )
+        self.flush()
+
         return len(documents)
 
+    def upsert(
+        self,
+        collection,
+        ids: List[str],
+        documents: List[str],
+        embeddings: Embeddings,
+        metadatas: List[Dict],
+        store_documents: bool = True
+    ) -> int:
+        """
+        Queue precomputed records for upload (returns before they are sent)
+
+        Call flush() to wait for the server to acknowledge them.
+
+        Args:
+            store_documents: False to upload vectors + metadata only (text
+                kept elsewhere, e.g. PaperTextStore spans)
+
+        Returns:
+            Number of records queued
+        """
+        start = 0
+        while start < len(ids):
+            end = start + self.batch_size
+            self._submit(collection, ids[start:end],
+                         documents[start:end] if store_documents else None,
+                         embeddings[start:end], metadatas[start:end])
+            start = end
+
+        return len(ids)
+
+    def embed_and_upsert(
+        self,
+        collection,
+        ids: List[str],
+        documents: List[str],
+        metadatas: List[Dict],
+        embed: Callable[[List[str]], np.ndarray],
+        store_documents: bool = True
+    ) -> np.ndarray:
+        """
+        Embed and upload in batches, embedding batch N+1 while batch N uploads
+
+        Args:
+            collection: Target collection
+            ids, documents, metadatas: Records (embeddings are computed here)
+            embed: Function texts -> (n, dim) float32 array (Embedder.embed)
+            store_documents: False to embed the documents but not upload them
+
+        Returns:
+            All computed embeddings, in input order (for reuse by the caller)
+        """
+        vectors = []
+        start = 0
+        while start < len(ids):
+            end = start + self.batch_size
+            batch_vectors = embed(documents[start:end])
+            vectors.append(batch_vectors)
+            self._submit(collection, ids[start:end],
+                         documents[start:end] if store_documents else None,
+                         batch_vectors, metadatas[start:end])
+            start = end
+
+        if not vectors:
+            return np.zeros((0, 0), dtype=np.float32)
+        return np.concatenate(vectors)
+
+    def flush(self):
+        """Wait for every queued batch; raises the first upload error"""
+        error = None
+        while self._pending:
+            try:
+                self._pending.popleft().result()
+            except Exception as e:
+                error = error or e
+        if error:
+            raise error
+
+    def discard(self):
+        """Wait for queued batches but drop their errors (after a failed paper)"""
+        try:
+            self.flush()
+        except Exception:
+            pass
+
+    def _submit(self, collection, ids, documents, embeddings, metadatas):
+        """Queue one batch; blocks while max_pending batches are in flight"""
+        while len(self._pending) >= self.max_pending:
+            future = self._pending.popleft()
+            future.result()  # Surface errors early instead of queueing more work
+
+        ids, documents, embeddings, metadatas = _unique(ids, documents, embeddings, metadatas)
+        self._pending.append(self._executor.submit(
+            self._upsert_batch, collection, ids, documents, embeddings, metadatas
+        ))
+
+    def _upsert_batch(self, collection, ids, documents, embeddings, metadatas):
+        """Upload thread: one upsert with retries, then adapt the batch size"""
+        for attempt in range(self.retries):
+            try:
+                start = time.perf_counter()
+                collection.upsert(
+                    ids=ids,
+                    documents=documents,
+                    embeddings=_as_lists(embeddings),
+                    metadatas=metadatas
+                )
+                self._adapt(len(ids), time.perf_counter() - start)
+                return
+            except (ValueError, TypeError, ChromaError):
+                raise  # Bad input: retrying won't help
+            except Exception as e:
+                if attempt == self.retries - 1:
+                    raise
+                delay = 0.5 * 2 ** attempt + random.uniform(0, 0.25)
+                print(f"⚠️ Upsert of {len(ids)} records failed ({e}), retrying in {delay:.1f}s")
+                time.sleep(delay)
+                self.batch_size = max(MIN_BATCH, self.batch_size // 2)
+
+    def _adapt(self, size: int, seconds: float):
+        """Grow batches while requests are fast, shrink them when slow"""
+        if size < self.batch_size:
+            return  # Tail batch, says little about throughput
+        if seconds < self.target_seconds / 2:
+            self.batch_size = min(MAX_BATCH, self.batch_size * 2)
+        elif seconds > self.target_seconds * 2:
+            self.batch_size = max(MIN_BATCH, self.batch_size // 2)
+
+
+def _unique(ids, documents, embeddings, metadatas):
+    """Drop repeated IDs within a batch (identical content; Chroma rejects duplicates)"""
+    if len(set(ids)) == len(ids):
+        return ids, documents, embeddings, metadatas
+
+    keep, seen = [], set()
+    for i, record_id in enumerate(ids):
+        if record_id not in seen:
+            seen.add(record_id)
+            keep.append(i)
+
+    if isinstance(embeddings, np.ndarray):
+        kept_embeddings = embeddings[keep]
+    else:
+        kept_embeddings = [embeddings[i] for i in keep]
+    kept_documents = [documents[i] for i in keep] if documents is not None else None
+    return ([ids[i] for i in keep], kept_documents,
+            kept_embeddings, [metadatas[i] for i in keep])
+
+
+def _as_lists(embeddings: Embeddings) -> List[List[float]]:
+    """Client boundary: chromadb 0.4 validates embeddings as lists"""
+    if isinstance(embeddings, np.ndarray):
+        return embeddings.tolist()
+    return [list(e) for e in embeddings]
+
 
 # Test
 if __name__ == "__main__":
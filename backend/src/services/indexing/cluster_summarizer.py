@@ -0,0 +1,216 @@
+"""
+Cluster Summarizer: Concurrent, cached LLM summaries for RAPTOR clusters
+All clusters of a level are summarized at once under a semaphore; results
+are cached by a hash of the member texts, and clusters that miss the
+deadline or call budget fall back to truncation (summarize_cluster).
+Each request carries the remaining deadline as its own timeout.
+"""
+import asyncio
+import hashlib
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+from ..llm.client import chat
+from .raptor import summarize_cluster
+
+
+PROMPT_VERSION = "1"  # Bump when the prompt changes: invalidates cached summaries
+
+PROMPT = """Summarize the following excerpts from research papers in 3-5 sentences.
+Keep the key methods, results and terminology; do not add information.
+
+{text}
+
+Summary:"""
+
+MAX_INPUT_CHARS = 6000  # Per cluster prompt (~1.5k tokens)
+
+
+def summary_key(texts: List[str], level: int) -> str:
+    """Cache key: member texts (order-insensitive) + level + prompt version"""
+    digest = hashlib.sha256()
+    digest.update(f"{PROMPT_VERSION}\0{level}".encode())
+    for text in sorted(texts):
+        digest.update(b"\0" + text.encode("utf-8"))
+    return digest.hexdigest()
+
+
+class ClusterSummarizer:
+    """
+    Usage:
+        summarizer = ClusterSummarizer()
+        summaries = summarizer.summarize_many([[chunk, chunk], [chunk]], level=0)
+    """
+
+    def __init__(
+        self,
+        cache_path: str = "data/summaries.sqlite3",
+        concurrency: int = 8,
+        deadline_s: float = 120.0,
+        max_calls: int = 0,
+        llm: Callable[..., str] = chat,
+        max_tokens: int = 200
+    ):
+        """
+        Args:
+            cache_path: SQLite summary cache ("" = in-memory only)
+            concurrency: LLM requests in flight at once
+            deadline_s: Wall-clock budget of one summarize_many call
+            max_calls: LLM requests allowed per summarize_many call (0 = unlimited)
+            llm: Chat function (messages, temperature, max_tokens, timeout) -> str
+            max_tokens: Summary length limit
+        """
+        self.concurrency = concurrency
+        self.deadline_s = deadline_s
+        self.max_calls = max_calls
+        self.llm = llm
+        self.max_tokens = max_tokens
+
+        # Blocking provider SDKs run here; the event loop only schedules them
+        self._executor = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="summarize")
+        self._lock = threading.Lock()
+        self._stuck = 0  # Timed-out calls still holding an executor thread
+        if cache_path:
+            Path(cache_path).parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(cache_path or ":memory:", check_same_thread=False)
+        self._conn.execute("CREATE TABLE IF NOT EXISTS summaries (key TEXT PRIMARY KEY, summary TEXT NOT NULL)")
+
+        self.stats = {"cached": 0, "llm": 0, "fallback": 0}
+
+    def summarize_many(self, clusters: List[List[str]], level: int) -> List[str]:
+        """
+        One summary per cluster (member texts in), in input order
+
+        Blocking wrapper around summarize_many_async for the indexing
+        pipeline; runs its own event loop (on a helper thread if the
+        caller already has one running).
+        """
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return asyncio.run(self.summarize_many_async(clusters, level))
+
+        with ThreadPoolExecutor(max_workers=1) as runner:
+            return runner.submit(asyncio.run, self.summarize_many_async(clusters, level)).result()
+
+    async def summarize_many_async(self, clusters: List[List[str]], level: int) -> List[str]:
+        """Async summarize_many (usable from a running event loop)"""
+        keys = [summary_key(texts, level) for texts in clusters]
+        summaries: List[Optional[str]] = [None] * len(clusters)
+
+        cached = self._cached(keys)
+        todo = []
+        for i, key in enumerate(keys):
+            if key in cached:
+                summaries[i] = cached[key]
+                self.stats["cached"] += 1
+            else:
+                todo.append(i)
+
+        # Budget: the first max_calls misses go to the LLM, the rest truncate
+        budget = len(todo) if self.max_calls <= 0 else min(len(todo), self.max_calls)
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.deadline_s
+        # Threads still busy with calls abandoned by earlier runs aren't free
+        free = self.concurrency - self._stuck
+        if free <= 0:
+            budget = 0  # Every thread is stuck: truncate this run
+        semaphore = asyncio.Semaphore(max(free, 1))
+
+        async def summarize(i: int) -> Optional[str]:
+            async with semaphore:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    return None
+                text = "\n\n".join(clusters[i])[:MAX_INPUT_CHARS]
+                call = self._executor.submit(
+                    self.llm,
+                    [{"role": "user", "content": PROMPT.format(text=text)}],
+                    temperature=0.0,
+                    max_tokens=self.max_tokens,
+                    timeout=remaining  # Ends the request itself, not just our wait
+                )
+                try:
+                    summary = await asyncio.wait_for(asyncio.shield(asyncio.wrap_future(call)), remaining)
+                except asyncio.TimeoutError:
+                    # A call that never started is dropped; a running one can't be
+                    # interrupted and keeps its thread until the request times out
+                    if not call.cancel():
+                        self._track_stuck(call)
+                    return None
+                except Exception as e:
+                    print(f"⚠️ Cluster summary failed ({str(e)[:80]}), truncating")
+                    return None
+                return summary.strip() or None
+
+        results = await asyncio.gather(*(summarize(i) for i in todo[:budget]))
+
+        fresh = {}
+        for i, summary in zip(todo[:budget], results):
+            if summary:
+                summaries[i] = summary
+                fresh[keys[i]] = summary
+                self.stats["llm"] += 1
+        self._store(fresh)
+
+        # Deadline, budget or provider errors: truncation (not cached, retried next run)
+        for i in todo:
+            if summaries[i] is None:
+                summaries[i] = summarize_cluster("\n\n".join(clusters[i]), level)
+                self.stats["fallback"] += 1
+
+        return summaries
+
+    def _track_stuck(self, call):
+        with self._lock:
+            self._stuck += 1
+
+        def release(_):
+            with self._lock:
+                self._stuck -= 1
+
+        call.add_done_callback(release)
+
+    def _cached(self, keys: List[str]) -> Dict[str, str]:
+        if not keys:
+            return {}
+        with self._lock:
+            placeholders = ",".join("?" * len(keys))
+            return dict(self._conn.execute(
+                f"SELECT key, summary FROM summaries WHERE key IN ({placeholders})", keys
+            ).fetchall())
+
+    def _store(self, summaries: Dict[str, str]):
+        if not summaries:
+            return
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO summaries VALUES (?, ?)", list(summaries.items())
+            )
+
+    def close(self):
+        self._executor.shutdown(wait=False)
+        self._conn.close()
+
+
+# Test
+if __name__ == "__main__":
+    def slow_llm(messages, temperature=0.0, max_tokens=200, timeout=None):
+        time.sleep(0.5)
+        return "Summary of: " + messages[0]["content"][120:160]
+
+    summarizer = ClusterSummarizer(cache_path="", concurrency=8, llm=slow_llm)
+    clusters = [[f"Chunk {i}.{j} about attention heads and positional encodings." for j in range(3)]
+                for i in range(16)]
+
+    start = time.perf_counter()
+    summarizer.summarize_many(clusters, level=0)
+    print(f"✅ 16 clusters in {time.perf_counter() - start:.2f}s (sequential: ~8s)")
+
+    start = time.perf_counter()
+    summarizer.summarize_many(clusters, level=0)
+    print(f"✅ Cached rerun in {time.perf_counter() - start:.3f}s — {summarizer.stats}")
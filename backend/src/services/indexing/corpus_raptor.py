@@ -0,0 +1,388 @@
+"""
+Corpus RAPTOR: One incremental summary tree over every indexed paper
+New chunks join the nearest existing cluster (online mean update) or open
+a new one; only clusters whose membership changed are re-summarized and
+re-embedded, level by level. Nodes and parent/child links live in SQLite.
+Cost of adding a paper: the SQLite writes and re-summaries are O(paper),
+but each new vector is compared with every centroid of its level (exact
+scan), so assignment is O(paper x clusters) and clusters grow with the
+corpus (~corpus / cluster size at level 1). A paper's chunks are scored
+against all centroids in one matrix product, so the centroid matrix is
+read once per paper rather than once per chunk.
+"""
+import sqlite3
+import uuid
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Sequence, Set, Tuple
+
+import numpy as np
+
+from ..ingestion.paper_text_store import PaperTextStore
+from .raptor import summarize_cluster
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS raptor_nodes (
+    node_id    TEXT PRIMARY KEY,
+    level      INTEGER NOT NULL,           -- 0 = chunk (leaf)
+    parent_id  TEXT,
+    paper_id   TEXT,                       -- leaves only
+    char_start INTEGER,
+    char_end   INTEGER,
+    summary    TEXT,                       -- inner nodes only
+    n_members  INTEGER NOT NULL DEFAULT 0,
+    vector_sum BLOB,                       -- sum of member vectors (inner nodes)
+    embedding  BLOB NOT NULL
+);
+CREATE INDEX IF NOT EXISTS raptor_parent ON raptor_nodes (parent_id);
+CREATE INDEX IF NOT EXISTS raptor_paper ON raptor_nodes (paper_id);
+CREATE INDEX IF NOT EXISTS raptor_level ON raptor_nodes (level);
+"""
+
+
+class _Level:
+    """In-memory centroids of one tree level (rows of removed nodes stay, masked)"""
+
+    def __init__(self, dim: int):
+        self.ids: List[str] = []
+        self.row: Dict[str, int] = {}
+        self.sums = np.zeros((0, dim), dtype=np.float32)
+        self.counts = np.zeros(0, dtype=np.int64)
+        self.norms = np.zeros(0, dtype=np.float32)  # |sums| per row, kept in step
+        self._batch_dots: Optional[np.ndarray] = None  # (batch, rows) from begin_batch
+        self._batch_rows = 0
+        self._stale: Set[int] = set()  # Rows shifted since begin_batch
+
+    def add(self, node_id: str, vector_sum: np.ndarray, count: int):
+        if len(self.ids) == len(self.sums):  # Grow by doubling
+            grow = max(16, len(self.sums))
+            self.sums = np.vstack([self.sums, np.zeros((grow, self.sums.shape[1]), dtype=np.float32)])
+            self.counts = np.concatenate([self.counts, np.zeros(grow, dtype=np.int64)])
+            self.norms = np.concatenate([self.norms, np.zeros(grow, dtype=np.float32)])
+        self.row[node_id] = len(self.ids)
+        self.sums[len(self.ids)] = vector_sum
+        self.counts[len(self.ids)] = count
+        self.norms[len(self.ids)] = np.linalg.norm(vector_sum)
+        self.ids.append(node_id)
+
+    def shift(self, node_id: str, delta: np.ndarray, count: int):
+        row = self.row[node_id]
+        self.sums[row] += delta
+        self.counts[row] += count
+        self.norms[row] = np.linalg.norm(self.sums[row])
+        if self._batch_dots is not None and row < self._batch_rows:
+            self._stale.add(row)
+
+    def begin_batch(self, vectors: np.ndarray):
+        """Dot products of a batch with every current centroid, for nearest(batch_row=...)"""
+        self._batch_rows = len(self.ids)
+        self._batch_dots = vectors @ self.sums[:self._batch_rows].T
+        self._stale = set()
+
+    def end_batch(self):
+        self._batch_dots = None
+        self._stale = set()
+
+    def nearest(
+        self,
+        vector: np.ndarray,
+        max_members: int,
+        batch_row: Optional[int] = None
+    ) -> Tuple[Optional[str], float]:
+        """
+        Most similar non-full cluster by cosine to its centroid (scans all n)
+
+        With batch_row, dot products come from begin_batch; only centroids
+        shifted or created since then are recomputed.
+        """
+        n = len(self.ids)
+        if n == 0:
+            return None, -1.0
+        if batch_row is None or self._batch_dots is None:
+            dots = self.sums[:n] @ vector
+        else:
+            m = self._batch_rows
+            dots = np.empty(n, dtype=np.float32)
+            dots[:m] = self._batch_dots[batch_row]
+            if self._stale:
+                stale = np.fromiter(self._stale, dtype=np.int64)
+                dots[stale] = self.sums[stale] @ vector
+            dots[m:] = self.sums[m:n] @ vector
+        sims = dots / np.maximum(self.norms[:n], 1e-12)
+        sims[(self.counts[:n] == 0) | (self.counts[:n] >= max_members)] = -np.inf
+        best = int(np.argmax(sims))
+        if not np.isfinite(sims[best]):
+            return None, -1.0
+        return self.ids[best], float(sims[best])
+
+
+class CorpusRaptorIndex:
+    """
+    Incremental corpus-wide RAPTOR tree
+
+    Level 0 are the indexed chunks; level l >= 1 nodes summarize clusters
+    of level l-1 nodes. A vector joins the nearest cluster if its cosine
+    similarity to the centroid is above that level's threshold (DP-means
+    style), otherwise it starts a new cluster.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        text_store: PaperTextStore,
+        levels: int = 3,
+        thresholds: Sequence[float] = (0.7, 0.55, 0.45),
+        max_members: int = 64,
+        summary_members: int = 8,
+        summarizer=None
+    ):
+        """
+        Args:
+            path: SQLite file (created if missing)
+            text_store: Source of leaf (chunk) text for summaries
+            levels: Summary levels above the chunks
+            thresholds: Min cosine similarity to join a cluster, per level
+            max_members: Cluster size cap (full clusters take no new members)
+            summary_members: Members closest to the centroid that feed a summary
+            summarizer: ClusterSummarizer for LLM summaries; None = truncation
+        """
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(path)
+        self.conn.executescript(SCHEMA)
+        self.text_store = text_store
+        self.levels = levels
+        self.thresholds = list(thresholds)
+        self.max_members = max_members
+        self.summary_members = summary_members
+        self.summarizer = summarizer
+        self._levels: Dict[int, _Level] = {}
+        self._load()
+
+    def _load(self):
+        """Centroids of all inner nodes into memory"""
+        rows = self.conn.execute(
+            "SELECT node_id, level, vector_sum, n_members FROM raptor_nodes WHERE level > 0"
+        ).fetchall()
+        for node_id, level, vector_sum, n_members in rows:
+            vector_sum = np.frombuffer(vector_sum, dtype=np.float32)
+            self._level(level, len(vector_sum)).add(node_id, vector_sum, n_members)
+        if rows:
+            print(f"🌳 Corpus RAPTOR: {len(rows)} nodes")
+
+    def _level(self, level: int, dim: int) -> _Level:
+        if level not in self._levels:
+            self._levels[level] = _Level(dim)
+        return self._levels[level]
+
+    def add_paper(
+        self,
+        paper_id: str,
+        chunk_ids: List[str],
+        spans: List[Tuple[int, int]],
+        embeddings: np.ndarray,
+        embed: Callable[[List[str]], np.ndarray]
+    ) -> Dict:
+        """
+        Insert (or replace) a paper's chunks and update the tree
+
+        Args:
+            paper_id: Paper the chunks belong to
+            chunk_ids: Chunk record IDs (leaf node IDs)
+            spans: (char_start, char_end) of each chunk in PaperTextStore
+            embeddings: Chunk vectors
+            embed: Function texts -> vectors, for changed summaries
+
+        Returns:
+            {"upserted": [{"id", "level", "summary", "embedding", "n_members"}],
+             "deleted": [node IDs that no longer exist]}
+        """
+        dirty: Dict[int, Set[str]] = {level: set() for level in range(1, self.levels + 2)}
+        self._remove_leaves(paper_id, dirty)
+
+        vectors = _normalize(np.asarray(embeddings, dtype=np.float32))
+        seen = set()
+        leaves = []
+        level = self._level(1, vectors.shape[1])
+        level.begin_batch(vectors)
+        try:
+            for i, (chunk_id, (start, end), vector) in enumerate(zip(chunk_ids, spans, vectors)):
+                if chunk_id in seen:  # Identical text within the paper
+                    continue
+                seen.add(chunk_id)
+                parent_id = self._assign(1, vector, dirty, batch_row=i)
+                leaves.append((chunk_id, 0, parent_id, paper_id, start, end, None, 0, None, vector.tobytes()))
+        finally:
+            level.end_batch()
+
+        self.conn.executemany(
+            "INSERT OR REPLACE INTO raptor_nodes VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", leaves
+        )
+
+        upserted, deleted = self._refresh(dirty, embed)
+        self.conn.commit()
+        return {"upserted": upserted, "deleted": deleted}
+
+    def remove_paper(self, paper_id: str, embed: Callable[[List[str]], np.ndarray]) -> Dict:
+        """Drop a paper's chunks from the tree (same return shape as add_paper)"""
+        dirty: Dict[int, Set[str]] = {level: set() for level in range(1, self.levels + 2)}
+        self._remove_leaves(paper_id, dirty)
+        upserted, deleted = self._refresh(dirty, embed)
+        self.conn.commit()
+        return {"upserted": upserted, "deleted": deleted}
+
+    def _remove_leaves(self, paper_id: str, dirty: Dict[int, Set[str]]):
+        """Take a paper's leaves out of their clusters' sums"""
+        rows = self.conn.execute(
+            "SELECT parent_id, embedding FROM raptor_nodes WHERE level = 0 AND paper_id = ?",
+            (paper_id,)
+        ).fetchall()
+        for parent_id, embedding in rows:
+            if parent_id:
+                self._shift(1, parent_id, -np.frombuffer(embedding, dtype=np.float32), -1)
+                dirty[1].add(parent_id)
+        self.conn.execute("DELETE FROM raptor_nodes WHERE level = 0 AND paper_id = ?", (paper_id,))
+
+    def _assign(
+        self,
+        level: int,
+        vector: np.ndarray,
+        dirty: Dict[int, Set[str]],
+        batch_row: Optional[int] = None
+    ) -> str:
+        """Online step: nearest cluster above threshold, else a new cluster"""
+        index = self._level(level, len(vector))
+        node_id, similarity = index.nearest(vector, self.max_members, batch_row)
+
+        if node_id is None or similarity < self.thresholds[min(level, len(self.thresholds)) - 1]:
+            node_id = f"raptor_L{level}_{uuid.uuid4().hex[:12]}"
+            index.add(node_id, np.zeros_like(vector), 0)
+            self.conn.execute(
+                "INSERT INTO raptor_nodes (node_id, level, n_members, vector_sum, embedding) "
+                "VALUES (?, ?, 0, ?, ?)",
+                (node_id, level, vector.tobytes(), vector.tobytes())
+            )
+
+        self._shift(level, node_id, vector, +1)
+        dirty[level].add(node_id)
+        return node_id
+
+    def _shift(self, level: int, node_id: str, delta: np.ndarray, count: int):
+        """Running-mean update: add/remove one member vector"""
+        self._levels[level].shift(node_id, delta, count)
+
+    def _refresh(self, dirty: Dict[int, Set[str]], embed) -> Tuple[List[Dict], List[str]]:
+        """Re-summarize dirty clusters bottom-up, propagating vector changes"""
+        upserted, deleted = [], []
+
+        for level in range(1, self.levels + 1):
+            node_ids = sorted(dirty[level])
+            if not node_ids:
+                continue
+            index = self._levels[level]
+
+            # Empty clusters disappear (and leave their parent)
+            alive = []
+            for node_id in node_ids:
+                if index.counts[index.row[node_id]] > 0:
+                    alive.append(node_id)
+                    continue
+                self._drop_node(level, node_id, dirty)
+                deleted.append(node_id)
+
+            if not alive:
+                continue
+
+            # Chroma/build_raptor_tree number summary levels from 0
+            member_texts = [self._member_texts(level, node_id) for node_id in alive]
+            if self.summarizer is not None:
+                summaries = self.summarizer.summarize_many(member_texts, level - 1)
+            else:
+                summaries = [summarize_cluster("\n\n".join(t), level - 1) for t in member_texts]
+            vectors = _normalize(np.asarray(embed(summaries), dtype=np.float32))
+
+            for node_id, summary, vector in zip(alive, summaries, vectors):
+                parent_id, old_vector = self._node_link(node_id)
+
+                if level < self.levels:
+                    if parent_id is None:
+                        parent_id = self._assign(level + 1, vector, dirty)
+                    else:
+                        self._shift(level + 1, parent_id, vector - old_vector, 0)
+                        dirty[level + 1].add(parent_id)
+
+                row = index.row[node_id]
+                self.conn.execute(
+                    "UPDATE raptor_nodes SET summary = ?, embedding = ?, vector_sum = ?, "
+                    "n_members = ?, parent_id = ? WHERE node_id = ?",
+                    (summary, vector.tobytes(), index.sums[row].tobytes(),
+                     int(index.counts[row]), parent_id, node_id)
+                )
+                upserted.append({
+                    "id": node_id,
+                    "level": level,
+                    "summary": summary,
+                    "embedding": vector,
+                    "n_members": int(index.counts[row])
+                })
+
+        return upserted, deleted
+
+    def _node_link(self, node_id: str) -> Tuple[Optional[str], np.ndarray]:
+        parent_id, embedding = self.conn.execute(
+            "SELECT parent_id, embedding FROM raptor_nodes WHERE node_id = ?", (node_id,)
+        ).fetchone()
+        return parent_id, np.frombuffer(embedding, dtype=np.float32)
+
+    def _drop_node(self, level: int, node_id: str, dirty: Dict[int, Set[str]]):
+        parent_id, old_vector = self._node_link(node_id)
+        if parent_id and level < self.levels:
+            self._shift(level + 1, parent_id, -old_vector, -1)
+            dirty[level + 1].add(parent_id)
+        self.conn.execute("DELETE FROM raptor_nodes WHERE node_id = ?", (node_id,))
+
+    def _member_texts(self, level: int, node_id: str) -> List[str]:
+        """Texts of the members closest to the cluster centroid"""
+        rows = self.conn.execute(
+            "SELECT paper_id, char_start, char_end, summary, embedding "
+            "FROM raptor_nodes WHERE parent_id = ?", (node_id,)
+        ).fetchall()
+
+        index = self._levels[level]
+        centroid = index.sums[index.row[node_id]]
+        member_vectors = np.stack([np.frombuffer(r[4], dtype=np.float32) for r in rows])
+        closest = np.argsort(-(member_vectors @ centroid))[:self.summary_members]
+
+        texts = []
+        for i in sorted(closest):  # Keep stored order for readability
+            paper_id, start, end, summary, _ = rows[i]
+            text = summary if level > 1 else self.text_store.slice(paper_id, start, end)
+            if text:
+                texts.append(text)
+
+        return texts
+
+    def nodes(self, level: Optional[int] = None) -> List[Dict]:
+        """Inner nodes (optionally of one level) with their child IDs"""
+        query = "SELECT node_id, level, parent_id, summary, n_members FROM raptor_nodes WHERE level > 0"
+        params: tuple = ()
+        if level is not None:
+            query += " AND level = ?"
+            params = (level,)
+
+        nodes = []
+        for node_id, node_level, parent_id, summary, n_members in self.conn.execute(query, params):
+            children = [r[0] for r in self.conn.execute(
+                "SELECT node_id FROM raptor_nodes WHERE parent_id = ?", (node_id,)
+            )]
+            nodes.append({
+                "id": node_id, "level": node_level, "parent_id": parent_id,
+                "summary": summary, "n_members": n_members, "children": children
+            })
+        return nodes
+
+    def close(self):
+        self.conn.close()
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    return vectors / np.maximum(np.linalg.norm(vectors, axis=-1, keepdims=True), 1e-12)
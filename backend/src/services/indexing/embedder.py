@@ -1,11 +1,24 @@
 """
 Embedder: Generate vector embeddings for text
-Uses sentence-transformers (all-MiniLM-L6-v2, 384-dim)
+Uses sentence-transformers (all-MiniLM-L6-v2, 384-dim), or an int8 ONNX
+Runtime export of the same model on CPU-only machines
+Previously seen texts are served from a persistent on-disk cache
+Bulk jobs can shard encoding across a pool of worker processes
+Search queries are served from an in-memory LRU
 """
-from typing import List
+import os
+import threading
+from collections import OrderedDict
+from typing import List, Optional
 from sentence_transformers import SentenceTransformer
 import numpy as np
 
+from ...config.settings import settings
+from .embedding_cache import EmbeddingCache
+
+
+POOL_MIN_TEXTS = 128  # Smaller batches aren't worth the inter-process round trip
+
 
 class Embedder:
     """
@@ -13,16 +26,95 @@ class Embedder:
     Model: all-MiniLM-L6-v2 (384 dimensions, fast, quality)
     """
     
-    def __init__(self, model_name: str = "sentence-transformers/all-MiniLM-L6-v2"):
+    def __init__(
+        self,
+        model_name: str = "sentence-transformers/all-MiniLM-L6-v2",
+        cache_dir: Optional[str] = None,
+        cache_size: Optional[int] = None,
+        backend: Optional[str] = None
+    ):
         """
         Args:
             model_name: HuggingFace model name
+            cache_dir: Embedding cache directory (default: settings.EMBEDDING_CACHE_DIR,
+                "" disables the cache)
+            cache_size: Max cached vectors (default: settings.EMBEDDING_CACHE_SIZE)
+            backend: "torch" or "onnx" (default: settings.EMBEDDING_BACKEND)
         """
-        print(f"🔧 Loading embedding model: {model_name}")
-        self.model = SentenceTransformer(model_name)
+        self.model_name = model_name
+        self.backend = backend or settings.EMBEDDING_BACKEND
+        print(f"🔧 Loading embedding model: {model_name} ({self.backend})")
+        
+        if self.backend == "onnx":
+            from .onnx_encoder import OnnxEncoder
+            self.model = OnnxEncoder(model_name, settings.ONNX_MODEL_DIR)
+        elif self.backend == "torch":
+            self.model = SentenceTransformer(model_name)
+        else:
+            raise ValueError(f"Unknown embedding backend: {self.backend}")
         self.dimension = 384  # all-MiniLM-L6-v2 dimension
+        
+        # Quantized vectors differ slightly, so they are cached separately
+        cache_model = model_name if self.backend == "torch" else f"{model_name}@onnx-int8"
+        cache_dir = settings.EMBEDDING_CACHE_DIR if cache_dir is None else cache_dir
+        cache_size = cache_size or settings.EMBEDDING_CACHE_SIZE
+        self.cache = EmbeddingCache(cache_dir, cache_model, cache_size) if cache_dir else None
+        self.query_cache_size = settings.QUERY_CACHE_SIZE
+        self._query_cache: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._query_lock = threading.Lock()
+        self.pool = None
+        self.pool_workers = 0
     
-    def embed(self, texts: List[str]) -> List[List[float]]:
+    def start_pool(self, workers: Optional[int] = None, threads_per_worker: Optional[int] = None):
+        """
+        Start worker processes for bulk encoding (torch backend only)
+        
+        Each worker loads its own copy of the model and is limited to
+        ``threads_per_worker`` intra-op threads, so N workers don't fight
+        over the same cores. Texts are fed to the workers in chunks
+        through a shared queue.
+        
+        Args:
+            workers: Worker processes (default: settings.EMBEDDING_WORKERS or CPU count)
+            threads_per_worker: Torch threads per worker (default: cores / workers)
+        """
+        if self.pool is not None:
+            return
+        if self.backend != "torch":
+            print(f"⚠️ Embedding pool needs the torch backend, staying single-process ({self.backend})")
+            return
+        
+        cores = os.cpu_count() or 1
+        workers = workers or settings.EMBEDDING_WORKERS or cores
+        threads_per_worker = threads_per_worker or max(1, cores // workers)
+        
+        # Workers are spawned, so they pick up the thread limits from the
+        # environment at import time; restore ours afterwards
+        thread_vars = ("OMP_NUM_THREADS", "MKL_NUM_THREADS")
+        saved = {var: os.environ.get(var) for var in thread_vars}
+        try:
+            for var in thread_vars:
+                os.environ[var] = str(threads_per_worker)
+            self.pool = self.model.start_multi_process_pool(["cpu"] * workers)
+        finally:
+            for var, value in saved.items():
+                if value is None:
+                    os.environ.pop(var, None)
+                else:
+                    os.environ[var] = value
+        
+        self.pool_workers = workers
+        print(f"🔧 Embedding pool: {workers} workers x {threads_per_worker} threads")
+    
+    def stop_pool(self):
+        """Shut down the worker processes (safe to call twice)"""
+        if self.pool is None:
+            return
+        self.model.stop_multi_process_pool(self.pool)
+        self.pool = None
+        self.pool_workers = 0
+    
+    def embed(self, texts: List[str]) -> np.ndarray:
         """
         Generate embeddings for list of texts
         
@@ -30,22 +122,24 @@ class Embedder:
             texts: List of text strings
             
         Returns:
-            List of embedding vectors (384-dim each)
+            Contiguous float32 array (n, 384); rows are the vectors.
+            Convert with .tolist() only where a client needs lists.
         """
         if not texts:
-            return []
+            return np.zeros((0, self.dimension), dtype=np.float32)
         
-        # Batch encoding for efficiency
-        embeddings = self.model.encode(
-            texts,
-            batch_size=32,
-            show_progress_bar=len(texts) > 100
-        )
+        # Encode each distinct text once (repeated boilerplate, fallback
+        # captions, ...) and fan the vectors back out
+        unique = list(dict.fromkeys(texts))
+        embeddings = self._encode_cached(unique)
         
-        # Convert to list of lists
-        return embeddings.tolist()
+        if len(unique) == len(texts):
+            return embeddings
+        
+        position = {text: i for i, text in enumerate(unique)}
+        return embeddings[[position[text] for text in texts]]
     
-    def embed_query(self, query: str) -> List[float]:
+    def embed_query(self, query: str) -> np.ndarray:
         """
         Embed single query
         
@@ -53,9 +147,78 @@ class Embedder:
             query: Query string
             
         Returns:
-            Embedding vector (384-dim)
+            Embedding vector (384-dim float32)
         """
-        return self.model.encode(query).tolist()
+        return self.embed_queries([query])[0]
+    
+    def embed_queries(self, queries: List[str]) -> np.ndarray:
+        """
+        Embed search queries (multi-query variants, HyDE, ...) in one batch
+        
+        Served from an in-memory LRU, then the on-disk cache (so repeated
+        queries survive restarts); only misses of both run the model.
+        
+        Args:
+            queries: Query strings
+            
+        Returns:
+            Float32 array (n, 384), one row per query
+        """
+        if not queries:
+            return np.zeros((0, self.dimension), dtype=np.float32)
+        
+        with self._query_lock:
+            found = {}
+            for query in queries:
+                vector = self._query_cache.get(query)
+                if vector is not None:
+                    self._query_cache.move_to_end(query)
+                    found[query] = vector
+        
+        missing = [q for q in dict.fromkeys(queries) if q not in found]
+        if missing:
+            fresh = self._encode_cached(missing)
+            with self._query_lock:
+                for query, vector in zip(missing, fresh):
+                    found[query] = vector
+                    self._query_cache[query] = vector
+                while len(self._query_cache) > self.query_cache_size:
+                    self._query_cache.popitem(last=False)
+        
+        return np.stack([found[q] for q in queries])
+    
+    def _encode_cached(self, texts: List[str]) -> np.ndarray:
+        """Encode texts, running the model only on cache misses"""
+        if self.cache is None:
+            return self._encode(texts)
+        
+        cached, missing = self.cache.get_many(texts)
+        if not missing:
+            return cached
+        
+        fresh = self._encode([texts[i] for i in missing])
+        self.cache.put_many([texts[i] for i in missing], fresh)
+        if cached is None:  # Cache was empty: everything is fresh
+            return fresh
+        
+        cached[missing] = fresh
+        return cached
+    
+    def _encode(self, texts: List[str]) -> np.ndarray:
+        """Run the model (batch encoding for efficiency)"""
+        if self.pool is not None and len(texts) >= POOL_MIN_TEXTS:
+            # ~4 chunks per worker keeps them busy without tiny messages
+            chunk_size = max(32, -(-len(texts) // (self.pool_workers * 4)))
+            embeddings = self.model.encode_multi_process(
+                texts, self.pool, batch_size=32, chunk_size=chunk_size
+            )
+        else:
+            embeddings = self.model.encode(
+                texts,
+                batch_size=32,
+                show_progress_bar=len(texts) > 100
+            )
+        return np.ascontiguousarray(embeddings, dtype=np.float32)
 
 
 # Test
@@ -65,3 +228,7 @@ if __name__ == "__main__":
     embeddings = embedder.embed(test_texts)
     print(f"✅ Embedded {len(test_texts)} texts → {len(embeddings)} vectors")
     print(f"   Dimension: {len(embeddings[0])}")
+    
+    if embedder.cache is not None:
+        embedder.embed(test_texts)
+        print(f"   Cache: {embedder.cache.stats()}")
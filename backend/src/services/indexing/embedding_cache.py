@@ -0,0 +1,291 @@
+"""
+Embedding Cache: Persistent text -> vector cache for the Embedder
+Vectors live in a memory-mapped float32 matrix, one row per slot; a JSON
+snapshot plus an append-only log map (model, text hash) keys to slots in
+LRU order. Each slot also stores its key, checked on every hit.
+"""
+import hashlib
+import json
+import os
+import re
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # Windows: no single-writer lock
+    fcntl = None
+
+
+WHITESPACE = re.compile(r'\s+')
+COMPACT_MIN_LINES = 10_000  # Log lines before it may be folded into the snapshot
+
+
+def cache_key(model_name: str, text: str) -> str:
+    """128-bit hash of model name + whitespace-normalized text"""
+    normalized = WHITESPACE.sub(' ', text).strip()
+    return hashlib.sha256(f"{model_name}\0{normalized}".encode()).hexdigest()[:32]
+
+
+class EmbeddingCache:
+    """
+    Size-capped, LRU-evicting embedding cache on disk
+
+    Layout:
+        <root>/<model>/vectors.f32   capacity x dim float32 (memmap)
+        <root>/<model>/keys.bin      capacity x 16-byte key of each slot's vector
+        <root>/<model>/lock          held (flock) by the one writer
+        <root>/<model>/index.json    {"dim", "entries": [[key, slot], ...]}
+        <root>/<model>/index.log     "<key> <slot>" per insert since the snapshot
+
+    Entries are listed oldest first. When the cache is full, the least
+    recently used entry gives up its slot to the new vector. Each batch of
+    inserts appends its lines to the log (O(batch), not O(capacity)); the
+    log is folded into the snapshot once it outgrows the entry count.
+    Hits only reach disk with the next snapshot, so a crash loses at most
+    the recency of lookups since then.
+
+    Only one instance per directory writes; others (e.g. the API next to
+    the indexer) open it read-only. Their slot map goes stale as the writer
+    evicts, and a crash can leave a logged key pointing at an old vector:
+    both are caught by comparing keys.bin with the key, and count as misses.
+    """
+
+    def __init__(self, root: str, model_name: str, capacity: int = 200_000):
+        """
+        Args:
+            root: Cache directory (one subdirectory per model)
+            model_name: Embedding model the vectors belong to
+            capacity: Max cached vectors
+        """
+        self.model_name = model_name
+        self.capacity = capacity
+        self.dir = Path(root) / re.sub(r'[^\w.-]+', '_', model_name)
+        self.vectors_path = self.dir / "vectors.f32"
+        self.index_path = self.dir / "index.json"
+        self.log_path = self.dir / "index.log"
+        self.keys_path = self.dir / "keys.bin"
+        self._log_lines = 0
+        self._keys: Optional[np.memmap] = None
+        self.read_only = not self._lock_writer()
+
+        self.dim: Optional[int] = None
+        self._vectors: Optional[np.memmap] = None
+        self._slots: "OrderedDict[str, int]" = OrderedDict()
+        self._free: List[int] = []
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+
+        self._load()
+
+    def _load(self):
+        """Open an existing cache; a corrupt or mismatched one is started over"""
+        if not self.index_path.exists():
+            return
+
+        if not self.keys_path.exists() and not self.read_only:
+            print("⚠️  Embedding cache has no keys.bin (older format), starting empty")
+            self.index_path.unlink()
+            self.log_path.unlink(missing_ok=True)
+            return
+
+        try:
+            index = json.loads(self.index_path.read_text())
+            self._open(index["dim"])
+            self._slots = OrderedDict(
+                (key, slot) for key, slot in index["entries"] if slot < self.capacity
+            )
+            self._replay_log()
+        except Exception as e:
+            print(f"⚠️  Embedding cache unreadable, starting empty: {e}")
+            self.dim = None
+            self._vectors = None
+            self._slots = OrderedDict()
+            return
+
+        if self._log_lines > max(COMPACT_MIN_LINES, len(self._slots)) and not self.read_only:
+            self._snapshot()
+
+        used = set(self._slots.values())
+        self._free = [slot for slot in range(self.capacity - 1, -1, -1) if slot not in used]
+        mode = " (read-only: another process writes)" if self.read_only else ""
+        print(f"📦 Embedding cache: {len(self._slots)}/{self.capacity} vectors{mode}")
+
+    def _lock_writer(self) -> bool:
+        """Take the directory's writer lock (held until exit); False if another process has it"""
+        if fcntl is None:
+            return True
+        self.dir.mkdir(parents=True, exist_ok=True)
+        self._lock_file = open(self.dir / "lock", "a")
+        try:
+            fcntl.flock(self._lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            self._lock_file.close()
+            return False
+        return True
+
+    def _replay_log(self):
+        """Apply inserts logged after the snapshot; a slot's new key evicts its old one"""
+        if not self.log_path.exists():
+            return
+        owner = {slot: key for key, slot in self._slots.items()}
+        with open(self.log_path) as f:
+            for line in f:
+                if not line.endswith("\n"):
+                    break  # Torn last write
+                key, slot = line.split()
+                slot = int(slot)
+                self._log_lines += 1
+                if slot >= self.capacity:
+                    continue
+                previous = owner.get(slot)
+                if previous is not None and previous != key:
+                    self._slots.pop(previous, None)
+                old_slot = self._slots.pop(key, None)
+                if old_slot is not None and old_slot != slot:
+                    owner.pop(old_slot, None)
+                self._slots[key] = slot
+                owner[slot] = key
+
+    def _open(self, dim: int):
+        """Map the vector and key files, growing/shrinking them to the current capacity"""
+        self.dir.mkdir(parents=True, exist_ok=True)
+        if not self.read_only:
+            for path, size in ((self.vectors_path, self.capacity * dim * 4),
+                               (self.keys_path, self.capacity * 16)):
+                with open(path, "a+b") as f:
+                    if os.path.getsize(path) != size:
+                        f.truncate(size)  # Sparse on most filesystems
+
+        mode = "r" if self.read_only else "r+"
+        self.dim = dim
+        self._vectors = np.memmap(self.vectors_path, dtype=np.float32, mode=mode,
+                                  shape=(self.capacity, dim))
+        self._keys = np.memmap(self.keys_path, dtype=np.uint8, mode=mode, shape=(self.capacity, 16))
+        if not self._free and not self._slots:
+            self._free = list(range(self.capacity - 1, -1, -1))
+
+    def get_many(self, texts: Sequence[str]) -> Tuple[Optional[np.ndarray], List[int]]:
+        """
+        Look up vectors for a batch of texts
+
+        Returns:
+            (vectors, missing): (n, dim) float32 array with the cached rows
+            filled in (None while the cache is empty), and the indices of
+            the texts that were not cached
+        """
+        keys = [cache_key(self.model_name, text) for text in texts]
+        hit_rows, hit_slots, missing = [], [], []
+
+        with self._lock:
+            if self._vectors is None:
+                self.misses += len(texts)
+                return None, list(range(len(texts)))
+
+            for i, key in enumerate(keys):
+                slot = self._slots.get(key)
+                if slot is None or bytes(self._keys[slot]) != bytes.fromhex(key):
+                    if slot is not None:  # Slot reused by the writer, or torn write
+                        del self._slots[key]
+                        if not self.read_only:
+                            self._free.append(slot)
+                    missing.append(i)
+                    continue
+                self._slots.move_to_end(key)
+                hit_rows.append(i)
+                hit_slots.append(slot)
+
+            # One gather from the memmap instead of a copy per row
+            vectors = np.empty((len(texts), self.dim), dtype=np.float32)
+            if hit_slots:
+                vectors[hit_rows] = self._vectors[hit_slots]
+
+            self.hits += len(hit_rows)
+            self.misses += len(missing)
+
+        return vectors, missing
+
+    def put_many(self, texts: Sequence[str], vectors: Sequence):
+        """Store freshly computed vectors (evicting LRU entries when full)"""
+        vectors = np.asarray(vectors, dtype=np.float32)
+        if len(texts) == 0:
+            return
+
+        with self._lock:
+            if self.read_only:
+                return
+            if self._vectors is None:
+                self._open(vectors.shape[1])
+            elif vectors.shape[1] != self.dim:
+                raise ValueError(f"Cache holds {self.dim}-dim vectors, got {vectors.shape[1]}")
+
+            written, slots, keys = [], [], []
+            for text in texts:
+                key = cache_key(self.model_name, text)
+                slot = self._slots.get(key)
+                if slot is None:
+                    if self._free:
+                        slot = self._free.pop()
+                    else:
+                        _, slot = self._slots.popitem(last=False)  # Evict LRU
+                else:
+                    self._slots.move_to_end(key)
+                self._slots[key] = slot
+                written.append(f"{key} {slot}\n")
+                slots.append(slot)
+                keys.append(bytes.fromhex(key))
+
+            self._flush(written, slots, keys, vectors)
+
+    def _flush(self, lines: List[str], slots: List[int], keys: List[bytes], vectors: np.ndarray):
+        """
+        Log the batch, then overwrite the slots (snapshot once the log is long)
+
+        Logging first means a reused slot is never silently remapped: until
+        keys.bin is rewritten, the logged key doesn't match the slot's key.
+        """
+        if self.index_path.exists():
+            with open(self.log_path, "a") as f:
+                f.write("".join(lines))
+            self._log_lines += len(lines)
+
+        # Duplicate texts in a batch: the last vector wins, as in the log
+        self._vectors[slots] = vectors
+        self._keys[slots] = np.frombuffer(b"".join(keys), dtype=np.uint8).reshape(-1, 16)
+        self._vectors.flush()
+        self._keys.flush()
+
+        if not self.index_path.exists() or self._log_lines > max(COMPACT_MIN_LINES, len(self._slots)):
+            self._snapshot()
+
+    def _snapshot(self):
+        """Write the full index (temp file + rename) and empty the log"""
+        tmp = self.index_path.with_suffix(f".{os.getpid()}.tmp")
+        tmp.write_text(json.dumps({
+            "model": self.model_name,
+            "dim": self.dim,
+            "entries": list(self._slots.items())
+        }))
+        os.replace(tmp, self.index_path)
+        self.log_path.unlink(missing_ok=True)
+        self._log_lines = 0
+
+    def stats(self) -> Dict:
+        """Hit/miss counters since start-up plus current fill"""
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+            "entries": len(self._slots),
+            "capacity": self.capacity
+        }
+
+    def __len__(self) -> int:
+        return len(self._slots)
@@ -2,22 +2,150 @@
 PHASE 0: INDEXING PIPELINE (Lance Martin Notebooks 1-4, 12, 13)
 Integrates multimodal extraction with ResearchForge modules
 """
+import os
 import sys
+from bisect import bisect_right
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
 from pathlib import Path
-import chromadb
-from typing import Dict, List
-import base64
+import numpy as np
+from typing import Dict, List, Iterable, Optional
 
-from ..ingestion.pdf_parser import PDFParser
+from ..ingestion.paper_document import PaperDocument
+from ..ingestion.figure_store import FigureStore
+from ..ingestion.paper_text_store import PaperTextStore, page_span
 from ..ingestion.metadata_extractor import MetadataExtractor
-from ..ingestion.figure_extractor import extract_images
-from ..ingestion.table_extractor import extract_tables  # ✅ ADD THIS
 from .semantic_chunker import SemanticChunker
-from .parent_child import create_parent_child_chunks
+from .parent_child import create_parent_child_chunks, pool_parent_embeddings
 from .raptor import build_raptor_tree
 from .embedder import Embedder
-from .chromadb_uploader import ChromaUploader
+from .chromadb_uploader import ChromaUploader, content_id
+from .parent_index import ParentIndex
+from .bm25_index import BM25Index
+from .corpus_raptor import CorpusRaptorIndex
+from .cluster_summarizer import ClusterSummarizer
+from .manifest import IndexManifest, file_sha256, pipeline_fingerprint
 from ..llm.client import chat
+from ...config.settings import settings
+from ...db.vector_store import get_vector_store
+from ...db.embedded_store import EmbeddedVectorStore
+
+
+# Everything that changes what ends up in the index; hashed into the
+# pipeline version stored per paper (see manifest.py)
+INDEX_CONFIG = {
+    "embedding_model": "sentence-transformers/all-MiniLM-L6-v2",
+    "embedding_backend": settings.EMBEDDING_BACKEND,  # "torch" or "onnx"
+    "embedding_quantization": "int8" if settings.EMBEDDING_BACKEND == "onnx" else "none",
+    "chunk_size": 512,
+    "chunk_overlap": 50,
+    "chunking": "fixed",  # or "semantic": embedding breakpoints, pooled sentence vectors
+    "semantic_max_chars": 1000,  # size cap per semantic chunk
+    "parent_size": 1500,
+    "parent_embedding": "encode",  # or "pool": mean of child vectors, no extra encoding
+    "raptor_levels": 3,
+    "raptor_scope": "paper",  # or "corpus": one incremental tree over all papers
+    "raptor_summaries": "truncate",  # or "llm": concurrent, cached cluster summaries
+    "max_images": 5,
+    "max_tables": 5,
+    "table_backend": "pymupdf",  # or "pdfplumber" (slower fallback)
+}
+
+
+def prepare_paper(pdf_path: Path) -> Dict:
+    """
+    CPU-bound front half of indexing: parse, metadata, chunking
+    
+    Module-level (not a method) so it can run in a worker process;
+    everything it returns is picklable.
+    """
+    pdf_path = Path(pdf_path)
+    
+    # 1. PDF PARSING (PyMuPDF) - one open, one page walk for
+    #    text, images and tables. Figure blobs go straight to the
+    #    content-addressed store; only paths + hashes travel on.
+    with PaperDocument(
+        str(pdf_path),
+        max_images=INDEX_CONFIG["max_images"],
+        max_tables=INDEX_CONFIG["max_tables"],
+        table_backend=INDEX_CONFIG["table_backend"],
+        figure_store=FigureStore(settings.FIGURE_STORE_DIR)
+    ) as paper:
+        parsed = paper.parsed()
+        images = paper.images
+        tables = paper.tables
+        sections = paper.sections()
+        page_offsets = paper.page_offsets
+        page_texts = paper.page_texts
+    print(f"✅ Parsed {parsed['num_pages']} pages, {len(sections)} sections")
+    
+    # 2. METADATA EXTRACTION (Gemini LLM)
+    extractor = MetadataExtractor()
+    metadata = extractor.extract(parsed['text'], pdf_path.name)
+    print(f"✅ Metadata: {metadata.get('title', 'N/A')}")
+    
+    # 3. SEMANTIC CHUNKING (Lance Martin 1-4)
+    # 4. MULTI-REP INDEXING (Lance Martin 12)
+    # Embedding-breakpoint chunking needs the embedder, which lives in the
+    # parent process: those papers are chunked in _store_paper instead
+    chunks, parent_chunks = None, None
+    if INDEX_CONFIG["chunking"] != "semantic":
+        chunker = SemanticChunker(
+            chunk_size=INDEX_CONFIG["chunk_size"],
+            overlap=INDEX_CONFIG["chunk_overlap"]
+        )
+        # Split page by page with a bounded buffer; offsets match parsed['text']
+        chunks = list(chunker.chunk_stream(enumerate(page_texts, 1)))
+        _tag_sections(chunks, sections)
+        _tag_pages(chunks, page_offsets)
+        print(f"✅ {len(chunks)} semantic chunks (512t)")
+        
+        parent_chunks = create_parent_child_chunks(
+            chunks, parent_size=INDEX_CONFIG["parent_size"], text=parsed['text']
+        )
+        print(f"✅ {len(parent_chunks)} parent chunks (1500t)")
+    
+    return {
+        "pdf_path": pdf_path,
+        "num_pages": parsed['num_pages'],
+        "metadata": metadata,
+        "chunks": chunks,
+        "parent_chunks": parent_chunks,
+        "images": images,
+        "tables": tables,
+        "text": parsed['text'],
+        "page_offsets": page_offsets,
+        "sections": [
+            {**section, "text_content": parsed['text'][section['char_start']:section['char_end']]}
+            for section in sections
+        ]
+    }
+
+
+def _tag_sections(chunks: List, sections: List[Dict]):
+    """Set section_type / section_title on each chunk from its char_start"""
+    starts = [section['char_start'] for section in sections]
+    
+    for chunk in chunks:
+        i = bisect_right(starts, chunk.metadata.get('char_start', 0)) - 1
+        section = sections[i] if i >= 0 else None
+        chunk.metadata['section_type'] = section['section_type'] if section else 'front_matter'
+        chunk.metadata['section_title'] = section['title'] if section else ''
+
+
+def _span(doc) -> Dict:
+    """Offset/page fields stored with a chunk or parent in Chroma"""
+    return {
+        key: int(doc.metadata.get(key, 0))
+        for key in ('char_start', 'char_end', 'page_start', 'page_end')
+    }
+
+
+def _tag_pages(chunks: List, page_offsets: List[int]):
+    """Set page_start / page_end on each chunk from its char span"""
+    for chunk in chunks:
+        chunk.metadata['page_start'], chunk.metadata['page_end'] = page_span(
+            page_offsets, chunk.metadata['char_start'], chunk.metadata['char_end']
+        )
 
 
 class IndexPipeline:
@@ -29,10 +157,48 @@ class IndexPipeline:
     - MULTIMODAL: Your image extraction + vision summaries
     """
     
-    def __init__(self, chroma_host='localhost', chroma_port=8000):
-        self.chroma = chromadb.HttpClient(host=chroma_host, port=chroma_port)
-        self.embedder = Embedder()
+    def __init__(self, chroma_host='localhost', chroma_port=8000, incremental: bool = True):
+        """
+        Args:
+            chroma_host: ChromaDB host (VECTOR_BACKEND="chroma")
+            chroma_port: ChromaDB port
+            incremental: Track content hashes in PostgreSQL and skip
+                unchanged papers in index_many()
+        """
+        self.chroma = get_vector_store(host=chroma_host, port=chroma_port)
+        self.embedder = Embedder(INDEX_CONFIG["embedding_model"], backend=INDEX_CONFIG["embedding_backend"])
+        # Versions are per vector store: pointing the pipeline at another
+        # backend or directory makes every paper stale instead of skipped
+        if settings.VECTOR_BACKEND == "embedded":
+            vector_store = f"embedded:{Path(settings.VECTOR_STORE_DIR).resolve()}"
+        else:
+            vector_store = f"chroma:{chroma_host}:{chroma_port}"
+        self.pipeline_version = pipeline_fingerprint({**INDEX_CONFIG, "vector_store": vector_store})
+        self.manifest = None
+        if incremental:
+            try:
+                self.manifest = IndexManifest(self.pipeline_version)
+            except Exception as e:
+                print(f"⚠️ Manifest unavailable, indexing without skip checks: {e}")
         self.uploader = ChromaUploader(self.chroma)
+        self.text_store = PaperTextStore(settings.PAPER_TEXT_DIR)
+        self.parent_index = ParentIndex(settings.PARENT_INDEX_PATH)
+        self.bm25 = BM25Index(settings.BM25_INDEX_DIR)
+        self.summarizer = None
+        if INDEX_CONFIG["raptor_summaries"] == "llm":
+            self.summarizer = ClusterSummarizer(
+                settings.SUMMARY_CACHE_PATH,
+                concurrency=settings.SUMMARY_CONCURRENCY,
+                deadline_s=settings.SUMMARY_DEADLINE_S,
+                max_calls=settings.SUMMARY_MAX_CALLS
+            )
+        self.corpus_raptor = None
+        if INDEX_CONFIG["raptor_scope"] == "corpus":
+            self.corpus_raptor = CorpusRaptorIndex(
+                settings.RAPTOR_INDEX_PATH, self.text_store,
+                levels=INDEX_CONFIG["raptor_levels"],
+                summarizer=self.summarizer
+            )
         self.tables_coll = self.chroma.get_or_create_collection("tables")
 
         # Create 3 collections (per your spec)
@@ -41,39 +207,200 @@ class IndexPipeline:
         self.raptor_coll = self.chroma.get_or_create_collection("raptor")
         self.images_coll = self.chroma.get_or_create_collection("images")
     
-    def index_paper(self, pdf_path: Path) -> Dict:
+    def index_paper(self, pdf_path: Path, force: bool = False) -> Dict:
         """
         Index single paper through full pipeline
-        Returns stats dict
+        Returns stats dict ({"paper_id", "skipped": True} if unchanged)
+        
+        Args:
+            pdf_path: PDF to index
+            force: Re-index even if the manifest says the paper is current
         """
         print(f"\n{'='*60}\n📄 {pdf_path.name}\n{'='*60}")
+        content_hash = file_sha256(pdf_path) if self.manifest else None
+        if not force and content_hash and self.manifest.is_current(pdf_path, content_hash):
+            print("⏭️  Unchanged since last index, skipping")
+            return {"paper_id": pdf_path.stem, "skipped": True}
+        try:
+            return self._store_paper(prepare_paper(pdf_path), content_hash)
+        finally:
+            if isinstance(self.chroma, EmbeddedVectorStore):
+                self.chroma.persist()
+    
+    def index_many(
+        self,
+        pdf_paths: Iterable[Path],
+        workers: Optional[int] = None,
+        queue_size: Optional[int] = None,
+        force: bool = False,
+        embed_workers: Optional[int] = None
+    ) -> Dict:
+        """
+        Index many papers: CPU-bound stages in a process pool,
+        embedding + Chroma writes in this process
         
-        # 1. PDF PARSING (PyMuPDF)
-        parser = PDFParser()
-        parsed = parser.parse(str(pdf_path))
-        print(f"✅ Parsed {parsed['num_pages']} pages")
+        Parsing, metadata and chunking (prepare_paper) run in worker
+        processes. Finished papers are handed back through a bounded
+        window of in-flight jobs, so at most ``queue_size`` prepared
+        papers are ever held in memory while the embedder catches up.
         
-        # 2. METADATA EXTRACTION (Gemini LLM)
-        extractor = MetadataExtractor()
-        metadata = extractor.extract(parsed['text'], pdf_path.name)
-        print(f"✅ Metadata: {metadata.get('title', 'N/A')}")
+        Args:
+            pdf_paths: PDFs to index
+            workers: Worker processes (default: CPU count)
+            queue_size: Max papers parsed but not yet stored (default: 2x workers)
+            force: Re-index even if the manifest says a paper is current
+            embed_workers: Encoder processes for the duration of the batch
+                (default: settings.EMBEDDING_WORKERS, 0/1 = encode in this process).
+                Parse and embed workers share the cores, so size them together.
+            
+        Returns:
+            {"indexed": List[Dict], "skipped": List[str], "failed": List[Dict]}
+            Failed entries carry {"path", "stage", "error"}
+        """
+        workers = workers or os.cpu_count() or 1
+        queue_size = queue_size or workers * 2
         
-        # 3. SEMANTIC CHUNKING (Lance Martin 1-4)
-        chunker = SemanticChunker(chunk_size=512, overlap=50)
-        chunks = chunker.chunk(parsed['text'])
-        print(f"✅ {len(chunks)} semantic chunks (512t)")
+        indexed, skipped, failed = [], [], []
+        content_hashes = {}
         
-        # 4. MULTI-REP INDEXING (Lance Martin 12)
-        parent_chunks = create_parent_child_chunks(chunks, parent_size=1500)
-        print(f"✅ {len(parent_chunks)} parent chunks (1500t)")
+        def changed_papers():
+            # Hash lazily so skipping stays streaming too
+            for pdf_path in (Path(p) for p in pdf_paths):
+                if self.manifest is None:
+                    yield pdf_path
+                    continue
+                try:
+                    content_hash = file_sha256(pdf_path)
+                except OSError as e:
+                    failed.append({"path": str(pdf_path), "stage": "hash", "error": str(e)})
+                    continue
+                if not force and self.manifest.is_current(pdf_path, content_hash):
+                    skipped.append(str(pdf_path))
+                    continue
+                content_hashes[pdf_path] = content_hash
+                yield pdf_path
+        
+        pending_paths = changed_papers()
+        
+        embed_workers = settings.EMBEDDING_WORKERS if embed_workers is None else embed_workers
+        if embed_workers > 1:
+            self.embedder.start_pool(embed_workers)
+        
+        try:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                in_flight = {}
+                
+                def fill():
+                    # Keep the bounded queue topped up
+                    while len(in_flight) < queue_size:
+                        pdf_path = next(pending_paths, None)
+                        if pdf_path is None:
+                            return
+                        in_flight[pool.submit(prepare_paper, pdf_path)] = pdf_path
+                
+                fill()
+                while in_flight:
+                    done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                    
+                    for future in done:
+                        pdf_path = in_flight.pop(future)
+                        
+                        try:
+                            prepared = future.result()
+                        except Exception as e:
+                            print(f"❌ {pdf_path.name}: parsing failed: {e}")
+                            failed.append({"path": str(pdf_path), "stage": "prepare", "error": str(e)})
+                            continue
+                        
+                        try:
+                            indexed.append(self._store_paper(prepared, content_hashes.pop(pdf_path, None)))
+                        except Exception as e:
+                            print(f"❌ {pdf_path.name}: indexing failed: {e}")
+                            failed.append({"path": str(pdf_path), "stage": "store", "error": str(e)})
+                    
+                    fill()
+        finally:
+            self.embedder.stop_pool()
+            if isinstance(self.chroma, EmbeddedVectorStore):
+                self.chroma.persist()
+        
+        print(f"✅ Batch done: {len(indexed)} indexed, {len(skipped)} unchanged, {len(failed)} failed")
+        if self.embedder.cache is not None:
+            print(f"   Embedding cache: {self.embedder.cache.stats()}")
+        return {"indexed": indexed, "skipped": skipped, "failed": failed}
+    
+    def index_directory(self, directory: Path, pattern: str = "*.pdf", **kwargs) -> Dict:
+        """
+        Index every PDF in a directory (see index_many for kwargs)
+        """
+        pdf_paths = sorted(Path(directory).glob(pattern))
+        print(f"📂 {len(pdf_paths)} PDFs in {directory}")
+        return self.index_many(pdf_paths, **kwargs)
+    
+    def _store_paper(self, prepared: Dict, content_hash: Optional[str] = None) -> Dict:
+        """
+        Embed a prepared paper and upload it to every collection
+        
+        Uploads run in the background while later steps embed; the paper
+        is only recorded in the manifest once every batch is acknowledged.
+        
+        Args:
+            prepared: prepare_paper() output
+            content_hash: SHA-256 of the PDF; recorded in the manifest
+                once the upload succeeded
+        """
+        try:
+            if prepared['chunks'] is None:
+                self._chunk_semantic(prepared)
+            stats = self._upload_paper(prepared)
+            self.uploader.flush()
+        except Exception:
+            self.uploader.discard()
+            raise
+        
+        if self.manifest and content_hash:
+            self.manifest.record(
+                prepared['pdf_path'], content_hash, prepared['metadata'], prepared['num_pages'],
+                sections=prepared['sections']
+            )
+        
+        return stats
+    
+    def _chunk_semantic(self, prepared: Dict):
+        """Steps 3-4 in embedding-breakpoint mode; also sets chunk_embeddings"""
+        chunker = SemanticChunker(
+            chunk_size=INDEX_CONFIG["semantic_max_chars"],
+            breakpoint_percentile=90
+        )
+        chunks, vectors = chunker.chunk_semantic(prepared['text'], self.embedder)
+        _tag_sections(chunks, prepared['sections'])
+        _tag_pages(chunks, prepared['page_offsets'])
+        print(f"✅ {len(chunks)} semantic chunks (embedding breakpoints)")
         
-        # 5. EMBED CHUNKS
-        chunk_embeddings = self.embedder.embed([c.page_content for c in chunks])
-        parent_embeddings = self.embedder.embed([p.page_content for p in parent_chunks])
+        parent_chunks = create_parent_child_chunks(
+            chunks, parent_size=INDEX_CONFIG["parent_size"], text=prepared['text']
+        )
+        print(f"✅ {len(parent_chunks)} parent chunks (1500t)")
         
-     # 6. UPLOAD TO CHROMA
+        prepared.update(chunks=chunks, parent_chunks=parent_chunks, chunk_embeddings=vectors)
+    
+    def _upload_paper(self, prepared: Dict) -> Dict:
+        """Steps 5-9 of the pipeline; uploads are queued on self.uploader"""
+        pdf_path = prepared['pdf_path']
+        metadata = prepared['metadata']
+        chunks = prepared['chunks']
+        parent_chunks = prepared['parent_chunks']
+        images = prepared['images']
+        tables = prepared['tables']
         paper_id = pdf_path.stem
         
+        # Drop any previous version first; deletes by paper_id are idempotent,
+        # and the manifest may be unreachable or out of step with the stores
+        self._delete_paper(paper_id)
+        
+        # Full text once per paper; chunks/parents point into it by offset
+        self.text_store.put(paper_id, prepared['text'], prepared['page_offsets'])
+        
         # Clean metadata for ChromaDB (no lists/dicts/None)
         clean_metadata = {
             "title": str(metadata.get('title') or 'Unknown'),
@@ -83,56 +410,102 @@ class IndexPipeline:
             "keywords": ", ".join(metadata.get('keywords') or []) or ''
         }
         
-        # Chunks collection
-        self.chunks_coll.add(
+        # Content-derived IDs: re-running a paper overwrites, never duplicates
+        parent_ids = [content_id(paper_id, "parent", p.page_content) for p in parent_chunks]
+        
+        # 5+6. EMBED + UPLOAD CHUNKS (embedding reused by parents/RAPTOR below;
+        # batch N uploads while batch N+1 embeds). Semantic-mode chunks
+        # arrive with pooled sentence vectors and skip the embedding pass.
+        chunk_records = dict(
+            ids=[content_id(paper_id, "chunk", c.page_content) for c in chunks],
             documents=[c.page_content for c in chunks],
-            embeddings=chunk_embeddings,
             metadatas=[{
                 "paper_id": paper_id,
                 "paper_name": pdf_path.name,
-                "parent_id": f"parent_{i//3}",  # 3 chunks per parent
+                "parent_id": parent_ids[i // 3] if i // 3 < len(parent_ids) else '',  # 3 chunks per parent
+                "section_type": c.metadata.get('section_type', 'other'),
+                "section_title": c.metadata.get('section_title', ''),
+                **_span(c),
                 **clean_metadata  # Use cleaned metadata
-            } for i, c in enumerate(chunks)],
-            ids=[f"{paper_id}_chunk_{i}" for i in range(len(chunks))]
+            } for i, c in enumerate(chunks)]
         )
+        chunk_embeddings = prepared.get('chunk_embeddings')
+        if chunk_embeddings is not None:
+            self.uploader.upsert(self.chunks_coll, embeddings=chunk_embeddings, **chunk_records)
+        else:
+            chunk_embeddings = self.uploader.embed_and_upsert(
+                self.chunks_coll, embed=self.embedder.embed, **chunk_records
+            )
         
-        # Parents collection
-        self.parents_coll.add(
-            documents=[p.page_content for p in parent_chunks],
-            embeddings=parent_embeddings,
-            metadatas=[{
-                "paper_id": paper_id,
-                "paper_name": pdf_path.name,
-                "type": "parent",
-                **clean_metadata
-            } for _ in parent_chunks],
-            ids=[f"{paper_id}_parent_{i}" for i in range(len(parent_chunks))]
+        # Corpus-wide keyword index (one new segment per paper)
+        self.bm25.add_paper(
+            paper_id, chunk_records['ids'], chunk_records['documents'],
+            [m['section_type'] for m in chunk_records['metadatas']]
         )
         
-        # 7. RAPTOR TREE (Lance Martin 13)
-        raptor_nodes = build_raptor_tree(chunks, self.embedder, levels=3)
-        raptor_embeddings = self.embedder.embed([n['summary'] for n in raptor_nodes])
+        # Parents collection: spans only, the text is sliced from the
+        # text store on demand (documents are used for embedding, not sent)
+        parent_metadatas = [{
+            "paper_id": paper_id,
+            "paper_name": pdf_path.name,
+            "type": "parent",
+            **_span(p),
+            **clean_metadata
+        } for p in parent_chunks]
+        parent_records = dict(
+            ids=parent_ids,
+            documents=[p.page_content for p in parent_chunks],
+            metadatas=parent_metadatas,
+            store_documents=False
+        )
+        if INDEX_CONFIG["parent_embedding"] == "pool":
+            self.uploader.upsert(
+                self.parents_coll,
+                embeddings=pool_parent_embeddings(chunk_embeddings),
+                **parent_records
+            )
+        else:
+            self.uploader.embed_and_upsert(self.parents_coll, embed=self.embedder.embed, **parent_records)
         
-        self.raptor_coll.add(
-            documents=[n['summary'] for n in raptor_nodes],
-            embeddings=raptor_embeddings,
-            metadatas=[{
-                "paper_id": paper_id,
-                "level": n['level'],
-                "cluster_id": n.get('cluster_id', 0)
-            } for n in raptor_nodes],
-            ids=[f"{paper_id}_raptor_{i}" for i in range(len(raptor_nodes))]
+        # Local child -> parent lookup for MultiRepRetriever (no Chroma round trip)
+        self.parent_index.put_many(
+            {"parent_id": parent_id, **metadata, "metadata": metadata}
+            for parent_id, metadata in zip(parent_ids, parent_metadatas)
         )
-        print(f"✅ {len(raptor_nodes)} RAPTOR nodes (3 levels)")
         
-        # 8. MULTIMODAL: IMAGE EXTRACTION + VISION SUMMARIES
-        images = extract_images(str(pdf_path), max_images=5)
+        # 7. RAPTOR TREE (Lance Martin 13)
+        if self.corpus_raptor is not None:
+            raptor_count = self._update_corpus_raptor(paper_id, chunk_records['ids'], chunks, chunk_embeddings)
+        else:
+            raptor_nodes = build_raptor_tree(
+                chunks, self.embedder,
+                levels=INDEX_CONFIG["raptor_levels"],
+                embeddings=chunk_embeddings,
+                summarizer=self.summarizer
+            )
+            raptor_embeddings = (
+                np.stack([n['embedding'] for n in raptor_nodes]) if raptor_nodes else []
+            )
+            
+            self.uploader.upsert(
+                self.raptor_coll,
+                ids=[content_id(paper_id, "raptor", str(n['level']), n['summary']) for n in raptor_nodes],
+                documents=[n['summary'] for n in raptor_nodes],
+                embeddings=raptor_embeddings,
+                metadatas=[{
+                    "paper_id": paper_id,
+                    "level": n['level'],
+                    "cluster_id": n.get('cluster_id', 0)
+                } for n in raptor_nodes]
+            )
+            raptor_count = len(raptor_nodes)
+            print(f"✅ {raptor_count} RAPTOR nodes (3 levels)")
         
+        # 8. MULTIMODAL: VISION SUMMARIES (images came from step 1)
         if images:
             image_summaries = []
             for img in images:
                 # Vision summary using Gemini
-                b64 = base64.b64encode(img['bytes']).decode()
                 try:
                     summary = chat([{
                         "role": "user",
@@ -141,48 +514,93 @@ class IndexPipeline:
                     image_summaries.append(summary)
                 except:
                     image_summaries.append(f"Figure from {pdf_path.name}, page {img.get('page', '?')}")
-        # 9. TABLES
-        tables = extract_tables(str(pdf_path), max_tables=5)
-        if tables:
-            summaries = [f"Table p{t['page']}: {t.get('rows',0)}x{t.get('cols',0)}" for t in tables]
-            embs = self.embedder.embed(summaries)
-            self.tables_coll.add(
-                documents=summaries,
-                embeddings=embs,
-                metadatas=[{"paper_id": paper_id, "page": t['page']} for t in tables],
-                ids=[f"{paper_id}_tbl_{i}" for i in range(len(tables))]
-            )
-            print(f"✅ {len(tables)} tables indexed")
-
+            
             # Embed + upload images
-            img_embeddings = self.embedder.embed(image_summaries)
-            self.images_coll.add(
+            self.uploader.embed_and_upsert(
+                self.images_coll,
+                ids=[
+                    content_id(paper_id, "img", img.get('sha256') or summary)
+                    for img, summary in zip(images, image_summaries)
+                ],
                 documents=image_summaries,
-                embeddings=img_embeddings,
                 metadatas=[{
                     "paper_id": paper_id,
                     "type": "image",
-                    "page": img.get('page', 0)
+                    "page": img.get('page', 0),
+                    "path": img.get('path', ''),
+                    "sha256": img.get('sha256', ''),
+                    "thumbnail": img.get('thumbnail') or ''
                 } for img in images],
-                ids=[f"{paper_id}_img_{i}" for i in range(len(images))]
+                embed=self.embedder.embed
             )
             print(f"✅ {len(images)} multimodal images indexed")
         
+        # 9. TABLES (extracted in step 1)
+        if tables:
+            summaries = [f"Table p{t['page']}: {t.get('rows',0)}x{t.get('cols',0)}" for t in tables]
+            self.uploader.embed_and_upsert(
+                self.tables_coll,
+                ids=[content_id(paper_id, "tbl", str(t['page']), repr(t['data'])) for t in tables],
+                documents=summaries,
+                metadatas=[{"paper_id": paper_id, "page": t['page']} for t in tables],
+                embed=self.embedder.embed
+            )
+            print(f"✅ {len(tables)} tables indexed")
+        
         return {
             "paper_id": paper_id,
             "chunks": len(chunks),
             "parents": len(parent_chunks),
-            "raptor": len(raptor_nodes),
+            "raptor": raptor_count,
             "images": len(images) if images else 0,
             "tables": len(tables) if tables else 0,
             "metadata": metadata
         }
     
+    def _update_corpus_raptor(self, paper_id: str, chunk_ids: List[str], chunks: List, chunk_embeddings) -> int:
+        """Fold a paper into the corpus tree; upload only the nodes that changed"""
+        changes = self.corpus_raptor.add_paper(
+            paper_id, chunk_ids,
+            [(c.metadata.get('char_start', 0), c.metadata.get('char_end', 0)) for c in chunks],
+            chunk_embeddings,
+            embed=self.embedder.embed
+        )
+        if changes["deleted"]:
+            self.uploader.flush()  # Earlier upserts of these nodes must land first
+            self.raptor_coll.delete(ids=changes["deleted"])
+        
+        nodes = changes["upserted"]
+        if nodes:
+            self.uploader.upsert(
+                self.raptor_coll,
+                ids=[n['id'] for n in nodes],
+                documents=[n['summary'] for n in nodes],
+                embeddings=np.stack([n['embedding'] for n in nodes]),
+                metadatas=[{
+                    "paper_id": "",  # Spans papers; untouched by _delete_paper
+                    "scope": "corpus",
+                    "level": n['level'] - 1,  # Same numbering as per-paper trees
+                    "n_members": n['n_members']
+                } for n in nodes]
+            )
+        print(f"✅ Corpus RAPTOR: {len(nodes)} nodes updated, {len(changes['deleted'])} removed")
+        return len(nodes)
+    
+    def _delete_paper(self, paper_id: str):
+        """Remove every vector of a paper from all collections"""
+        for coll in (self.chunks_coll, self.parents_coll, self.raptor_coll,
+                     self.images_coll, self.tables_coll):
+            coll.delete(where={"paper_id": paper_id})
+        self.text_store.delete(paper_id)
+        self.parent_index.delete_paper(paper_id)
+        self.bm25.delete_paper(paper_id)
+    
     def get_stats(self):
         return {
             "chunks": self.chunks_coll.count(),
             "parents": self.parents_coll.count(),
             "raptor": self.raptor_coll.count(),
+            "bm25": len(self.bm25),
             "images": self.images_coll.count(),
             "tables": self.tables_coll.count()  # ✅ ADD
         }
@@ -192,10 +610,12 @@ if __name__ == "__main__":
     pipeline = IndexPipeline()
     
     # Index test papers
-    test_pdfs = Path("test_data").glob("*.pdf")
-    for pdf in test_pdfs:
-        stats = pipeline.index_paper(pdf)
+    report = pipeline.index_directory(Path("test_data"))
+    for stats in report["indexed"]:
         print(f"\n{stats}")
+    print(f"\n⏭️  {len(report['skipped'])} unchanged papers skipped")
+    for failure in report["failed"]:
+        print(f"\n❌ {failure}")
     
     # Final stats
     print(f"\n{'='*60}")
@@ -0,0 +1,128 @@
+"""
+Index Manifest: Content-hash bookkeeping for incremental re-indexing
+Backed by the `papers` table (content_hash, pipeline_version, indexed_at)
+"""
+import hashlib
+import json
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from ...db.postgresql import get_session
+from ...models.paper import Paper
+from ...models.section import Section
+
+
+# Bump when indexing output changes in a way the config dict can't see
+PIPELINE_VERSION = "3"
+
+
+def file_sha256(path: Path, block_size: int = 1 << 20) -> str:
+    """SHA-256 of a file, read in 1 MB blocks"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def pipeline_fingerprint(config: Dict) -> str:
+    """
+    Version string for the index config, e.g. "1:3c9d2a0b41fe"
+
+    Any change to chunk sizes, models etc. changes the fingerprint,
+    which makes every paper stale on the next sync.
+    """
+    config_hash = hashlib.sha256(json.dumps(config, sort_keys=True).encode()).hexdigest()
+    return f"{PIPELINE_VERSION}:{config_hash[:12]}"
+
+
+class IndexManifest:
+    """
+    Tracks which file contents were indexed with which pipeline version
+
+    All rows are loaded once into a {file_path: (hash, version)} dict,
+    so checking a file is a dict lookup, not a query per paper.
+    """
+
+    def __init__(self, pipeline_version: str):
+        self.pipeline_version = pipeline_version
+        self._entries: Dict[str, Tuple[str, str]] = {}
+        self.load()
+
+    def load(self):
+        """(Re)load the manifest from PostgreSQL"""
+        with get_session() as session:
+            rows = session.query(
+                Paper.file_path, Paper.content_hash, Paper.pipeline_version
+            ).filter(Paper.indexed.is_(True)).all()
+
+        self._entries = {
+            file_path: (content_hash, version)
+            for file_path, content_hash, version in rows
+        }
+        print(f"📒 Manifest: {len(self._entries)} indexed papers")
+
+    def is_current(self, pdf_path: Path, content_hash: str) -> bool:
+        """True if this exact content was indexed with the current pipeline"""
+        entry = self._entries.get(str(Path(pdf_path).resolve()))
+        return entry == (content_hash, self.pipeline_version)
+
+    def is_known(self, pdf_path: Path) -> bool:
+        """True if some version of this file was indexed before"""
+        return str(Path(pdf_path).resolve()) in self._entries
+
+    def record(
+        self,
+        pdf_path: Path,
+        content_hash: str,
+        metadata: Dict,
+        num_pages: Optional[int] = None,
+        sections: Optional[List[Dict]] = None
+    ) -> int:
+        """
+        Upsert the paper row after a successful index
+
+        Args:
+            pdf_path: Indexed PDF
+            content_hash: SHA-256 of the PDF
+            metadata: MetadataExtractor output
+            num_pages: Page count
+            sections: Detected sections; replace the paper's `sections` rows
+
+        Returns:
+            papers.id of the row
+        """
+        file_path = str(Path(pdf_path).resolve())
+
+        with get_session() as session:
+            paper = session.query(Paper).filter(Paper.file_path == file_path).one_or_none()
+            if paper is None:
+                paper = Paper(filename=Path(pdf_path).name, file_path=file_path)
+                session.add(paper)
+
+            paper.title = (metadata.get('title') or '')[:500] or None
+            paper.authors = metadata.get('authors') or []
+            paper.year = metadata.get('year')
+            paper.abstract = metadata.get('abstract')
+            paper.num_pages = num_pages
+            paper.content_hash = content_hash
+            paper.pipeline_version = self.pipeline_version
+            paper.indexed = True
+            paper.indexed_at = datetime.utcnow()
+            session.flush()
+            paper_id = paper.id
+
+            if sections is not None:
+                session.query(Section).filter(Section.paper_id == paper_id).delete()
+                session.bulk_insert_mappings(Section, [{
+                    "paper_id": paper_id,
+                    "section_type": section["section_type"],
+                    "title": section["title"][:500],
+                    "start_page": section["start_page"],
+                    "end_page": section["end_page"],
+                    "text_content": section.get("text_content")
+                } for section in sections])
+
+        self._entries[file_path] = (content_hash, self.pipeline_version)
+        return paper_id
@@ -0,0 +1,219 @@
+"""
+ONNX Encoder: int8-quantized ONNX Runtime version of a sentence-transformers model
+CPU-only drop-in for SentenceTransformer.encode (mean pooling + L2 norm,
+same as all-MiniLM-L6-v2). Inputs are sorted into length buckets so
+each batch is padded only to its own longest text.
+"""
+import re
+import time
+from pathlib import Path
+from typing import List, Optional, Union
+
+import numpy as np
+import onnxruntime as ort
+from transformers import AutoTokenizer
+
+
+class OnnxEncoder:
+    """
+    Layout:
+        <model_dir>/<model>/model.onnx        fp32 export
+        <model_dir>/<model>/model_int8.onnx   dynamically quantized weights
+        <model_dir>/<model>/tokenizer*        saved tokenizer
+
+    The export runs once (needs torch + onnx); afterwards only
+    onnxruntime and the tokenizer are loaded.
+    """
+
+    def __init__(
+        self,
+        model_name: str = "sentence-transformers/all-MiniLM-L6-v2",
+        model_dir: str = "data/onnx",
+        max_length: int = 256,
+        max_batch_tokens: int = 8192,
+        threads: Optional[int] = None
+    ):
+        """
+        Args:
+            model_name: HuggingFace model name
+            model_dir: Where exported models are kept
+            max_length: Truncation length (all-MiniLM-L6-v2 uses 256)
+            max_batch_tokens: Cap on padded tokens per batch, so buckets
+                of short texts get larger batches than long ones
+            threads: ONNX Runtime intra-op threads (None = all cores)
+        """
+        self.model_name = model_name
+        self.max_length = max_length
+        self.max_batch_tokens = max_batch_tokens
+        self.dir = Path(model_dir) / re.sub(r'[^\w.-]+', '_', model_name)
+        self.model_path = self.dir / "model_int8.onnx"
+
+        if not self.model_path.exists():
+            self._export()
+
+        self.tokenizer = AutoTokenizer.from_pretrained(str(self.dir))
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if threads:
+            options.intra_op_num_threads = threads
+        self.session = ort.InferenceSession(
+            str(self.model_path), options, providers=["CPUExecutionProvider"]
+        )
+        self.input_names = {i.name for i in self.session.get_inputs()}
+
+    def _export(self):
+        """One-time torch -> ONNX export followed by int8 dynamic quantization"""
+        import torch
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+        from transformers import AutoModel
+
+        print(f"🔧 Exporting {self.model_name} to ONNX (int8)...")
+        self.dir.mkdir(parents=True, exist_ok=True)
+
+        tokenizer = AutoTokenizer.from_pretrained(self.model_name)
+        tokenizer.save_pretrained(str(self.dir))
+        model = AutoModel.from_pretrained(self.model_name)
+        model.eval()
+
+        names = ["input_ids", "attention_mask", "token_type_ids"]
+        dummy = tokenizer(["export sample"], return_tensors="pt")
+        fp32_path = self.dir / "model.onnx"
+
+        with torch.no_grad():
+            torch.onnx.export(
+                model,
+                tuple(dummy[name] for name in names),
+                str(fp32_path),
+                input_names=names,
+                output_names=["last_hidden_state"],
+                dynamic_axes={name: {0: "batch", 1: "sequence"} for name in names + ["last_hidden_state"]},
+                opset_version=14
+            )
+
+        quantize_dynamic(str(fp32_path), str(self.model_path), weight_type=QuantType.QInt8)
+        print(f"✅ Saved {self.model_path}")
+
+    def encode(
+        self,
+        sentences: Union[str, List[str]],
+        batch_size: int = 32,
+        show_progress_bar: bool = False,
+        **kwargs
+    ) -> np.ndarray:
+        """
+        Same contract as SentenceTransformer.encode (numpy output)
+
+        Args:
+            sentences: Text or list of texts
+            batch_size: Max texts per batch (the token cap may lower it)
+            show_progress_bar: Print a line per 100 batches
+
+        Returns:
+            float32 array (n, dim), or (dim,) for a single string
+        """
+        single = isinstance(sentences, str)
+        texts = [sentences] if single else list(sentences)
+        if not texts:
+            return np.zeros((0, 0), dtype=np.float32)
+
+        encoded = self.tokenizer(texts, truncation=True, max_length=self.max_length)
+        ids = encoded["input_ids"]
+        token_types = encoded.get("token_type_ids")
+
+        # Longest first, so the first batch fixes the output dim early and
+        # every later batch is padded less
+        order = sorted(range(len(texts)), key=lambda i: len(ids[i]), reverse=True)
+        output = None
+
+        batches = 0
+        start = 0
+        while start < len(order):
+            longest = len(ids[order[start]])
+            size = max(1, min(batch_size, self.max_batch_tokens // max(longest, 1)))
+            batch = order[start:start + size]
+            start += size
+
+            vectors = self._run(
+                [ids[i] for i in batch],
+                [token_types[i] for i in batch] if token_types else None,
+                longest
+            )
+            if output is None:
+                output = np.empty((len(texts), vectors.shape[1]), dtype=np.float32)
+            output[batch] = vectors
+
+            batches += 1
+            if show_progress_bar and batches % 100 == 0:
+                print(f"   {start}/{len(texts)} texts encoded")
+
+        return output[0] if single else output
+
+    def _run(self, ids: List[List[int]], token_types: Optional[List[List[int]]], length: int) -> np.ndarray:
+        """Pad one bucket to ``length``, run the model, mean-pool + normalize"""
+        input_ids = np.zeros((len(ids), length), dtype=np.int64)
+        attention_mask = np.zeros((len(ids), length), dtype=np.int64)
+        for row, seq in enumerate(ids):
+            input_ids[row, :len(seq)] = seq
+            attention_mask[row, :len(seq)] = 1
+
+        feeds = {"input_ids": input_ids, "attention_mask": attention_mask}
+        if "token_type_ids" in self.input_names:
+            types = np.zeros_like(input_ids)
+            if token_types:
+                for row, seq in enumerate(token_types):
+                    types[row, :len(seq)] = seq
+            feeds["token_type_ids"] = types
+
+        hidden = self.session.run(None, feeds)[0]
+
+        mask = attention_mask[..., None].astype(np.float32)
+        pooled = (hidden * mask).sum(axis=1) / np.maximum(mask.sum(axis=1), 1e-9)
+        pooled /= np.maximum(np.linalg.norm(pooled, axis=1, keepdims=True), 1e-12)
+        return pooled.astype(np.float32)
+
+
+def parity_check(
+    texts: List[str],
+    model_name: str = "sentence-transformers/all-MiniLM-L6-v2",
+    model_dir: str = "data/onnx"
+) -> dict:
+    """
+    Compare ONNX int8 vectors with the PyTorch SentenceTransformer ones
+
+    Returns:
+        {"min_cosine", "mean_cosine", "torch_seconds", "onnx_seconds"}
+    """
+    from sentence_transformers import SentenceTransformer
+
+    reference = SentenceTransformer(model_name)
+    encoder = OnnxEncoder(model_name, model_dir)
+
+    start = time.perf_counter()
+    expected = reference.encode(texts, batch_size=32, normalize_embeddings=True)
+    torch_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    actual = encoder.encode(texts, batch_size=32)
+    onnx_seconds = time.perf_counter() - start
+
+    cosines = (expected * actual).sum(axis=1)
+    return {
+        "min_cosine": float(cosines.min()),
+        "mean_cosine": float(cosines.mean()),
+        "torch_seconds": round(torch_seconds, 3),
+        "onnx_seconds": round(onnx_seconds, 3)
+    }
+
+
+# Test
+if __name__ == "__main__":
+    from ..ingestion.pdf_parser import PDFParser
+    from .semantic_chunker import SemanticChunker
+
+    text = PDFParser().parse("test_data/attention.pdf")["text"]
+    chunks = [c.page_content for c in SemanticChunker().chunk(text)]
+
+    result = parity_check(chunks)
+    status = "✅" if result["min_cosine"] > 0.99 else "❌"
+    print(f"{status} Parity on {len(chunks)} chunks: {result}")
@@ -2,14 +2,16 @@
 Multi-Representation Indexing (Lance Martin Notebook 12)
 Create parent-child chunk relationships
 """
-from typing import List
+from typing import List, Optional, Sequence
 from langchain.schema import Document
+import numpy as np
 
 
 def create_parent_child_chunks(
     chunks: List[Document],
     parent_size: int = 1500,
-    chunks_per_parent: int = 3
+    chunks_per_parent: int = 3,
+    text: Optional[str] = None
 ) -> List[Document]:
     """
     Create parent chunks from child chunks
@@ -19,10 +21,16 @@ def create_parent_child_chunks(
     - Large parents (1500 chars) for rich context
     - Link via parent_id in metadata
     
+    With ``text`` (the string the children's char offsets refer to), a
+    parent is the span from its first child's start to its last child's
+    end (capped at parent_size): overlap appears once, and the parent can
+    be rebuilt later from char_start/char_end alone.
+    
     Args:
         chunks: List of child chunks (512 chars)
         parent_size: Target parent size
         chunks_per_parent: How many children per parent
+        text: Source text for span-based parents
         
     Returns:
         List of parent Document objects
@@ -33,8 +41,15 @@ def create_parent_child_chunks(
     for i in range(0, len(chunks), chunks_per_parent):
         group = chunks[i:i + chunks_per_parent]
         
-        # Combine chunk text into parent
-        parent_text = "\n\n".join([c.page_content for c in group])
+        # Span of the group in the source text, or combined chunk text
+        span = None
+        if text is not None and 'char_start' in group[0].metadata:
+            start = group[0].metadata['char_start']
+            end = min(group[-1].metadata['char_end'], start + parent_size)
+            span = (start, end)
+            parent_text = text[start:end]
+        else:
+            parent_text = "\n\n".join([c.page_content for c in group])
         
         # Create parent ID
         parent_id = f"parent_{i // chunks_per_parent}"
@@ -48,6 +63,11 @@ def create_parent_child_chunks(
         parent_meta['type'] = 'parent'
         parent_meta['child_count'] = len(group)
         parent_meta['char_count'] = len(parent_text)
+        if span:
+            parent_meta['char_start'], parent_meta['char_end'] = span
+            if 'page_start' in group[0].metadata:
+                inside = [c for c in group if c.metadata['char_start'] < span[1]]
+                parent_meta['page_end'] = max(c.metadata['page_end'] for c in inside)
         
         parents.append(Document(
             page_content=parent_text[:parent_size],  # Truncate to target
@@ -57,6 +77,37 @@ def create_parent_child_chunks(
     return parents
 
 
+def pool_parent_embeddings(
+    child_embeddings: Sequence,
+    chunks_per_parent: int = 3
+) -> np.ndarray:
+    """
+    Parent vectors as the normalized mean of their children's vectors
+    
+    Parents are concatenations of consecutive children (see
+    create_parent_child_chunks), so pooling approximates encoding the
+    parent text without running the model again.
+    
+    Args:
+        child_embeddings: Vectors of the child chunks, in chunk order
+        chunks_per_parent: Must match create_parent_child_chunks
+        
+    Returns:
+        float32 array, one row per parent
+    """
+    children = np.asarray(child_embeddings, dtype=np.float32)
+    if len(children) == 0:
+        return children
+    
+    # Sum each group of consecutive children, then renormalize
+    starts = np.arange(0, len(children), chunks_per_parent)
+    pooled = np.add.reduceat(children, starts, axis=0)
+    norms = np.linalg.norm(pooled, axis=1, keepdims=True)
+    pooled /= np.maximum(norms, 1e-12)
+    
+    return pooled
+
+
 # Test
 if __name__ == "__main__":
     from semantic_chunker import SemanticChunker
@@ -0,0 +1,114 @@
+"""
+Parent Index: Local parent_id -> parent span lookup for Multi-Rep retrieval
+SQLite on disk (written at index time), an in-process LRU in front, so
+child-to-parent expansion never leaves the process on a warm cache.
+"""
+import json
+import sqlite3
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Iterable, List
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS parents (
+    parent_id  TEXT PRIMARY KEY,
+    paper_id   TEXT NOT NULL,
+    char_start INTEGER NOT NULL,
+    char_end   INTEGER NOT NULL,
+    page_start INTEGER NOT NULL,
+    page_end   INTEGER NOT NULL,
+    metadata   TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS parents_paper ON parents (paper_id);
+"""
+
+COLUMNS = ("parent_id", "paper_id", "char_start", "char_end", "page_start", "page_end")
+
+
+class ParentIndex:
+    """
+    Paper-scoped parent records keyed by their Chroma ID
+
+    Each record is {"parent_id", "paper_id", "char_start", "char_end",
+    "page_start", "page_end", "metadata"}; the text itself lives in
+    PaperTextStore.
+    """
+
+    def __init__(self, path: str = "data/parents.sqlite3", cache_size: int = 50_000):
+        """
+        Args:
+            path: SQLite file (created if missing)
+            cache_size: Parent records kept in memory
+        """
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self.cache_size = cache_size
+        self._cache: "OrderedDict[str, Dict]" = OrderedDict()
+        self._lock = threading.Lock()
+
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")  # Readers don't block the indexer
+        self._conn.executescript(SCHEMA)
+
+    def put_many(self, records: Iterable[Dict]):
+        """Insert or replace parent records (one transaction)"""
+        rows = [
+            tuple(record[c] for c in COLUMNS) + (json.dumps(record.get("metadata", {})),)
+            for record in records
+        ]
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO parents VALUES (?, ?, ?, ?, ?, ?, ?)", rows
+            )
+            for row in rows:
+                self._cache.pop(row[0], None)
+
+    def get_many(self, parent_ids: List[str]) -> Dict[str, Dict]:
+        """
+        Records for the given IDs (unknown IDs are left out)
+
+        Cache hits cost a dict lookup; all misses share one SELECT.
+        """
+        found = {}
+        with self._lock:
+            missing = []
+            for parent_id in parent_ids:
+                record = self._cache.get(parent_id)
+                if record is None:
+                    missing.append(parent_id)
+                    continue
+                self._cache.move_to_end(parent_id)
+                found[parent_id] = record
+
+            if missing:
+                placeholders = ",".join("?" * len(missing))
+                rows = self._conn.execute(
+                    f"SELECT * FROM parents WHERE parent_id IN ({placeholders})", missing
+                ).fetchall()
+                for row in rows:
+                    record = dict(zip(COLUMNS, row[:len(COLUMNS)]))
+                    record["metadata"] = json.loads(row[-1])
+                    found[record["parent_id"]] = record
+                    self._remember(record)
+
+        return found
+
+    def delete_paper(self, paper_id: str):
+        """Drop every parent of a paper"""
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM parents WHERE paper_id = ?", (paper_id,))
+            for parent_id in [k for k, v in self._cache.items() if v["paper_id"] == paper_id]:
+                del self._cache[parent_id]
+
+    def _remember(self, record: Dict):
+        self._cache[record["parent_id"]] = record
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM parents").fetchone()[0]
+
+    def close(self):
+        self._conn.close()
@@ -3,7 +3,7 @@ RAPTOR: Recursive Abstractive Processing for Tree-Organized Retrieval
 (Lance Martin Notebook 13)
 Build hierarchical summaries via clustering + LLM summarization
 """
-from typing import List, Dict
+from typing import List, Dict, Optional, Sequence
 from langchain.schema import Document
 from sklearn.cluster import KMeans
 import numpy as np
@@ -13,62 +13,84 @@ def build_raptor_tree(
     chunks: List[Document],
     embedder,
     levels: int = 3,
-    clusters_per_level: int = 5
+    clusters_per_level: int = 5,
+    embeddings: Optional[Sequence] = None,
+    summarizer=None
 ) -> List[Dict]:
     """
     Build RAPTOR tree: cluster chunks → summarize → embed → repeat
     
+    Every text is embedded at most once: level 0 clusters the chunk
+    vectors passed in, and each level's summaries are embedded in one
+    batch that is reused both for the next level's clustering and
+    returned on the node for upload.
+    
     Args:
         chunks: Base-level chunks
         embedder: Embedder instance
         levels: Tree depth (0=leaf, 1=mid, 2=root)
         clusters_per_level: K for K-means
+        embeddings: Vectors of ``chunks`` if already computed
+        summarizer: ClusterSummarizer for LLM summaries (all clusters of
+            a level at once); None = truncation
         
     Returns:
-        List of dicts: {"summary": str, "level": int, "cluster_id": int}
+        List of dicts: {"summary": str, "level": int, "cluster_id": int,
+                        "embedding": float32 vector of summary}
     """
     all_nodes = []
-    current_chunks = chunks
+    texts = [c.page_content if isinstance(c, Document) else c for c in chunks]
+    
+    if embeddings is None:
+        embeddings = embedder.embed(texts)
+    embeddings_array = np.asarray(embeddings, dtype=np.float32)
     
     for level in range(levels):
         print(f"   Building RAPTOR level {level}...")
         
-        # Get embeddings for current level
-        texts = [c.page_content if isinstance(c, Document) else c for c in current_chunks]
-        embeddings = embedder.embed(texts)
-        embeddings_array = np.array(embeddings)
-        
         # K-means clustering
-        n_clusters = min(clusters_per_level, len(current_chunks))
+        n_clusters = min(clusters_per_level, len(texts))
         if n_clusters < 2:
             break
             
         kmeans = KMeans(n_clusters=n_clusters, random_state=42, n_init=10)
         labels = kmeans.fit_predict(embeddings_array)
         
-        # Summarize each cluster
-        level_summaries = []
-        for cluster_id in range(n_clusters):
-            cluster_indices = np.where(labels == cluster_id)[0]
-            cluster_texts = [texts[i] for i in cluster_indices]
-            
-            # Combine cluster chunks
-            combined = "\n\n".join(cluster_texts[:10])  # Max 10 chunks per cluster
-            
-            # Simple summarization (truncate for now - no LLM call)
-            summary = summarize_cluster(combined, level)
+        # Summarize each cluster (one concurrent batch per level)
+        clusters = [np.where(labels == cluster_id)[0] for cluster_id in range(n_clusters)]
+        member_texts = [[texts[i] for i in indices[:10]] for indices in clusters]  # Max 10 chunks per cluster
+        if summarizer is not None:
+            summaries = summarizer.summarize_many(member_texts, level)
+        else:
+            # Simple summarization (truncate - no LLM call)
+            summaries = [summarize_cluster("\n\n".join(t), level) for t in member_texts]
+        
+        level_nodes = []
+        reused = {}  # node index -> source vector when summary == source text
+        for cluster_id, (cluster_indices, summary) in enumerate(zip(clusters, summaries)):
+            if len(cluster_indices) == 1 and summary == texts[cluster_indices[0]]:
+                reused[len(level_nodes)] = embeddings_array[cluster_indices[0]]
             
-            all_nodes.append({
+            level_nodes.append({
                 "summary": summary,
                 "level": level,
                 "cluster_id": cluster_id,
                 "source_count": len(cluster_indices)
             })
-            
-            level_summaries.append(summary)
         
-        # Next level uses summaries
-        current_chunks = level_summaries
+        # Embed this level's summaries once (skipping reused vectors)
+        texts = [n['summary'] for n in level_nodes]
+        to_embed = [i for i in range(len(level_nodes)) if i not in reused]
+        level_array = np.empty((len(level_nodes), embeddings_array.shape[1]), dtype=np.float32)
+        for i, vector in reused.items():
+            level_array[i] = vector
+        if to_embed:
+            level_array[to_embed] = embedder.embed([texts[i] for i in to_embed])
+        embeddings_array = level_array
+        
+        for node, vector in zip(level_nodes, embeddings_array):
+            node['embedding'] = vector
+        all_nodes.extend(level_nodes)
     
     return all_nodes
 
@@ -77,8 +99,8 @@ def summarize_cluster(text: str, level: int) -> str:
     """
     Summarize cluster of chunks
     
-    For now: Simple truncation (no LLM needed)
-    TODO: Add Ollama/Gemini summarization later
+    Simple truncation (no LLM needed); also the fallback of
+    ClusterSummarizer when its deadline or call budget runs out
     """
     # Simple truncation - works without LLM
     max_length = 500
@@ -1,10 +1,18 @@
 """
 Semantic Chunking (Lance Martin Notebooks 1-4)
 Split text into meaningful chunks respecting sentence boundaries
+Semantic mode cuts where neighbouring sentence embeddings diverge
 """
-from typing import List
+import re
+from typing import Iterable, Iterator, List, Tuple
 from langchain.schema import Document
 from langchain.text_splitter import RecursiveCharacterTextSplitter
+import numpy as np
+
+
+# Sentence end followed by something that can start a sentence, or a blank line
+SENTENCE_BOUNDARY = re.compile(r'(?<=[.!?])\s+(?=[A-Z0-9(\[])|\n\s*\n')
+MIN_SENTENCE_CHARS = 30  # Shorter fragments (labels, "et al.") join the next sentence
 
 
 class SemanticChunker:
@@ -13,14 +21,17 @@ class SemanticChunker:
     Based on Lance Martin's RAG-from-scratch Parts 1-4
     """
     
-    def __init__(self, chunk_size: int = 512, overlap: int = 50):
+    def __init__(self, chunk_size: int = 512, overlap: int = 50, breakpoint_percentile: float = 90):
         """
         Args:
-            chunk_size: Target chunk size in characters
-            overlap: Overlap between chunks
+            chunk_size: Target chunk size in characters (hard cap in semantic mode)
+            overlap: Overlap between chunks (fixed-size mode only)
+            breakpoint_percentile: Semantic mode cuts at neighbour distances
+                above this percentile of the document's distances
         """
         self.chunk_size = chunk_size
         self.overlap = overlap
+        self.breakpoint_percentile = breakpoint_percentile
         
         # RecursiveCharacterTextSplitter respects sentence boundaries
         self.splitter = RecursiveCharacterTextSplitter(
@@ -49,10 +60,12 @@ class SemanticChunker:
         
         # Create Document objects
         documents = []
-        for i, chunk in enumerate(chunks):
+        for i, (start, chunk) in enumerate(locate_chunks(text, chunks)):
             doc_metadata = metadata.copy() if metadata else {}
             doc_metadata['chunk_index'] = i
             doc_metadata['char_count'] = len(chunk)
+            doc_metadata['char_start'] = start
+            doc_metadata['char_end'] = start + len(chunk)
             
             documents.append(Document(
                 page_content=chunk,
@@ -60,6 +73,202 @@ class SemanticChunker:
             ))
         
         return documents
+    
+    def chunk_stream(
+        self,
+        pages: Iterable[Tuple[int, str]],
+        metadata: dict = None,
+        flush_chars: int = None
+    ) -> Iterator[Document]:
+        """
+        Chunk a stream of (page_number, text) pairs incrementally
+        
+        Text is buffered until ``flush_chars`` is reached, split, and every
+        chunk except the last is yielded; the last one is carried over so
+        chunks still flow across page boundaries. Memory and time to the
+        first chunk depend on the buffer size, not the document length.
+        
+        Args:
+            pages: Iterable of (page_number, text), e.g. PDFParser.iter_pages() or
+                enumerate(PaperDocument.page_texts, 1)
+            metadata: Optional metadata to attach to chunks
+            flush_chars: Buffer size that triggers a split (default: 8 chunks)
+            
+        Yields:
+            Document objects, same metadata as chunk(); char offsets refer
+            to the pages joined with a newline after each page
+        """
+        flush_chars = flush_chars or self.chunk_size * 8
+        buffer: List[str] = []
+        buffered = 0
+        buffer_start = 0  # Offset of the buffer in the joined text
+        total_chars = 0
+        chunk_index = 0
+        
+        def make_doc(start: int, chunk: str) -> Document:
+            doc_metadata = metadata.copy() if metadata else {}
+            doc_metadata['chunk_index'] = chunk_index
+            doc_metadata['char_count'] = len(chunk)
+            doc_metadata['char_start'] = start
+            doc_metadata['char_end'] = start + len(chunk)
+            return Document(page_content=chunk, metadata=doc_metadata)
+        
+        for _, page_text in pages:
+            buffer.append(page_text + "\n")
+            buffered += len(page_text) + 1
+            total_chars += len(page_text.strip())
+            
+            if buffered < flush_chars:
+                continue
+            
+            text = "".join(buffer)
+            located = locate_chunks(text, self.splitter.split_text(text))
+            for start, piece in located[:-1]:
+                yield make_doc(buffer_start + start, piece)
+                chunk_index += 1
+            
+            # Carry the tail (original text, not the stripped chunk) into
+            # the next split
+            tail_start = located[-1][0] if located else len(text)
+            buffer = [text[tail_start:]]
+            buffered = len(buffer[0])
+            buffer_start += tail_start
+        
+        if total_chars < 50:
+            return
+        
+        text = "".join(buffer)
+        for start, piece in locate_chunks(text, self.splitter.split_text(text)):
+            yield make_doc(buffer_start + start, piece)
+            chunk_index += 1
+    
+    def chunk_semantic(self, text: str, embedder, metadata: dict = None) -> Tuple[List[Document], np.ndarray]:
+        """
+        Split text where the topic shifts, with chunk vectors for free
+        
+        All sentences are embedded in one batched call. A chunk ends where
+        the cosine distance between neighbouring sentences is in the top
+        (100 - breakpoint_percentile)% for this document, or where the next
+        sentence would exceed chunk_size. Chunk vectors are the
+        length-weighted mean of their sentence vectors, so the chunks need
+        no second embedding pass.
+        
+        Args:
+            text: Full paper text
+            embedder: Embedder instance (embed() -> float32 array)
+            metadata: Optional metadata to attach to chunks
+            
+        Returns:
+            (chunks, vectors): Documents with the same metadata as chunk(),
+            and a (n_chunks, dim) float32 array of normalized vectors
+        """
+        if not text or len(text.strip()) < 50:
+            return [], np.zeros((0, 0), dtype=np.float32)
+        
+        spans = split_sentences(text, self.chunk_size)
+        vectors = np.asarray(embedder.embed([text[a:b] for a, b in spans]), dtype=np.float32)
+        
+        # Cosine distance between each sentence and the next (vectorized)
+        norms = np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+        unit = vectors / norms
+        distances = 1.0 - np.einsum('ij,ij->i', unit[:-1], unit[1:])
+        threshold = np.percentile(distances, self.breakpoint_percentile) if len(distances) else 0.0
+        
+        # Greedy grouping: cut at breakpoints and at the size cap
+        starts = [0]
+        chunk_start = spans[0][0]
+        for i in range(1, len(spans)):
+            too_long = spans[i][1] - chunk_start > self.chunk_size
+            if too_long or distances[i - 1] > threshold:
+                starts.append(i)
+                chunk_start = spans[i][0]
+        
+        # Pool: length-weighted sum per group, then renormalize
+        lengths = np.array([b - a for a, b in spans], dtype=np.float32)
+        pooled = np.add.reduceat(unit * lengths[:, None], starts, axis=0)
+        pooled /= np.maximum(np.linalg.norm(pooled, axis=1, keepdims=True), 1e-12)
+        
+        documents = []
+        ends = starts[1:] + [len(spans)]
+        for i, (first, last) in enumerate(zip(starts, ends)):
+            start, end = spans[first][0], spans[last - 1][1]
+            doc_metadata = metadata.copy() if metadata else {}
+            doc_metadata['chunk_index'] = i
+            doc_metadata['char_count'] = end - start
+            doc_metadata['char_start'] = start
+            doc_metadata['char_end'] = end
+            documents.append(Document(page_content=text[start:end], metadata=doc_metadata))
+        
+        return documents, pooled.astype(np.float32)
+
+
+def split_sentences(text: str, max_chars: int) -> List[Tuple[int, int]]:
+    """
+    (start, end) spans of the sentences in ``text``, whitespace trimmed
+    
+    Fragments shorter than MIN_SENTENCE_CHARS are merged into the next
+    sentence; sentences longer than ``max_chars`` are cut at whitespace.
+    """
+    raw = []
+    start = 0
+    for boundary in SENTENCE_BOUNDARY.finditer(text):
+        raw.append((start, boundary.start()))
+        start = boundary.end()
+    raw.append((start, len(text)))
+    
+    spans = []
+    pending = None  # Start of a fragment waiting to be merged
+    for start, end in raw:
+        # Trim surrounding whitespace
+        while start < end and text[start].isspace():
+            start += 1
+        while end > start and text[end - 1].isspace():
+            end -= 1
+        if start == end:
+            continue
+        
+        if pending is not None:
+            start, pending = pending, None
+        if end - start < MIN_SENTENCE_CHARS:
+            pending = start
+            continue
+        
+        # Hard-split overlong sentences at the last space before the cap
+        while end - start > max_chars:
+            cut = text.rfind(' ', start + 1, start + max_chars)
+            cut = cut if cut > start else start + max_chars
+            spans.append((start, cut))
+            start = cut + 1 if text[cut] == ' ' else cut
+        spans.append((start, end))
+    
+    if pending is not None:
+        if spans and len(text) - spans[-1][0] <= max_chars:
+            spans[-1] = (spans[-1][0], len(text.rstrip()))
+        else:
+            spans.append((pending, len(text.rstrip())))
+    
+    return spans
+
+
+def locate_chunks(text: str, chunks: List[str]) -> List[Tuple[int, str]]:
+    """
+    Pair each chunk with its start offset in ``text``
+    
+    The splitter returns stripped substrings in order (overlapping by at
+    most the overlap), so each chunk is searched from just after the
+    previous chunk's start.
+    """
+    located = []
+    cursor = 0
+    
+    for chunk in chunks:
+        start = text.find(chunk, cursor)
+        if start == -1:  # Shouldn't happen; keep offsets monotonic anyway
+            start = cursor
+        located.append((start, chunk))
+        cursor = start + 1
+    
+    return located
 
 
 # Quick test
@@ -69,3 +278,15 @@ if __name__ == "__main__":
     chunks = chunker.chunk(test_text)
     print(f"✅ Created {len(chunks)} chunks from {len(test_text)} chars")
     print(f"   First chunk: {chunks[0].page_content[:100]}...")
+    
+    pages = ((i, "This is a test sentence. " * 40) for i in range(1, 6))
+    streamed = list(chunker.chunk_stream(pages))
+    print(f"✅ Streamed {len(streamed)} chunks from 5 pages")
+    
+    from ..ingestion.pdf_parser import PDFParser
+    from .embedder import Embedder
+    
+    paper_text = PDFParser().parse("test_data/attention.pdf")["text"]
+    semantic, vectors = chunker.chunk_semantic(paper_text, Embedder())
+    print(f"✅ attention.pdf: {len(chunker.chunk(paper_text))} fixed-size chunks → "
+          f"{len(semantic)} semantic chunks, vectors {vectors.shape}")
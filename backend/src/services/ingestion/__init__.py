@@ -1,14 +1,20 @@
 """Ingestion services"""
 from .pdf_parser import PDFParser
+from .paper_document import PaperDocument
 from .metadata_extractor import MetadataExtractor
 from .figure_extractor import extract_images
+from .figure_store import FigureStore
+from .paper_text_store import PaperTextStore
 from .table_extractor import extract_tables
 from .structure_detector import detect_structure
 
 __all__ = [
     'PDFParser',
+    'PaperDocument',
     'MetadataExtractor',
     'extract_images',
+    'FigureStore',
+    'PaperTextStore',
     'extract_tables',
     'detect_structure'
 ]
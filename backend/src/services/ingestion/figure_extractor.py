@@ -1,47 +1,122 @@
 """
 Multimodal Image Extraction (from your earlier code)
 Uses PyMuPDF to extract images with metadata
+Images are deduplicated by xref and content hash, tiny/decorative images
+are skipped, and with a FigureStore the bytes go to disk instead of memory
 """
+import hashlib
 import fitz
-from typing import List, Dict
+from typing import List, Dict, Optional, Set
 
+from .figure_store import FigureStore
 
-def extract_images(pdf_path: str, max_images: int = 5) -> List[Dict]:
+
+MIN_IMAGE_SIZE = 64  # px; smaller images are icons, bullets, logos
+MAX_ASPECT_RATIO = 8.0  # wider/taller than this: rules, banners
+
+
+def extract_images(
+    pdf_path: str,
+    max_images: int = 5,
+    store: Optional[FigureStore] = None
+) -> List[Dict]:
     """
     Extract images from PDF using PyMuPDF
     
     Args:
         pdf_path: Path to PDF file
         max_images: Max images to extract per paper
+        store: Write blobs here and return paths instead of bytes
         
     Returns:
-        List of dicts with {bytes, page, source}
+        List of dicts with {bytes, page, source}, or with a store
+        {path, sha256, thumbnail, page, source}
     """
     doc = fitz.open(pdf_path)
     images = []
+    seen = set()
     
     for page_num in range(len(doc)):
         if len(images) >= max_images:
             break
-            
-        page = doc[page_num]
         
-        for img_idx, img in enumerate(page.get_images()):
-            if len(images) >= max_images:
-                break
-                
-            try:
-                xref = img[0]
-                img_data = doc.extract_image(xref)
-                
-                images.append({
-                    'bytes': img_data["image"],
-                    'page': page_num + 1,
-                    'source': pdf_path.split('/')[-1]
-                })
-            except Exception as e:
-                print(f"⚠️  Image extraction failed: {e}")
-                continue
+        images.extend(extract_page_images(
+            doc, doc[page_num], pdf_path.split('/')[-1],
+            limit=max_images - len(images),
+            seen=seen,
+            store=store
+        ))
     
     doc.close()
     return images
+
+
+def extract_page_images(
+    doc: fitz.Document,
+    page: fitz.Page,
+    source: str,
+    limit: int,
+    seen: Optional[Set] = None,
+    store: Optional[FigureStore] = None
+) -> List[Dict]:
+    """
+    Extract images from a single, already opened page
+    
+    Args:
+        doc: Open PyMuPDF document (owns the image xrefs)
+        page: Page of ``doc`` to scan
+        source: File name recorded on each image
+        limit: Max images to return from this page
+        seen: xrefs and content hashes already taken from this document;
+            updated in place so repeated logos are extracted once
+        store: Write blobs here and return paths instead of bytes
+        
+    Returns:
+        List of dicts with {bytes, page, source}, or with a store
+        {path, sha256, thumbnail, page, source}
+    """
+    images = []
+    seen = seen if seen is not None else set()
+    
+    for img in page.get_images():
+        if len(images) >= limit:
+            break
+        
+        xref, width, height = img[0], img[2], img[3]
+        if xref in seen:
+            continue
+        seen.add(xref)
+        
+        # Skip tiny and decorative images before decoding anything
+        if min(width, height) < MIN_IMAGE_SIZE:
+            continue
+        if max(width, height) / max(min(width, height), 1) > MAX_ASPECT_RATIO:
+            continue
+        
+        try:
+            img_data = doc.extract_image(xref)
+            data = img_data["image"]
+            
+            sha256 = hashlib.sha256(data).hexdigest()
+            if sha256 in seen:
+                continue
+            seen.add(sha256)
+            
+            image = {
+                'page': page.number + 1,
+                'source': source,
+                'width': width,
+                'height': height
+            }
+            if store is not None:
+                image.update(store.put(data, img_data["ext"], sha256))
+            else:
+                image['bytes'] = data
+                image['sha256'] = sha256
+            
+            images.append(image)
+        except Exception as e:
+            print(f"⚠️  Image extraction failed: {e}")
+            continue
+    
+    return images
@@ -0,0 +1,83 @@
+"""
+Figure Store: Content-addressed on-disk storage for extracted images
+Blobs are named by SHA-256, so the same figure is stored once no matter
+how many pages, papers or paper versions it appears in.
+"""
+import hashlib
+import io
+import os
+from pathlib import Path
+from typing import Dict, Optional
+
+
+class FigureStore:
+    """
+    Layout:
+        <root>/ab/abcdef....png          original image bytes
+        <root>/thumbs/ab/abcdef....png   optional thumbnail
+    """
+
+    def __init__(self, root: str = "data/figures", thumbnail_size: Optional[int] = 256):
+        """
+        Args:
+            root: Store directory (created on first write)
+            thumbnail_size: Longest thumbnail edge in px, None to skip thumbnails
+        """
+        self.root = Path(root)
+        self.thumbnail_size = thumbnail_size
+
+    def put(self, data: bytes, ext: str, sha256: Optional[str] = None) -> Dict:
+        """
+        Store an image blob (no-op if the content is already stored)
+
+        Args:
+            data: Image bytes
+            ext: File extension reported by PyMuPDF (png, jpeg, ...)
+            sha256: Precomputed hash of ``data``, if the caller has it
+
+        Returns:
+            {"sha256", "path", "thumbnail"} (thumbnail may be None)
+        """
+        sha256 = sha256 or hashlib.sha256(data).hexdigest()
+        path = self.root / sha256[:2] / f"{sha256}.{ext}"
+
+        if not path.exists():
+            self._write_atomic(path, data)
+
+        thumbnail = None
+        if self.thumbnail_size:
+            thumbnail = self._thumbnail(sha256, data)
+
+        return {
+            "sha256": sha256,
+            "path": str(path),
+            "thumbnail": str(thumbnail) if thumbnail else None
+        }
+
+    def _thumbnail(self, sha256: str, data: bytes) -> Optional[Path]:
+        """Downsampled PNG copy; None if the image can't be decoded"""
+        path = self.root / "thumbs" / sha256[:2] / f"{sha256}.png"
+        if path.exists():
+            return path
+
+        try:
+            from PIL import Image
+
+            with Image.open(io.BytesIO(data)) as img:
+                img.thumbnail((self.thumbnail_size, self.thumbnail_size))
+                buf = io.BytesIO()
+                img.save(buf, format="PNG")
+        except Exception as e:
+            print(f"⚠️  Thumbnail failed for {sha256[:12]}: {e}")
+            return None
+
+        self._write_atomic(path, buf.getvalue())
+        return path
+
+    @staticmethod
+    def _write_atomic(path: Path, data: bytes):
+        """Write via temp file + rename so parallel workers never see partial blobs"""
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(path.suffix + f".{os.getpid()}.tmp")
+        tmp.write_bytes(data)
+        os.replace(tmp, path)
@@ -1,121 +1,220 @@
 """
 Academic PDF Metadata Extraction
 Skips license/copyright text properly
+All patterns are compiled once at import; authors, years and venues come
+out of a single scan over the header
 """
 import re
-from typing import Dict, List
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+
+LICENSE_BLOCK = 500  # chars skipped when the paper opens with a license notice
+HEADER_CHARS = 6000  # authors / year / venue are searched here
+ABSTRACT_CHARS = 10000  # abstract is searched here
+
+LICENSE_PATTERN = re.compile(r'permission|attribution|copyright|license', re.IGNORECASE)
+
+TITLE_SKIP_PATTERN = re.compile(
+    r'page|---|arxiv|preprint|draft|submitted|permission|attribution',
+    re.IGNORECASE
+)
+
+# False-positive "Firstname Lastname" matches
+AFFILIATION_PATTERN = re.compile(
+    r'Google Brain|Google Research|University|Department|Institute|Conference|Proceedings'
+)
+
+# Ordered by priority: the first venue (in this order) found in the header wins
+VENUES = {
+    'neurips': 'NeurIPS', 'nips': 'NeurIPS',
+    'icml': 'ICML', 'iclr': 'ICLR',
+    'cvpr': 'CVPR', 'iccv': 'ICCV',
+    'acl': 'ACL', 'emnlp': 'EMNLP',
+    'arxiv': 'arXiv', 'aaai': 'AAAI'
+}
+VENUE_PRIORITY = {key: rank for rank, key in enumerate(VENUES)}
+
+
+def _any_case(word: str) -> str:
+    """'acl' -> '[aA][cC][lL]' (much cheaper for re than a (?i:...) group)"""
+    return ''.join(f'[{c}{c.upper()}]' for c in word)
+
+
+# One multi-pattern matcher for the header scan. Every alternative starts
+# at a word boundary, so most positions are rejected by a single \b test.
+# Venues are therefore matched at the start of a word ("NeurIPS2017",
+# "arXiv:1706" still match; "oracle" no longer counts as ACL).
+HEADER_PATTERN = re.compile(
+    r'\b(?:'
+    r'(?P<author>[A-Z][a-z]{2,15}\s+[A-Z][a-z]{2,15}\b)'
+    r'|(?P<year>(?:199\d|20[0-2]\d)\b)'
+    r'|(?P<venue>' + '|'.join(_any_case(v) for v in sorted(VENUES, key=len, reverse=True)) + r')'
+    r')'
+)
+
+ABSTRACT_PATTERN = re.compile(
+    r'abstract[\s\n:]+(.{100,1000}?)(?:\n\s*\n|introduction|keywords)',
+    re.IGNORECASE | re.DOTALL
+)
+
+ABSTRACT_KEYWORD = re.compile(_any_case('abstract'))
+
+LINE_PATTERN = re.compile(r'[^\n]+')
 
 
 class MetadataExtractor:
     """Extract metadata from academic PDFs"""
-    
+
     def extract(self, text: str, filename: str) -> Dict:
         """Extract metadata (2s, 90% accurate)"""
-        
+
         # Remove first 500 chars if they contain license/permission keywords
-        if any(word in text[:500].lower() for word in ['permission', 'attribution', 'copyright', 'license']):
-            text = text[500:]  # Skip license block
-        
-        lines = [l.strip() for l in text.split('\n') if l.strip() and len(l.strip()) > 3]
-        
+        if LICENSE_PATTERN.search(text, 0, LICENSE_BLOCK):
+            text = text[LICENSE_BLOCK:LICENSE_BLOCK + ABSTRACT_CHARS]  # Skip license block
+        else:
+            text = text[:ABSTRACT_CHARS]
+
+        authors, year, venue = self._scan_header(text)
+
         return {
-            "title": self._extract_title(lines),
-            "authors": self._extract_authors(text),
-            "year": self._extract_year(text),
-            "venue": self._extract_venue(text),
+            "title": self._extract_title(text, filename),
+            "authors": authors,
+            "year": year,
+            "venue": venue,
             "keywords": [],
             "abstract": self._extract_abstract(text)
         }
-    
-    def _extract_title(self, lines: List[str]) -> str:
+
+    def extract_batch(
+        self,
+        texts: List[str],
+        filenames: List[str],
+        workers: int = 1,
+        chunksize: int = 64
+    ) -> List[Dict]:
+        """
+        Extract metadata for many papers
+
+        Only the first ~10k chars of each text are shipped to workers,
+        so the process pool pays almost nothing for pickling.
+
+        Args:
+            texts: Full paper texts
+            filenames: Matching file names (title fallback)
+            workers: Worker processes (1 = in-process)
+            chunksize: Papers per worker task
+
+        Returns:
+            Metadata dicts, in input order
+        """
+        jobs = [
+            (text[:LICENSE_BLOCK + ABSTRACT_CHARS], filename)
+            for text, filename in zip(texts, filenames)
+        ]
+
+        if workers <= 1:
+            return [self.extract(text, filename) for text, filename in jobs]
+
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            return list(pool.map(_extract_one, jobs, chunksize=chunksize))
+
+    def _scan_header(self, text: str) -> Tuple[List[str], Optional[int], Optional[str]]:
+        """Authors, year and venue from one pass over the header"""
+        authors = []
+        years = Counter()
+        venue_key = None
+
+        for match in HEADER_PATTERN.finditer(text, 0, HEADER_CHARS):
+            kind = match.lastgroup
+            value = match.group(kind)
+
+            if kind == 'author':
+                if len(authors) < 10 and value not in authors and not AFFILIATION_PATTERN.search(value):
+                    authors.append(value)
+            elif kind == 'year':
+                years[value] += 1
+            else:
+                key = value.lower()
+                if venue_key is None or VENUE_PRIORITY[key] < VENUE_PRIORITY[venue_key]:
+                    venue_key = key
+
+        year = int(years.most_common(1)[0][0]) if years else None
+        venue = VENUES[venue_key] if venue_key else None
+
+        return authors, year, venue
+
+    def _extract_title(self, text: str, filename: str) -> str:
         """Extract title from first meaningful line"""
-        skip_words = ['page', '---', 'arxiv', 'preprint', 'draft', 
-                      'submitted', 'permission', 'attribution']
-        
-        for line in lines[:30]:
+        meaningful = 0
+
+        for match in LINE_PATTERN.finditer(text):
+            line = match.group().strip()
+            if len(line) <= 3:
+                continue
+
+            meaningful += 1
+            if meaningful > 30:
+                break
+
             # Skip short lines
             if len(line) < 15:
                 continue
-            
+
             # Skip lines with skip words
-            if any(word in line.lower() for word in skip_words):
+            if TITLE_SKIP_PATTERN.search(line):
                 continue
-            
+
             # Skip all-caps headers
             if line.isupper() and len(line) > 25:
                 continue
-            
+
             # Skip URLs, emails
             if '@' in line or 'http' in line.lower():
                 continue
-            
+
             # Skip mostly non-alphabetic
             alpha_ratio = sum(c.isalpha() or c.isspace() for c in line) / len(line)
             if alpha_ratio < 0.7:
                 continue
-            
+
             # This is the title
             return ' '.join(line.split())[:200]
-        
+
         return filename.replace('.pdf', '').replace('_', ' ').title()
-    
-    def _extract_authors(self, text: str) -> List[str]:
-        """Extract author names"""
-        authors = []
-        
-        # Pattern: "Firstname Lastname" (Title Case)
-        pattern = r'\b[A-Z][a-z]{2,15}\s+[A-Z][a-z]{2,15}\b'
-        matches = re.findall(pattern, text[:6000])
-        
-        # Filter false positives
-        skip = ['Google Brain', 'Google Research', 'University', 'Department', 
-                'Institute', 'Conference', 'Proceedings']
-        
-        for match in matches:
-            if any(word in match for word in skip):
-                continue
-            if match not in authors:
-                authors.append(match)
-            if len(authors) >= 10:
-                break
-        
-        return authors[:10]
-    
-    def _extract_year(self, text: str) -> int:
-        """Extract publication year"""
-        years = re.findall(r'\b(199\d|20[0-2]\d)\b', text[:6000])
-        
-        if years:
-            from collections import Counter
-            return int(Counter(years).most_common(1)[0][0])
-        return None
-    
-    def _extract_venue(self, text: str) -> str:
-        """Extract conference/journal"""
-        venues = {
-            'neurips': 'NeurIPS', 'nips': 'NeurIPS',
-            'icml': 'ICML', 'iclr': 'ICLR',
-            'cvpr': 'CVPR', 'iccv': 'ICCV',
-            'acl': 'ACL', 'emnlp': 'EMNLP',
-            'arxiv': 'arXiv', 'aaai': 'AAAI'
-        }
-        
-        text_lower = text[:6000].lower()
-        for key, name in venues.items():
-            if key in text_lower:
-                return name
-        return None
-    
+
     def _extract_abstract(self, text: str) -> str:
         """Extract abstract section"""
-        match = re.search(
-            r'abstract[\s\n:]+(.{100,1000}?)(?:\n\s*\n|introduction|keywords)',
-            text[:10000],
-            re.IGNORECASE | re.DOTALL
-        )
-        
-        if match:
-            abstract = match.group(1).strip()
-            return ' '.join(abstract.split())[:600]
+        # Jump between occurrences of the keyword instead of letting the
+        # full pattern try every position
+        for keyword in ABSTRACT_KEYWORD.finditer(text, 0, ABSTRACT_CHARS):
+            match = ABSTRACT_PATTERN.match(text, keyword.start(), ABSTRACT_CHARS)
+            if match:
+                abstract = match.group(1).strip()
+                return ' '.join(abstract.split())[:600]
+
         return None
 
+
+_worker_extractor = MetadataExtractor()
+
+
+def _extract_one(job: Tuple[str, str]) -> Dict:
+    """Process-pool entry point for extract_batch"""
+    text, filename = job
+    return _worker_extractor.extract(text, filename)
+
+
+# Test
+if __name__ == "__main__":
+    import time
+    from .pdf_parser import PDFParser
+
+    text = PDFParser().parse("test_data/attention.pdf")["text"]
+    extractor = MetadataExtractor()
+    print(f"✅ {extractor.extract(text, 'attention.pdf')}")
+
+    start = time.perf_counter()
+    extractor.extract_batch([text] * 10000, ["attention.pdf"] * 10000, workers=4)
+    print(f"⏱️  10k papers in {time.perf_counter() - start:.1f}s")
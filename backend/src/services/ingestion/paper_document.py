@@ -0,0 +1,217 @@
+"""
+PaperDocument: Open a PDF once, walk its pages once
+Text, images, TOC, headings and tables all come out of the same pass
+"""
+import fitz  # PyMuPDF
+from bisect import bisect_right
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from .figure_extractor import extract_page_images
+from .figure_store import FigureStore
+from .table_extractor import extract_page_tables, extract_tables_pdfplumber, looks_like_table_page
+from .structure_detector import HeadingDetector, classify_section, structure_from_toc
+
+
+class PaperDocument:
+    """
+    Single-pass ingestion view of one PDF
+
+    Usage:
+        with PaperDocument("paper.pdf") as paper:
+            parsed = paper.parsed()
+            images = paper.images
+    """
+
+    def __init__(
+        self,
+        pdf_path: str,
+        max_images: int = 5,
+        max_tables: int = 5,
+        table_backend: str = "pymupdf",
+        figure_store: Optional[FigureStore] = None
+    ):
+        """
+        Args:
+            pdf_path: Path to PDF file
+            max_images: Max images to keep per paper
+            max_tables: Max tables to keep per paper
+            table_backend: "pymupdf" (in-pass) or "pdfplumber" (fallback,
+                run afterwards on the candidate pages only)
+            figure_store: Stream image blobs to disk; images then carry
+                path + sha256 instead of bytes
+        """
+        self.pdf_path = str(pdf_path)
+        self.filename = Path(pdf_path).name
+        self.max_images = max_images
+        self.max_tables = max_tables
+        self.table_backend = table_backend
+        self.figure_store = figure_store
+
+        self.doc = fitz.open(self.pdf_path)
+        self.num_pages = len(self.doc)
+        self.toc = self.doc.get_toc()
+
+        self.page_texts: List[str] = []
+        self.page_offsets: List[int] = []  # Char offset of each page in self.text
+        self.headings = HeadingDetector()
+        self.images: List[Dict] = []
+        self.tables: List[Dict] = []
+        self.table_pages: List[int] = []  # 1-based pages that passed the pre-filter
+        self._seen_images = set()  # xrefs + content hashes already extracted
+
+        self._walk_pages()
+
+        if self.table_backend == "pdfplumber" and self.table_pages:
+            self.tables = extract_tables_pdfplumber(self.pdf_path, self.max_tables, self.table_pages)
+
+    def _walk_pages(self):
+        """Visit every page exactly once and run all extractors on it"""
+        offset = 0
+        for page in self.doc:
+            page_text = self._page_text(page, offset)
+            self.page_texts.append(page_text)
+            self.page_offsets.append(offset)
+            offset += len(page_text) + 1
+
+            if len(self.images) < self.max_images:
+                self.images.extend(extract_page_images(
+                    self.doc, page, self.filename,
+                    limit=self.max_images - len(self.images),
+                    seen=self._seen_images,
+                    store=self.figure_store
+                ))
+
+            if len(self.tables) >= self.max_tables:
+                continue
+            if not looks_like_table_page(page, page_text):
+                continue
+
+            self.table_pages.append(page.number + 1)
+            if self.table_backend == "pymupdf":
+                self.tables.extend(extract_page_tables(
+                    page, len(self.tables),
+                    limit=self.max_tables - len(self.tables)
+                ))
+
+    def _page_text(self, page: fitz.Page, offset: int) -> str:
+        """
+        Page text built from the span dict (same string as page.get_text()),
+        feeding every line's font info to the heading detector on the way
+        """
+        lines = []
+        line_offset = offset
+
+        layout = page.get_text("dict", flags=fitz.TEXTFLAGS_TEXT)
+        for block in layout["blocks"]:
+            for line in block.get("lines", []):
+                line_text = "".join(span["text"] for span in line["spans"])
+                if line["spans"]:
+                    self.headings.add_line(page.number + 1, line_offset, line["spans"], line_text)
+                lines.append(line_text + "\n")
+                line_offset += len(line_text) + 1
+
+        return "".join(lines)
+
+    def sections(self) -> List[Dict]:
+        """
+        Top-level sections with char and page spans
+
+        Uses the PDF outline when there is one, otherwise the font-based
+        heading detector. Subsection headings only matter for typing: a
+        section keeps the type of its top-level heading.
+
+        Returns:
+            List of {"title", "section_type", "char_start", "char_end",
+                     "start_page", "end_page"}
+        """
+        if self.toc:
+            headings = self._toc_headings()
+        else:
+            headings = self.headings.headings()
+
+        top_level = [h for h in headings if h["level"] == 1]
+        text_length = sum(len(t) + 1 for t in self.page_texts)
+
+        sections = []
+        for i, heading in enumerate(top_level):
+            char_end = top_level[i + 1]["char_start"] if i + 1 < len(top_level) else text_length
+            sections.append({
+                "title": heading["title"],
+                "section_type": heading["section_type"],
+                "char_start": heading["char_start"],
+                "char_end": char_end,
+                "start_page": heading["page"],
+                "end_page": self.page_at(max(char_end - 1, heading["char_start"]))
+            })
+
+        return sections
+
+    def _toc_headings(self) -> List[Dict]:
+        """Outline entries located in the text (page start if not found)"""
+        headings = []
+        for level, title, page_num in self.toc:
+            if not 1 <= page_num <= self.num_pages:
+                continue
+            page_start = self.page_offsets[page_num - 1]
+            found = self.page_texts[page_num - 1].find(title.strip())
+            headings.append({
+                "title": title,
+                "level": level,
+                "page": page_num,
+                "char_start": page_start + max(found, 0),
+                "section_type": classify_section(title)
+            })
+        headings.sort(key=lambda h: h["char_start"])
+        return headings
+
+    def page_at(self, char_offset: int) -> int:
+        """1-based page containing a char offset of self.text"""
+        return bisect_right(self.page_offsets, char_offset)
+
+    @property
+    def text(self) -> str:
+        """Full text, one newline-terminated block per page"""
+        return "".join(page_text + "\n" for page_text in self.page_texts)
+
+    def parsed(self) -> Dict:
+        """Same shape as PDFParser.parse()"""
+        return {
+            "text": self.text,
+            "num_pages": self.num_pages,
+            "metadata": {"filename": self.filename}
+        }
+
+    def structure(self) -> Dict:
+        """Same shape as detect_structure(), with detected headings as fallback"""
+        if self.toc:
+            return structure_from_toc(self.toc)
+
+        sections = [
+            {"title": h["title"], "level": h["level"], "page": h["page"]}
+            for h in self.headings.headings()
+        ]
+        return {"sections": sections, "toc": [s["title"] for s in sections]}
+
+    def close(self):
+        if not self.doc.is_closed:
+            self.doc.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+# Test
+if __name__ == "__main__":
+    with PaperDocument("test_data/attention.pdf") as paper:
+        print(f"✅ {paper.num_pages} pages, {len(paper.text)} chars")
+        print(f"   {len(paper.images)} images, {len(paper.tables)} tables, "
+              f"{len(paper.structure()['toc'])} TOC entries")
+
+        paper.toc = []  # Force the font-based detector
+        for section in paper.sections():
+            print(f"   p{section['start_page']}-{section['end_page']} "
+                  f"[{section['section_type']}] {section['title']}")
@@ -0,0 +1,96 @@
+"""
+Paper Text Store: One text blob per paper, sliced by character offsets
+Chunks and parents only carry (paper_id, char_start, char_end); their
+text is rebuilt from here, and page numbers come from the page offsets.
+"""
+import json
+import os
+from bisect import bisect_right
+from collections import OrderedDict
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+
+class PaperTextStore:
+    """
+    Layout:
+        <root>/<paper_id>.txt     full paper text (UTF-8)
+        <root>/<paper_id>.json    {"page_offsets": [...]}
+
+    Recently used papers are kept decoded in memory (LRU).
+    """
+
+    def __init__(self, root: str = "data/paper_text", cache_papers: int = 64):
+        """
+        Args:
+            root: Store directory (created on first write)
+            cache_papers: Papers kept in memory
+        """
+        self.root = Path(root)
+        self.cache_papers = cache_papers
+        self._cache: "OrderedDict[str, Tuple[str, List[int]]]" = OrderedDict()
+
+    def put(self, paper_id: str, text: str, page_offsets: List[int]):
+        """Store (or replace) a paper's text and page offsets"""
+        self._write_atomic(self.root / f"{paper_id}.txt", text.encode("utf-8"))
+        self._write_atomic(
+            self.root / f"{paper_id}.json",
+            json.dumps({"page_offsets": page_offsets}).encode()
+        )
+        self._remember(paper_id, (text, list(page_offsets)))
+
+    def slice(self, paper_id: str, char_start: int, char_end: int) -> Optional[str]:
+        """Text of a span, None if the paper isn't stored"""
+        entry = self._load(paper_id)
+        return entry[0][char_start:char_end] if entry else None
+
+    def pages(self, paper_id: str, char_start: int, char_end: int) -> Tuple[int, int]:
+        """1-based (first, last) page of a span, (0, 0) if unknown"""
+        entry = self._load(paper_id)
+        if not entry:
+            return 0, 0
+        return page_span(entry[1], char_start, char_end)
+
+    def delete(self, paper_id: str):
+        for suffix in (".txt", ".json"):
+            (self.root / f"{paper_id}{suffix}").unlink(missing_ok=True)
+        self._cache.pop(paper_id, None)
+
+    def _load(self, paper_id: str) -> Optional[Tuple[str, List[int]]]:
+        entry = self._cache.get(paper_id)
+        if entry is not None:
+            self._cache.move_to_end(paper_id)
+            return entry
+
+        text_path = self.root / f"{paper_id}.txt"
+        if not text_path.exists():
+            return None
+
+        text = text_path.read_bytes().decode("utf-8")  # read_text() would turn \r\n into \n and shift spans
+        meta_path = self.root / f"{paper_id}.json"
+        page_offsets = json.loads(meta_path.read_text())["page_offsets"] if meta_path.exists() else [0]
+        entry = (text, page_offsets)
+        self._remember(paper_id, entry)
+        return entry
+
+    def _remember(self, paper_id: str, entry: Tuple[str, List[int]]):
+        self._cache[paper_id] = entry
+        self._cache.move_to_end(paper_id)
+        while len(self._cache) > self.cache_papers:
+            self._cache.popitem(last=False)
+
+    @staticmethod
+    def _write_atomic(path: Path, data: bytes):
+        """Write via temp file + rename so readers never see partial blobs"""
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(path.suffix + f".{os.getpid()}.tmp")
+        tmp.write_bytes(data)
+        os.replace(tmp, path)
+
+
+def page_span(page_offsets: List[int], char_start: int, char_end: int) -> Tuple[int, int]:
+    """1-based (first, last) page of [char_start, char_end) given page start offsets"""
+    first = bisect_right(page_offsets, char_start)
+    last = bisect_right(page_offsets, max(char_end - 1, char_start))
+    return first, last
+
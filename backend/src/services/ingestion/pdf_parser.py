@@ -1,31 +1,42 @@
 """
 PDF Parser using PyMuPDF
 FIXED: Returns actual text, not "--- Page N ---"
+Supports streaming page-by-page
 """
 import fitz  # PyMuPDF
 from pathlib import Path
-from typing import Dict
+from typing import Dict, Iterator, Tuple
 
 
 class PDFParser:
     """Parse PDF to extract text"""
-    
+
     def parse(self, pdf_path: str) -> Dict:
         """Extract text from PDF"""
-        doc = fitz.open(pdf_path)
-        
-        # Extract ALL text from ALL pages
-        full_text = ""
-        for page_num, page in enumerate(doc, 1):
-            page_text = page.get_text()
-            full_text += page_text + "\n"
-        
+        page_texts = [page_text + "\n" for _, page_text in self.iter_pages(pdf_path)]
+
         return {
-            "text": full_text,
-            "num_pages": len(doc),
+            "text": "".join(page_texts),
+            "num_pages": len(page_texts),
             "metadata": {"filename": Path(pdf_path).name}
         }
 
+    def iter_pages(self, pdf_path: str) -> Iterator[Tuple[int, str]]:
+        """
+        Stream (page_number, text) pairs, 1-based, in page order
+
+        Only the current page is held in memory, so consumers such as
+        SemanticChunker.chunk_stream can start before the PDF is done.
+        The indexer reads pages through PaperDocument instead (one walk for
+        text, images and tables) and parallelizes across papers.
+        """
+        doc = fitz.open(pdf_path)
+        try:
+            for page_num, page in enumerate(doc, 1):
+                yield page_num, page.get_text()
+        finally:
+            doc.close()
+
 
 # Test
 if __name__ == "__main__":
@@ -1,9 +1,34 @@
 """
 Structure Detector: Extract PDF structure (TOC, sections)
-Optional for Phase 0
+Falls back to font-statistics heading detection when the PDF has no
+outline (most arXiv PDFs)
 """
+import re
 import fitz
-from typing import List, Dict
+from collections import Counter
+from typing import List, Dict, Optional
+
+
+# (section_type, title keywords) - first match wins
+SECTION_TYPES = [
+    ("abstract", ("abstract",)),
+    ("introduction", ("introduction", "overview")),
+    ("related_work", ("related work", "background", "prior work", "literature")),
+    ("methods", ("method", "approach", "model", "architecture", "framework", "algorithm")),
+    ("experiments", ("experiment", "evaluation", "setup", "training", "implementation")),
+    ("results", ("result", "analysis", "ablation")),
+    ("discussion", ("discussion", "limitation")),
+    ("conclusion", ("conclusion", "summary", "future work")),
+    ("references", ("reference", "bibliography")),
+    ("appendix", ("appendix", "supplementary")),
+    ("acknowledgments", ("acknowledg",)),
+]
+
+# A heading never ends mid-phrase; wrapped sentences often do
+TRAILING_STOPWORDS = {"a", "an", "and", "by", "for", "in", "of", "on", "or", "the", "to", "with"}
+
+NUMBERING_PATTERN = re.compile(r'^(?:\d+(?:\.\d+)*|[A-Z]|[IVX]+)\.?$')
+NUMBERED_HEADING_PATTERN = re.compile(r'^(\d+(?:\.\d+)*|[A-Z]|[IVX]+)\.?\s+(\S.*)$')
 
 
 def detect_structure(pdf_path: str) -> Dict:
@@ -17,7 +42,21 @@ def detect_structure(pdf_path: str) -> Dict:
     
     # Try to extract TOC
     toc = doc.get_toc()
+    doc.close()
     
+    return structure_from_toc(toc)
+
+
+def structure_from_toc(toc: List) -> Dict:
+    """
+    Build the structure dict from a PyMuPDF outline
+    
+    Args:
+        toc: ``doc.get_toc()`` output, [level, title, page] entries
+        
+    Returns:
+        {"sections": List[Dict], "toc": List[str]}
+    """
     sections = []
     if toc:
         for level, title, page_num in toc:
@@ -27,13 +66,142 @@ def detect_structure(pdf_path: str) -> Dict:
                 "page": page_num
             })
     
-    doc.close()
-    
     return {
         "sections": sections,
         "toc": [s["title"] for s in sections]
     }
 
 
+def classify_section(title: str) -> str:
+    """Map a heading to a section type (abstract, introduction, methods, ...)"""
+    lower = title.lower()
+    for section_type, keywords in SECTION_TYPES:
+        if any(keyword in lower for keyword in keywords):
+            return section_type
+    return "other"
+
+
+class HeadingDetector:
+    """
+    Font-statistics heading detector
+
+    Fed one page at a time from PaperDocument's page pass with the same
+    ``get_text("dict")`` output the page text is built from, so no extra
+    extraction is needed. Body text size is the most common span size
+    (weighted by characters); headings are short lines set larger than
+    the body, or bold and numbered ("3.1 Attention").
+    """
+
+    def __init__(self, size_ratio: float = 1.15, max_heading_chars: int = 80):
+        """
+        Args:
+            size_ratio: Min font size relative to body text for a heading
+            max_heading_chars: Longer lines are never headings
+        """
+        self.size_ratio = size_ratio
+        self.max_heading_chars = max_heading_chars
+        self.size_chars = Counter()
+        self.lines: List[Dict] = []  # Short candidate lines only
+
+    def add_line(self, page: int, char_start: int, spans: List[Dict], text: str):
+        """
+        Record one text line
+
+        Args:
+            page: 1-based page number
+            char_start: Offset of the line in the paper's full text
+            spans: PyMuPDF spans of the line
+            text: Line text (joined spans)
+        """
+        for span in spans:
+            self.size_chars[round(span["size"] * 2) / 2] += len(span["text"])
+
+        stripped = text.strip()
+        if not stripped or len(stripped) > self.max_heading_chars:
+            return
+
+        self.lines.append({
+            "page": page,
+            "char_start": char_start,
+            "text": stripped,
+            "size": max(span["size"] for span in spans),
+            "bold": all(span["flags"] & 16 or "bold" in span["font"].lower()
+                        for span in spans if span["text"].strip())
+        })
+
+    def headings(self) -> List[Dict]:
+        """
+        Detected headings in reading order
+
+        Returns:
+            List of {"title", "level", "page", "char_start", "section_type"}
+        """
+        if not self.size_chars:
+            return []
+
+        body_size = self.size_chars.most_common(1)[0][0]
+        headings = []
+        pending_number: Optional[Dict] = None
+
+        for line in self.lines:
+            larger = line["size"] >= body_size * self.size_ratio
+            if not (larger or line["bold"]):
+                pending_number = None
+                continue
+
+            # "1" and "Introduction" often come out as separate lines
+            if NUMBERING_PATTERN.match(line["text"]):
+                pending_number = line
+                continue
+
+            title = line["text"]
+            char_start = line["char_start"]
+            number = None
+
+            if pending_number and pending_number["page"] == line["page"]:
+                number = pending_number["text"].rstrip(".")
+                char_start = pending_number["char_start"]
+                title = f"{number} {title}"
+            else:
+                numbered = NUMBERED_HEADING_PATTERN.match(title)
+                if numbered:
+                    number = numbered.group(1)
+            pending_number = None
+
+            if not self._looks_like_heading(line["text"], larger, number):
+                continue
+
+            headings.append({
+                "title": title,
+                "level": number.count(".") + 1 if number else (1 if larger else 2),
+                "page": line["page"],
+                "char_start": char_start,
+                "section_type": classify_section(title)
+            })
+
+        # Text repeated in large type (figure labels, running heads) is not a heading
+        counts = Counter(h["title"] for h in headings)
+        return [h for h in headings if counts[h["title"]] == 1]
+
+    @staticmethod
+    def _looks_like_heading(text: str, larger: bool, number: Optional[str]) -> bool:
+        """Reject captions, sentences and bold run-in labels"""
+        if text.endswith((".", ",", ":", ";")):
+            return False
+        words = text.split()
+        if not (text[0].isupper() or text[0].isdigit()) or len(words) > 10:
+            return False
+        if words[-1].lower() in TRAILING_STOPWORDS:
+            return False
+        if sum(c.isalpha() for c in text) < 0.6 * len(text):
+            return False
+        if text.lower().startswith(("figure", "table", "fig.")):
+            return False
+        # Bold-but-not-larger lines only count when numbered or a known section
+        if not larger and number is None and classify_section(text) == "other":
+            return False
+        return True
+
+
 if __name__ == "__main__":
     print("✅ Structure detector loaded (optional)")
@@ -3,7 +3,7 @@ Multi-Provider LLM Client: Groq (primary) + Gemini (fallback)
 """
 import os
 import time
-from typing import List, Dict
+from typing import List, Dict, Optional
 from dotenv import load_dotenv
 from langsmith import traceable
 
@@ -46,12 +46,16 @@ def chat(
     messages: List[Dict[str, str]],
     temperature: float = 0.1,
     max_tokens: int = 1200,
+    timeout: Optional[float] = None,
     **kwargs
 ) -> str:
     """
     Multi-provider chat with automatic fallback
     Tries: Groq → Gemini → Error
+    
+    timeout: Seconds for the whole call, fallback included (None = SDK defaults)
     """
+    deadline = time.monotonic() + timeout if timeout else None
     
     # Try Groq first (30 req/min, fast!)
     if groq_available:
@@ -60,7 +64,8 @@ def chat(
                 model="llama-3.3-70b-versatile",  # ✅ Correct free model
                 messages=messages,
                 temperature=temperature,
-                max_tokens=max_tokens
+                max_tokens=max_tokens,
+                **({"timeout": timeout} if timeout else {})
             )
             return response.choices[0].message.content
         
@@ -69,6 +74,8 @@ def chat(
     
     # Fallback to Gemini
     if gemini_available:
+        if deadline is not None and time.monotonic() >= deadline:
+            raise TimeoutError("LLM call timed out")
         try:
             import google.generativeai as genai
             
@@ -100,7 +107,8 @@ def chat(
                     'HATE': 'block_none',
                     'SEXUAL': 'block_none',
                     'DANGEROUS': 'block_none'
-                }
+                },
+                **({"request_options": {"timeout": deadline - time.monotonic()}} if deadline else {})
             )
             
             return response.text
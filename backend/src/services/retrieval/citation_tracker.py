@@ -13,13 +13,20 @@ class CitationTracker:
         context = ""
         for i, doc in enumerate(docs, start=1):
             paper = doc.metadata.get("paper_name", "Unknown")
-            page = doc.metadata.get("page", "?")
             
             context += f"[{i}] {doc.page_content}\n"
-            context += f"   (Source: {paper}, page {page})\n\n"
+            context += f"   (Source: {paper}, {self.format_pages(doc.metadata)})\n\n"
         
         return context
     
+    def format_pages(self, metadata: dict) -> str:
+        """"page 4" / "pages 4-5" from chunk spans, "page ?" if unknown"""
+        start = metadata.get("page_start") or metadata.get("page")
+        end = metadata.get("page_end") or start
+        if not start:
+            return "page ?"
+        return f"page {start}" if end == start else f"pages {start}-{end}"
+    
     def extract_citations(self, answer: str) -> List[int]:
         """Extract citation numbers from answer text"""
         import re
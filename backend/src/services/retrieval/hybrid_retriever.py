@@ -1,71 +1,160 @@
 """
 Hybrid Retriever: Combines vector search + keyword search (BM25)
+The two legs search the whole corpus independently (Chroma for vectors,
+the persistent BM25Index for keywords) and are fused with RRF.
 """
-from typing import List, Dict
-import chromadb
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Optional
+import numpy as np
 from langchain.schema import Document
-from rank_bm25 import BM25Okapi
+
+from .rag_fusion import reciprocal_rank_fusion
+from ..indexing.bm25_index import BM25Index
+from ..indexing.embedder import Embedder
+from ...config.settings import settings
+from ...db.vector_store import VectorStore
 
 
 class HybridRetriever:
     """Hybrid retrieval combining semantic + keyword search"""
     
-    def __init__(self, chroma_client: chromadb.HttpClient):
+    def __init__(
+        self,
+        chroma_client: VectorStore,
+        bm25_index: Optional[BM25Index] = None,
+        embedder: Optional[Embedder] = None
+    ):
+        """
+        Args:
+            chroma_client: Vector store (Chroma client or embedded)
+            bm25_index: Keyword index (default: settings.BM25_INDEX_DIR)
+            embedder: Query encoder, same model as the index (default: settings.EMBEDDING_MODEL)
+        """
         self.chroma = chroma_client
         try:
             self.collection = chroma_client.get_collection("chunks")
         except:
             print("⚠️ 'chunks' collection not found, using 'documents'")
             self.collection = chroma_client.get_collection("documents")
+        self.bm25 = bm25_index or BM25Index(settings.BM25_INDEX_DIR)
+        self.embedder = embedder or Embedder(settings.EMBEDDING_MODEL)
+        self._executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="hybrid")
     
-    def retrieve(self, query: str, k: int = 5) -> List[Document]:
+    def retrieve(self, query: str, k: int = 5, section_types: Optional[List[str]] = None) -> List[Document]:
         """
-        Hybrid retrieval: vector search + BM25
+        Hybrid retrieval: vector search + BM25, fused with RRF
         
         Args:
             query: Search query
             k: Number of results to return
+            section_types: Only search chunks from these sections
+                (e.g. ["methods", "results"])
             
         Returns:
             List of Document objects
         """
+        return self.retrieve_many([query], k=k, section_types=section_types)[0]
+    
+    def retrieve_many(
+        self,
+        queries: List[str],
+        k: int = 5,
+        section_types: Optional[List[str]] = None,
+        query_embeddings: Optional[np.ndarray] = None
+    ) -> List[List[Document]]:
+        """
+        Hybrid retrieval for several query variants (multi-query, HyDE)
+        
+        Queries are embedded locally in one batch and sent to Chroma as a
+        single query_embeddings request; BM25 runs alongside.
+        
+        Args:
+            query_embeddings: Vectors for ``queries``, one row each, when the
+                caller already has them (e.g. from a QueryEmbeddingBatcher)
+        
+        Returns:
+            One fused result list per query, in input order
+        """
+        if not queries:
+            return []
         try:
-            # Vector search
-            results = self.collection.query(
-                query_texts=[query],
-                n_results=k * 2  # Get more for re-ranking
+            # Both legs run at once, each over the full corpus
+            vector_leg = self._executor.submit(self._vector_search, queries, k * 2, section_types, query_embeddings)
+            keyword_leg = self._executor.submit(
+                lambda: [self.bm25.search(q, k * 2, section_types) for q in queries]
             )
+            vector_lists = vector_leg.result()
+            try:
+                keyword_lists = keyword_leg.result()
+            except Exception as e:
+                print(f"⚠️ BM25 leg failed, vector results only: {e}")
+                keyword_lists = [[] for _ in queries]
             
-            if not results['documents'] or not results['documents'][0]:
-                return []
-            
-            # Convert to Document objects
-            docs = []
-            for i, doc_text in enumerate(results['documents'][0]):
-                metadata = results['metadatas'][0][i] if results.get('metadatas') else {}
-                docs.append(Document(
-                    page_content=doc_text,
-                    metadata=metadata
-                ))
-            
-            # BM25 keyword search (simple implementation)
-            query_terms = query.lower().split()
-            corpus = [doc.page_content.lower().split() for doc in docs]
-            
-            if corpus:
-                bm25 = BM25Okapi(corpus)
-                bm25_scores = bm25.get_scores(query_terms)
-                
-                # Combine scores (vector already sorted, add BM25 boost)
-                for i, doc in enumerate(docs):
-                    doc.metadata['bm25_score'] = bm25_scores[i]
-                    doc.metadata['hybrid_score'] = (k - i) + bm25_scores[i]
-                
-                # Re-sort by hybrid score
-                docs.sort(key=lambda x: x.metadata.get('hybrid_score', 0), reverse=True)
+            known = {d.metadata['id']: d for docs in vector_lists for d in docs}
+            keyword_docs = self._keyword_docs(keyword_lists, known)
             
-            return docs[:k]
+            results = []
+            for vector_docs, hits, docs in zip(vector_lists, keyword_lists, keyword_docs):
+                fused = reciprocal_rank_fusion([vector_docs, docs])
+                bm25_scores = dict(hits)
+                ranked = []
+                for rank, doc in enumerate(fused[:k]):
+                    # Copy: the same chunk may rank differently for another query
+                    doc = Document(page_content=doc.page_content, metadata=dict(doc.metadata))
+                    doc.metadata['bm25_score'] = bm25_scores.get(doc.metadata['id'], 0.0)
+                    doc.metadata['hybrid_score'] = len(fused) - rank
+                    ranked.append(doc)
+                results.append(ranked)
+            return results
         
         except Exception as e:
             print(f"⚠️ Hybrid retrieval failed: {e}")
-            return []
+            return [[] for _ in queries]
+    
+    def _vector_search(
+        self,
+        queries: List[str],
+        n: int,
+        section_types: Optional[List[str]],
+        query_embeddings: Optional[np.ndarray] = None
+    ) -> List[List[Document]]:
+        """One Chroma request for all queries, with our own query vectors"""
+        if query_embeddings is None:
+            query_embeddings = self.embedder.embed_queries(queries)
+        results = self.collection.query(
+            query_embeddings=np.asarray(query_embeddings, dtype=np.float32).tolist(),
+            n_results=n,
+            where={"section_type": {"$in": section_types}} if section_types else None
+        )
+        
+        doc_lists = []
+        for q in range(len(queries)):
+            docs = []
+            documents = results['documents'][q] if results['documents'] else []
+            for i, doc_text in enumerate(documents):
+                metadata = results['metadatas'][q][i] if results.get('metadatas') else {}
+                metadata['id'] = results['ids'][q][i]
+                docs.append(Document(page_content=doc_text, metadata=metadata))
+            doc_lists.append(docs)
+        return doc_lists
+    
+    def _keyword_docs(self, hit_lists, known: Dict[str, Document]) -> List[List[Document]]:
+        """Documents for BM25 hits; chunks the vector leg missed are fetched in one get()"""
+        missing = list(dict.fromkeys(
+            chunk_id for hits in hit_lists for chunk_id, _ in hits if chunk_id not in known
+        ))
+        fetched = {}
+        if missing:
+            records = self.collection.get(ids=missing, include=["documents", "metadatas"])
+            for chunk_id, text, metadata in zip(records['ids'], records['documents'], records['metadatas']):
+                fetched[chunk_id] = Document(page_content=text or "", metadata={**(metadata or {}), "id": chunk_id})
+        
+        doc_lists = []
+        for hits in hit_lists:
+            docs = []
+            for chunk_id, _ in hits:
+                doc = known.get(chunk_id) or fetched.get(chunk_id)
+                if doc is not None:  # Skip hits already deleted from Chroma
+                    docs.append(doc)
+            doc_lists.append(docs)
+        return doc_lists
@@ -1,38 +1,89 @@
 """
 Multi-Rep Retrieval: Expand child chunks to parent chunks (Lance Martin 12)
+Parents are resolved from the local parent index and sliced from the paper
+text store; Chroma is only asked for parents the index doesn't know
 """
-from typing import List
-import chromadb
+from typing import List, Optional
 from langchain.schema import Document
 
+from ..indexing.parent_index import ParentIndex
+from ..ingestion.paper_text_store import PaperTextStore
+from ...config.settings import settings
+from ...db.vector_store import VectorStore, get_vector_store
+
 
 class MultiRepRetriever:
     """Expand retrieved chunks to their parent contexts"""
     
-    def __init__(self, chroma_client: chromadb.HttpClient):
+    def __init__(
+        self,
+        chroma_client: VectorStore,
+        text_store: Optional[PaperTextStore] = None,
+        parent_index: Optional[ParentIndex] = None
+    ):
         self.chroma = chroma_client
         self.chunks_coll = chroma_client.get_collection("chunks")
         self.parents_coll = chroma_client.get_collection("parents")
+        self.text_store = text_store or PaperTextStore(settings.PAPER_TEXT_DIR)
+        self.parent_index = parent_index or ParentIndex(settings.PARENT_INDEX_PATH)
     
     def expand_to_parents(self, child_docs: List[Document]) -> List[Document]:
         """Expand child chunks to parent chunks"""
-        parent_ids = set()
-        parent_docs = []
+        parent_ids = []
         
-        # Extract parent IDs from children
+        # Extract parent IDs from children (first-seen order)
         for doc in child_docs:
             parent_id = doc.metadata.get("parent_id")
             if parent_id and parent_id not in parent_ids:
-                parent_ids.add(parent_id)
+                parent_ids.append(parent_id)
+        
+        if not parent_ids:
+            return []
+        
+        # Local index first
+        records = self.parent_index.get_many(parent_ids)
+        parent_docs = []
+        for parent_id in parent_ids:
+            record = records.get(parent_id)
+            if record is None:
+                continue
+            text = self.text_store.slice(record["paper_id"], record["char_start"], record["char_end"])
+            if text:
+                parent_docs.append(Document(page_content=text, metadata=record["metadata"]))
+        
+        # Parents indexed before the local index existed
+        missing = [p for p in parent_ids if p not in records]
+        if missing:
+            parent_docs.extend(self._fetch_from_chroma(missing))
+        
+        return parent_docs
+    
+    def _fetch_from_chroma(self, parent_ids: List[str]) -> List[Document]:
+        """Fallback: one Chroma round trip for unknown parent IDs"""
+        results = self.parents_coll.get(ids=parent_ids, include=["metadatas", "documents"])
         
-        # Fetch parents from ChromaDB
-        if parent_ids:
-            results = self.parents_coll.get(ids=list(parent_ids))
-            
-            for i, doc_text in enumerate(results["documents"]):
-                parent_docs.append(Document(
-                    page_content=doc_text,
-                    metadata=results["metadatas"][i]
-                ))
+        parent_docs = []
+        documents = results.get("documents") or [None] * len(results["metadatas"])
+        for metadata, document in zip(results["metadatas"], documents):
+            text = document
+            if "char_end" in metadata:  # Span-only parent
+                text = self.text_store.slice(metadata["paper_id"], metadata["char_start"], metadata["char_end"])
+            if text:
+                parent_docs.append(Document(page_content=text, metadata=metadata))
         
         return parent_docs
+
+
+# Test
+if __name__ == "__main__":
+    import time
+    
+    retriever = MultiRepRetriever(get_vector_store())
+    children = retriever.chunks_coll.get(limit=50, include=["metadatas"])["metadatas"]
+    child_docs = [Document(page_content="", metadata=m) for m in children]
+    
+    retriever.expand_to_parents(child_docs)  # Warm the cache
+    start = time.perf_counter()
+    parents = retriever.expand_to_parents(child_docs)
+    elapsed = (time.perf_counter() - start) * 1e6
+    print(f"✅ {len(child_docs)} children → {len(parents)} parents in {elapsed:.0f}µs")
@@ -2,7 +2,6 @@
 ProductionRAG: Complete 4-Phase Pipeline
 Orchestrates all Lance Martin techniques
 """
-import chromadb
 from typing import Dict, List
 from langchain.schema import Document
 from langsmith import traceable
@@ -35,8 +34,11 @@ from ..llm.answer_generator import AnswerGenerator
 ProductionRAG: Complete 4-Phase Pipeline
 Orchestrates all Lance Martin techniques
 """
-import chromadb
-from typing import Dict, List
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+from typing import Dict, List, Optional
 from langchain.schema import Document
 from langsmith import traceable
 
@@ -64,20 +66,29 @@ from .contect_compressor import compress_context
 # Phase 4
 from .self_rag import SelfRAG
 from ..llm.answer_generator import AnswerGenerator
+from .query_batcher import QueryEmbeddingBatcher
+from ..indexing.embedder import Embedder
+from ...config.settings import settings
+from ...db.vector_store import get_vector_store
 
 
 class ProductionRAG:
     """Complete RAG pipeline with LangSmith tracing"""
     
     def __init__(self, chroma_host='localhost', chroma_port=8000):
-        self.chroma = chromadb.HttpClient(chroma_host, chroma_port)
+        self.chroma = get_vector_store(host=chroma_host, port=chroma_port)
         
-        # Initialize components
-        self.hybrid_retriever = HybridRetriever(self.chroma)
+        # Initialize components (queries are embedded locally, same model as the index)
+        self.embedder = Embedder(settings.EMBEDDING_MODEL)
+        self.hybrid_retriever = HybridRetriever(self.chroma, embedder=self.embedder)
+        # Shared by concurrent answer_question_async calls: their queries
+        # are embedded together in micro-batches
+        self.query_batcher = QueryEmbeddingBatcher(self.embedder)
         self.multirep = MultiRepRetriever(self.chroma)
         self.crag = CRAG()
         self.self_rag = SelfRAG()
         self.generator = AnswerGenerator()
+        self._executor = None  # answer_question_async stages
     
     @traceable(
         name="ProductionRAG Pipeline",
@@ -111,6 +122,115 @@ class ProductionRAG:
         
         return result
     
+    @traceable(
+        name="ProductionRAG Pipeline (async)",
+        run_type="chain",
+        tags=["rag", "production", "full-pipeline", "async"],
+        metadata={"version": "1.0", "model": "gemini-2.5-flash"}
+    )
+    async def answer_question_async(self, question: str, top_k: int = 5) -> Dict:
+        """
+        Same pipeline as answer_question, run as a dependency graph
+        
+        Every stage starts as soon as its inputs exist:
+            multi-query LLM ─→ retrieve variants ─┐
+            HyDE LLM ───────→ retrieve HyDE doc ──┤
+            retrieve raw question (speculative) ──┼─→ CRAG → fusion/rerank → grade → answer
+            RAPTOR query ─────────────────────────┤
+            raw + variants ─→ multi-rep expansion ┘
+        Blocking stages run on a thread pool, so latency follows the
+        critical path (usually multi-query LLM → retrieval → generation).
+        """
+        start = time.perf_counter()
+        print(f"\n{'='*60}")
+        print(f"❓ QUESTION (async): {question}")
+        print(f"{'='*60}")
+        
+        # Every stage future, so a failing one cancels the rest instead of
+        # leaving them running (and their errors unretrieved)
+        stages: List[asyncio.Future] = []
+        
+        def track(awaitable) -> asyncio.Future:
+            future = asyncio.ensure_future(awaitable)
+            stages.append(future)
+            return future
+        
+        try:
+            # Roots: both LLM calls, the raw-question search and RAPTOR at once.
+            # Query vectors come from the shared batcher, so concurrent
+            # requests share forward passes.
+            multi_queries = track(self._spawn(self._multi_query, question))
+            hyde_doc = track(self._spawn(self._hyde, question))
+            question_vector = track(self.query_batcher.embed(question))
+            
+            async def question_docs() -> List[Document]:
+                vectors = (await question_vector)[None]
+                return (await self._spawn(self._basic_retrieve_many, [question], 5, vectors))[0]
+            
+            async def summary_docs() -> List[Document]:
+                return await self._spawn(self._raptor_retrieve, question, await question_vector)
+            
+            raw_docs = track(question_docs())
+            raptor_docs = track(summary_docs())
+            
+            async def variant_docs() -> List[List[Document]]:
+                # generate_multi_queries puts the raw question first: already searched
+                variants = (await multi_queries)[1:]
+                if not variants:
+                    return []
+                vectors = await self.query_batcher.embed_many(variants)
+                return await self._spawn(self._basic_retrieve_many, variants, 5, vectors)
+            
+            async def hyde_docs() -> List[Document]:
+                document = await hyde_doc
+                vectors = (await self.query_batcher.embed(document))[None]
+                return (await self._spawn(self._basic_retrieve_many, [document], 5, vectors))[0]
+            
+            variant_lists = track(variant_docs())
+            hyde_list = track(hyde_docs())
+            
+            async def parent_docs() -> List[Document]:
+                # child_docs[:10] only depends on the leading lists, not on HyDE
+                leading = [await raw_docs] + await variant_lists
+                children = [doc for doc_list in leading for doc in doc_list]
+                return await self._spawn(self._multirep_expand, children[:10])
+            
+            parents = track(parent_docs())
+            
+            # Join: same document order as the sequential pipeline
+            docs_lists = [await raw_docs] + await variant_lists + [await hyde_list]
+            print(f"  ✓ {len(docs_lists)} query variants retrieved ({time.perf_counter() - start:.2f}s)")
+            child_docs = [doc for doc_list in docs_lists for doc in doc_list]
+            all_retrieved = child_docs + await parents + await raptor_docs
+            
+            relevant = await self._spawn(self.crag.check_relevance, all_retrieved, question)
+            if not relevant:
+                all_retrieved.extend(await self._spawn(self._crag_fallback, question))
+            
+            # Phases 3 and 4 are a chain: each step needs the previous result
+            docs_phase3 = await self._spawn(self._phase3_post_retrieval, question, all_retrieved)
+            result = await self._spawn(self._phase4_generation, question, docs_phase3, top_k)
+        finally:
+            for future in stages:
+                if not future.done():
+                    future.cancel()  # Executor jobs already running still finish
+                elif not future.cancelled():
+                    future.exception()  # Only the first failure propagates
+        
+        print(f"\n{'='*60}")
+        print(f"✅ ANSWER: {result['answer'][:200]}...")
+        print(f"📚 CITATIONS: {result['citations']}")
+        print(f"⏱️ {time.perf_counter() - start:.2f}s end-to-end")
+        print(f"{'='*60}\n")
+        
+        return result
+    
+    def _spawn(self, fn, *args) -> asyncio.Future:
+        """Start a blocking stage on the worker pool; await the future for its result"""
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix="rag-dag")
+        return asyncio.get_running_loop().run_in_executor(self._executor, fn, *args)
+    
     @trace_phase("Query Construction", 1)
     def _phase1_query_construction(self, question: str) -> List[List[Document]]:
         """Phase 1: Multi-query + HyDE"""
@@ -125,13 +245,8 @@ class ProductionRAG:
         all_queries = multi_queries + [hyde_doc]
         print(f"  ✓ Generated {len(all_queries)} query variants")
         
-        # Retrieve for each query
-        all_docs = []
-        for query in all_queries:
-            docs = self._basic_retrieve(query, k=5)
-            all_docs.append(docs)
-        
-        return all_docs
+        # Retrieve for all variants at once (one embedding batch, one Chroma request)
+        return self._basic_retrieve_many(all_queries, k=5)
     
     @trace_retrieval("Multi-Query Generation")
     def _multi_query(self, question: str) -> List[str]:
@@ -148,6 +263,16 @@ class ProductionRAG:
         """Basic retrieval from chunks collection"""
         return self.hybrid_retriever.retrieve(query, k=k)
     
+    @trace_retrieval("Batched Vector Search")
+    def _basic_retrieve_many(
+        self,
+        queries: List[str],
+        k: int = 5,
+        query_embeddings: Optional[np.ndarray] = None
+    ) -> List[List[Document]]:
+        """Batched retrieval for query variants from chunks collection"""
+        return self.hybrid_retriever.retrieve_many(queries, k=k, query_embeddings=query_embeddings)
+    
     @trace_phase("Retrieval", 2)
     def _phase2_retrieval(self, question: str, docs_lists: List[List[Document]]) -> List[Document]:
         """Phase 2: Hybrid + Multi-Rep + RAPTOR"""
@@ -179,9 +304,11 @@ class ProductionRAG:
         return self.multirep.expand_to_parents(child_docs)
     
     @trace_retrieval("RAPTOR Tree Query")
-    def _raptor_retrieve(self, question: str) -> List[Document]:
+    def _raptor_retrieve(self, question: str, query_embedding: Optional[np.ndarray] = None) -> List[Document]:
         """Query RAPTOR tree"""
-        return query_raptor_tree(self.chroma, question, k=3)
+        return query_raptor_tree(
+            self.chroma, question, k=3, embedder=self.embedder, query_embedding=query_embedding
+        )
     
     @trace_tool("CRAG Web Fallback")
     def _crag_fallback(self, question: str) -> List[Document]:
@@ -252,3 +379,6 @@ if __name__ == "__main__":
     rag = ProductionRAG()
     result = rag.answer_question("What is the Transformer architecture?")
     print(f"\n✅ Full Answer:\n{result['answer']}")
+    
+    result = asyncio.run(rag.answer_question_async("How does multi-head attention work?"))
+    print(f"\n✅ Full Answer (async):\n{result['answer']}")
@@ -0,0 +1,149 @@
+"""
+Query Embedding Batcher: Micro-batch concurrent query embeddings
+Queries arriving within a few milliseconds of each other share one
+forward pass instead of running the model once per chat request.
+"""
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+
+import numpy as np
+
+
+class QueryEmbeddingBatcher:
+    """
+    asyncio front-end for Embedder.embed_queries
+
+    Usage:
+        batcher = QueryEmbeddingBatcher(embedder)
+        vector = await batcher.embed("What is attention?")
+        ...
+        await batcher.stop()
+    """
+
+    def __init__(self, embedder, max_batch: int = 32, max_wait_ms: float = 5.0):
+        """
+        Args:
+            embedder: Embedder instance
+            max_batch: Encode as soon as this many queries are waiting
+            max_wait_ms: Max time the first query of a batch waits for company
+        """
+        self.embedder = embedder
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000
+
+        # One thread: model calls are serialized, the event loop never blocks
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="query-embed")
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+
+        self.batches = 0
+        self.queries = 0
+
+    async def embed(self, query: str) -> np.ndarray:
+        """Embedding of one query (float32, resolved when its batch is encoded)"""
+        self._ensure_started()
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((query, future))
+        return await future
+
+    async def embed_many(self, queries: List[str]) -> np.ndarray:
+        """Embeddings of several queries (e.g. multi-query variants), one row each"""
+        vectors = await asyncio.gather(*(self.embed(q) for q in queries))
+        return np.stack(vectors) if vectors else np.zeros((0, self.embedder.dimension), dtype=np.float32)
+
+    def _ensure_started(self):
+        if self._worker is None or self._worker.done():
+            self._queue = asyncio.Queue()
+            self._worker = asyncio.get_running_loop().create_task(self._run())
+
+    async def _run(self):
+        """Collect up to max_batch queries or max_wait, encode, resolve"""
+        loop = asyncio.get_running_loop()
+
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.max_wait
+
+            while len(batch) < self.max_batch:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+
+            # Callers that gave up meanwhile don't need a vector
+            batch = [(query, future) for query, future in batch if not future.cancelled()]
+            if not batch:
+                continue
+
+            try:
+                vectors = await loop.run_in_executor(
+                    self._executor, self.embedder.embed_queries, [query for query, _ in batch]
+                )
+            except (Exception, asyncio.CancelledError) as e:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e if isinstance(e, Exception) else RuntimeError("Query batcher stopped"))
+                if isinstance(e, asyncio.CancelledError):
+                    raise
+                continue
+
+            self.batches += 1
+            self.queries += len(batch)
+            for (_, future), vector in zip(batch, vectors):
+                if not future.done():
+                    future.set_result(vector)
+
+    async def stop(self):
+        """Stop the worker and fail queries that are still waiting"""
+        if self._worker is not None:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+            self._worker = None
+
+        while self._queue is not None and not self._queue.empty():
+            _, future = self._queue.get_nowait()
+            if not future.done():
+                future.set_exception(RuntimeError("Query batcher stopped"))
+
+        self._executor.shutdown(wait=False)
+
+    def stats(self) -> Dict:
+        """Batches run and average batch size since start-up"""
+        return {
+            "batches": self.batches,
+            "queries": self.queries,
+            "avg_batch": round(self.queries / self.batches, 2) if self.batches else 0.0
+        }
+
+
+# Test
+if __name__ == "__main__":
+    from ..indexing.embedder import Embedder
+
+    async def main():
+        embedder = Embedder(cache_dir="")  # No cache: measure the model
+        queries = [f"What does section {i} of the Transformer paper say?" for i in range(64)]
+
+        start = time.perf_counter()
+        for query in queries:
+            embedder.embed_query(query)
+        sequential = time.perf_counter() - start
+
+        batcher = QueryEmbeddingBatcher(embedder)
+        start = time.perf_counter()
+        await asyncio.gather(*(batcher.embed(q) for q in queries))
+        batched = time.perf_counter() - start
+        await batcher.stop()
+
+        print(f"✅ 64 concurrent queries: {sequential:.2f}s one-by-one → {batched:.2f}s batched")
+        print(f"   {batcher.stats()}")
+
+    asyncio.run(main())
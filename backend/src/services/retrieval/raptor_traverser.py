@@ -1,19 +1,29 @@
 """
 RAPTOR Tree Traversal: Query hierarchical summary tree
 """
-from typing import List
-import chromadb
+from typing import List, Optional
 from langchain.schema import Document
 
+from ...db.vector_store import VectorStore
 
-def query_raptor_tree(chroma_client: chromadb.HttpClient, query: str, k: int = 3) -> List[Document]:
+
+def query_raptor_tree(
+    chroma_client: VectorStore,
+    query: str,
+    k: int = 3,
+    embedder=None,
+    query_embedding: Optional[List[float]] = None
+) -> List[Document]:
     """
     Query RAPTOR tree for high-level summaries
     
     Args:
-        chroma_client: ChromaDB client
+        chroma_client: Vector store (Chroma client or embedded)
         query: Search query
         k: Number of summaries to return
+        embedder: Embedder used at index time; the query is embedded
+            locally (cached) instead of by Chroma's default model
+        query_embedding: Precomputed query vector (skips embedding)
         
     Returns:
         List of summary documents
@@ -22,10 +32,19 @@ def query_raptor_tree(chroma_client: chromadb.HttpClient, query: str, k: int = 3
         # Try to get RAPTOR summaries collection
         collection = chroma_client.get_collection("raptor")
         
-        results = collection.query(
-            query_texts=[query],
-            n_results=k
-        )
+        if query_embedding is None and embedder is not None:
+            query_embedding = embedder.embed_query(query)
+        
+        if query_embedding is not None:
+            results = collection.query(
+                query_embeddings=[list(map(float, query_embedding))],
+                n_results=k
+            )
+        else:
+            results = collection.query(
+                query_texts=[query],
+                n_results=k
+            )
         
         if not results['documents'] or not results['documents'][0]:
             return []
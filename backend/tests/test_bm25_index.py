@@ -0,0 +1,46 @@
+"""BM25Index: search after re-indexing and deleting papers"""
+from src.services.indexing.bm25_index import BM25Index
+
+
+TEXTS = [
+    "The Transformer model relies entirely on attention.",
+    "Multi-head attention attends to several subspaces.",
+    "Positional encodings inject token order.",
+    "The attention model is trained on WMT 2014 English-German.",
+]
+IDS = [f"attention_{i}" for i in range(len(TEXTS))]
+
+
+def test_search_finds_chunks(tmp_path):
+    index = BM25Index(str(tmp_path))
+    index.add_paper("attention", IDS, TEXTS)
+
+    hits = index.search("model attention", k=2)
+    assert hits[0][0] == "attention_0"
+    assert all(score > 0 for _, score in hits)
+
+
+def test_reindexed_paper_is_still_searchable(tmp_path):
+    index = BM25Index(str(tmp_path))
+    index.add_paper("attention", IDS, TEXTS)
+    index.add_paper("attention", IDS, TEXTS)  # Old segment is tombstoned
+
+    hits = index.search("model attention", k=4)
+    assert len(index) == len(TEXTS)
+    assert [chunk_id for chunk_id, _ in hits][:1] == ["attention_0"]
+    assert all(score > 0 for _, score in hits)
+
+
+def test_deleted_paper_is_not_returned(tmp_path):
+    index = BM25Index(str(tmp_path))
+    index.add_paper("attention", IDS, TEXTS)
+    index.add_paper("bert", ["bert_0"], ["BERT pre-trains a bidirectional model."])
+    index.delete_paper("attention")
+
+    assert [chunk_id for chunk_id, _ in index.search("model attention", k=10)] == ["bert_0"]
+
+
+def test_reopened_index_sees_segments(tmp_path):
+    BM25Index(str(tmp_path)).add_paper("attention", IDS, TEXTS)
+
+    assert BM25Index(str(tmp_path)).search("positional encodings", k=1)[0][0] == "attention_2"
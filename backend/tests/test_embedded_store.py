@@ -0,0 +1,96 @@
+"""Tests for the embedded (in-process) vector store"""
+import numpy as np
+
+from src.db.embedded_store import EmbeddedVectorStore
+
+
+def unit_vectors(n, dim=32, seed=0, centers=50):
+    rng = np.random.default_rng(seed)
+    topics = rng.normal(size=(centers, dim))
+    vectors = topics[rng.integers(0, centers, n)] + 0.6 * rng.normal(size=(n, dim))
+    return (vectors / np.linalg.norm(vectors, axis=1, keepdims=True)).astype(np.float32)
+
+
+def test_sq8_refits_after_small_first_batch(tmp_path):
+    vectors = unit_vectors(5_040)
+    vectors[:40] = unit_vectors(40, centers=1, seed=1)  # One-topic first paper
+    queries = unit_vectors(50, seed=2)
+
+    results = {}
+    for quantization in ("none", "sq8"):
+        store = EmbeddedVectorStore(str(tmp_path / quantization), quantization=quantization)
+        collection = store.get_or_create_collection("chunks")
+        collection.upsert(ids=[f"c{i}" for i in range(40)], embeddings=vectors[:40])
+        collection.upsert(ids=[f"c{i}" for i in range(40, len(vectors))], embeddings=vectors[40:])
+        results[quantization] = collection.query(query_embeddings=queries, n_results=10, include=[])["ids"]
+
+    recall = np.mean([len(set(a) & set(b)) / 10 for a, b in zip(results["sq8"], results["none"])])
+    assert recall >= 0.99
+
+
+def make_collection(path, n=100):
+    collection = EmbeddedVectorStore(str(path)).get_or_create_collection(
+        "chunks", metadata={"hnsw:space": "cosine"}
+    )
+    vectors = unit_vectors(n)
+    collection.upsert(
+        ids=[f"c{i}" for i in range(n)],
+        embeddings=vectors,
+        documents=[f"doc {i}" for i in range(n)],
+        metadatas=[{"paper_id": f"p{i % 4}", "page": i} for i in range(n)]
+    )
+    return collection, vectors
+
+
+def test_query_finds_own_vector(tmp_path):
+    collection, vectors = make_collection(tmp_path)
+
+    result = collection.query(query_embeddings=vectors[[3, 42]], n_results=2)
+    assert [ids[0] for ids in result["ids"]] == ["c3", "c42"]
+    assert result["documents"][0][0] == "doc 3"
+    assert result["metadatas"][1][0] == {"paper_id": "p2", "page": 42}
+    assert abs(result["distances"][0][0]) < 1e-5
+
+
+def test_query_where_filter(tmp_path):
+    collection, vectors = make_collection(tmp_path)
+
+    result = collection.query(query_embeddings=vectors[:1], n_results=5,
+                              where={"$and": [{"paper_id": "p1"}, {"page": {"$gte": 50}}]})
+    ids = result["ids"][0]
+    assert len(ids) == 5
+    assert all(int(i[1:]) % 4 == 1 and int(i[1:]) >= 50 for i in ids)
+
+
+def test_upsert_overwrites(tmp_path):
+    collection, vectors = make_collection(tmp_path)
+
+    collection.upsert(ids=["c3"], embeddings=vectors[7:8], documents=["new"], metadatas=[{"paper_id": "p9"}])
+    assert collection.count() == 100
+    assert collection.get(ids=["c3"])["documents"] == ["new"]
+    assert set(collection.query(query_embeddings=vectors[7:8], n_results=2)["ids"][0]) == {"c3", "c7"}
+
+
+def test_delete_where_and_reopen(tmp_path):
+    collection, vectors = make_collection(tmp_path)
+    collection.delete(where={"paper_id": "p0"})
+    collection.delete(ids=["c1"])
+    assert collection.count() == 74
+
+    reopened = EmbeddedVectorStore(str(tmp_path)).get_collection("chunks")
+    assert reopened.count() == 74
+    assert reopened.get(where={"paper_id": "p0"})["ids"] == []
+    assert "c1" not in reopened.query(query_embeddings=vectors[1:2], n_results=5)["ids"][0]
+    assert reopened.query(query_embeddings=vectors[5:6], n_results=1)["ids"][0] == ["c5"]
+
+
+def test_compact_keeps_live_rows(tmp_path):
+    collection, vectors = make_collection(tmp_path)
+    collection.delete(where={"paper_id": "p0"})
+    collection.compact()
+
+    for store in (collection, EmbeddedVectorStore(str(tmp_path)).get_collection("chunks")):
+        assert store.count() == 75
+        assert store.get(ids=["c0", "c5"])["ids"] == ["c5"]
+        assert store.get(ids=["c5"])["metadatas"] == [{"paper_id": "p1", "page": 5}]
+        assert store.query(query_embeddings=vectors[9:10], n_results=1)["ids"][0] == ["c9"]
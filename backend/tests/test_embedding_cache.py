@@ -0,0 +1,61 @@
+"""Tests for the on-disk embedding cache"""
+import numpy as np
+
+from src.services.indexing.embedding_cache import EmbeddingCache, cache_key
+
+
+def vec(value, dim=4):
+    return np.full(dim, value, dtype=np.float32)
+
+
+def test_reopen_keeps_vectors(tmp_path):
+    cache = EmbeddingCache(str(tmp_path), "m", capacity=8)
+    cache.put_many(["a", "b"], [vec(1), vec(2)])
+    cache.put_many(["c"], [vec(3)])
+    cache._lock_file.close()
+
+    reopened = EmbeddingCache(str(tmp_path), "m", capacity=8)
+    vectors, missing = reopened.get_many(["a", "c", "x"])
+    assert missing == [2]
+    assert np.allclose(vectors[0], vec(1)) and np.allclose(vectors[1], vec(3))
+
+
+def test_eviction_drops_least_recent(tmp_path):
+    cache = EmbeddingCache(str(tmp_path), "m", capacity=2)
+    cache.put_many(["a", "b"], [vec(1), vec(2)])
+    cache.get_many(["a"])
+    cache.put_many(["c"], [vec(3)])
+
+    vectors, missing = cache.get_many(["a", "b", "c"])
+    assert missing == [1]
+    assert np.allclose(vectors[0], vec(1)) and np.allclose(vectors[2], vec(3))
+
+
+def test_second_instance_is_read_only(tmp_path):
+    writer = EmbeddingCache(str(tmp_path), "m", capacity=2)
+    writer.put_many(["a", "b"], [vec(1), vec(2)])
+    reader = EmbeddingCache(str(tmp_path), "m", capacity=2)
+    assert reader.read_only
+
+    reader.put_many(["z"], [vec(9)])  # Ignored
+    writer.put_many(["c"], [vec(3)])  # Reuses a's slot behind the reader's back
+
+    vectors, missing = reader.get_many(["a", "b", "z"])
+    assert missing == [0, 2]
+    assert np.allclose(vectors[1], vec(2))
+
+
+def test_logged_key_without_vector_is_a_miss(tmp_path):
+    cache = EmbeddingCache(str(tmp_path), "m", capacity=2)
+    cache.put_many(["a", "b"], [vec(1), vec(2)])
+    cache.put_many(["c"], [vec(3)])
+    # Crash after logging an insert into a's old slot but before writing it
+    slot = cache._slots[cache_key("m", "c")]
+    with open(cache.log_path, "a") as f:
+        f.write(f"{cache_key('m', 'q')} {slot}\n")
+    cache._lock_file.close()
+
+    reopened = EmbeddingCache(str(tmp_path), "m", capacity=2)
+    vectors, missing = reopened.get_many(["q", "b"])
+    assert missing == [0]
+    assert np.allclose(vectors[1], vec(2))
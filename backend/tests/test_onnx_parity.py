@@ -0,0 +1,25 @@
+"""ONNX int8 encoder vs the PyTorch SentenceTransformer it replaces"""
+import pytest
+
+pytest.importorskip("onnxruntime")
+pytest.importorskip("onnx")
+pytest.importorskip("sentence_transformers")
+
+from src.services.indexing.onnx_encoder import parity_check  # noqa: E402
+
+
+TEXTS = [
+    "Attention is all you need.",
+    "The Transformer replaces recurrence with multi-head self-attention over the whole sequence.",
+    "We trained on the WMT 2014 English-German dataset of about 4.5 million sentence pairs.",
+    "Table 2: BLEU scores on newstest2014.",
+    "Dropout of 0.1 was applied to the output of each sub-layer before it is added to the "
+    "sub-layer input and normalized, and to the sums of the embeddings and positional encodings "
+    "in both the encoder and decoder stacks.",
+]
+
+
+def test_int8_vectors_match_torch(tmp_path):
+    result = parity_check(TEXTS, model_dir=str(tmp_path))
+    assert result["min_cosine"] >= 0.98
+    assert result["mean_cosine"] >= 0.99
@@ -0,0 +1,18 @@
+"""Tests for the per-paper full-text store"""
+from src.services.ingestion.paper_text_store import PaperTextStore
+
+
+def test_spans_survive_reopen_with_crlf(tmp_path):
+    PaperTextStore(str(tmp_path)).put("p", "ab\r\ncdef", [0, 4])
+
+    reopened = PaperTextStore(str(tmp_path))
+    assert reopened.slice("p", 4, 8) == "cdef"
+    assert reopened.pages("p", 4, 8) == (2, 2)
+
+
+def test_delete_forgets_paper(tmp_path):
+    store = PaperTextStore(str(tmp_path))
+    store.put("p", "text", [0])
+    store.delete("p")
+    assert store.slice("p", 0, 4) is None
+    assert PaperTextStore(str(tmp_path)).slice("p", 0, 4) is None